@@ -0,0 +1,369 @@
+import fnmatch
+import glob
+import json
+import os
+import posixpath
+import re
+import shutil
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import unquote
+
+from ops_metrics import add_counts, instrumented_run, phase
+from task_runner import file_digest, load_json_cache, save_json_cache
+
+# Audit of public/: byte-identical duplicates, placeholder/stray files and assets nothing references.
+# Hard links count as one file, and manifest-listed copies (fingerprinted /static/ files) aren't
+# reported as duplicates of their originals.
+#
+# Every file under public/ is hashed on a thread pool; hashes are cached by (size, mtime) so a
+# warm run only stats the tree. References are collected from the site pages, CSS, TS/JS sources
+# and data files by scanning them for path-like tokens that end in an extension some asset has:
+#   - "/images/x.png", "images/x.png", url(../images/x.png) resolve to one asset;
+#   - template strings such as `images/groups/${photoPath}` match every asset their pattern fits;
+#   - quoted directory prefixes at least two levels deep ("images/flags/") keep the files in that
+#     directory, since they are usually completed at runtime;
+#   - bare file names ("cozy_cafe.jpg") match every asset with that name.
+# When an asset is referenced, its entries in the image/asset manifests (WebP/AVIF variants,
+# fingerprinted copies) count as referenced too. The matching errs on the side of keeping files.
+#
+# The deploy set is public/ minus unreferenced assets and placeholders. Vite copies public/ into
+# dist/ verbatim, so --prune-dist removes the pruned files from a fresh build before deploying,
+# and --emit=DIR hard-links the deploy set into DIR.
+
+# --- CONFIGURATION ---
+PUBLIC_DIR = './public'
+BUILD_DIR = './dist' # Vite output, where public/ ends up; the hosting "public" directory in firebase.json
+HASH_CACHE_PATH = './.cache/asset_hashes.json'
+HASH_WORKERS = min(32, (os.cpu_count() or 1) * 2)
+REFERENCE_GLOBS = [
+    "*.html", "landing/**/*.html", "y/**/*.html",
+    "src/**/*.ts", "src/**/*.js", "src/**/*.css",
+    "landing/**/*.ts", "landing/**/*.js", "landing/**/*.css",
+    "public/**/*.html", "public/**/*.css", "public/**/*.js", "public/**/*.json",
+    "groups_data.json", "functions/*.ts", "api/*.ts",
+]
+# Maps from an asset URL to derived files; a referenced asset keeps what its entry lists
+MANIFEST_PATHS = ['./image_manifest.json', './asset_manifest.json']
+ALWAYS_KEEP = ["favicon.ico", "robots.txt", "sitemap.xml", "manifest.json", "_headers", "_redirects", "data/shards/**"]
+TOP_N = 20
+# --- END CONFIGURATION ---
+
+CACHE_VERSION = 1
+PATH_CHARS = r"[\w${}./%~+-]"
+# Placeholders like "market_scene.jpg.txt" stand in for a real image that was never added
+PLACEHOLDER_PATTERN = re.compile(r"\.(png|jpe?g|gif|webp|avif|svg|mp3|wav|ogg)\.txt$", re.IGNORECASE)
+TEMPLATE_VAR_PATTERN = re.compile(r"\$\{[^}]*\}")
+
+
+def hash_public_tree(public_dir=PUBLIC_DIR, cache_path=HASH_CACHE_PATH, max_workers=HASH_WORKERS):
+    """
+    Hashes every file under public_dir in parallel, reusing cached hashes of unchanged files.
+
+    Returns:
+        tuple: ({relative path (posix): {"sha256", "bytes", "inode"}}, number of files hashed this run),
+               where inode is (st_dev, st_ino), shared by hard links to the same file.
+    """
+    paths = []
+    for dir_path, _, file_names in os.walk(public_dir):
+        paths.extend(os.path.join(dir_path, name) for name in file_names)
+    cache = load_json_cache(cache_path, CACHE_VERSION, {"files": {}})["files"]
+    cached_before = dict(cache)
+
+    def digest_and_inode(path):
+        st = os.stat(path)
+        return file_digest(path, cache), (st.st_dev, st.st_ino)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        digests = list(executor.map(digest_and_inode, paths))
+
+    assets = {}
+    for path, (digest, inode) in zip(paths, digests):
+        rel_path = os.path.relpath(path, public_dir).replace(os.sep, "/")
+        assets[rel_path] = {"sha256": digest, "bytes": cache[path][0], "inode": inode}
+    save_json_cache({"version": CACHE_VERSION, "files": {path: cache[path] for path in paths}}, cache_path)
+    hashed = sum(1 for path in paths if cached_before.get(path) != cache[path])
+    add_counts(files=len(paths), files_hashed=hashed, bytes=sum(a["bytes"] for a in assets.values()))
+    return assets, hashed
+
+
+def find_duplicates(assets, derived=()):
+    """
+    Returns [[paths]] of byte-identical files, largest wasted bytes first.
+
+    Hard links to one file count once (the first path is listed), and derived (manifest-listed
+    copies such as fingerprinted /static/ files, identical to their original by design) are left out.
+    """
+    by_hash = {}
+    for rel_path in sorted(assets):
+        if rel_path not in derived:
+            by_hash.setdefault(assets[rel_path]["sha256"], {}).setdefault(assets[rel_path]["inode"], rel_path)
+    groups = [sorted(paths.values()) for paths in by_hash.values() if len(paths) > 1]
+    return sorted(groups, key=lambda paths: (len(paths) - 1) * assets[paths[0]]["bytes"], reverse=True)
+
+
+def is_junk(rel_path):
+    """Placeholder .txt stand-ins and stray files (no extension, or whitespace in the name)."""
+    name = rel_path.rsplit("/", 1)[-1]
+    return bool(PLACEHOLDER_PATTERN.search(name)) or "." not in name or any(c.isspace() for c in name)
+
+
+def build_token_patterns(assets):
+    """Regexes for file tokens (ending in an extension some asset has) and quoted directory prefixes."""
+    extensions = sorted({p.rsplit(".", 1)[1] for p in assets if "." in p.rsplit("/", 1)[-1]}, key=len, reverse=True)
+    file_pattern = re.compile(rf"{PATH_CHARS}*\.(?:{'|'.join(map(re.escape, extensions))})(?![\w-])", re.IGNORECASE)
+    dir_pattern = re.compile(rf"""["'`]({PATH_CHARS}+/)["'`]""")
+    return file_pattern, dir_pattern
+
+
+class AssetIndex:
+    """Lookups from a referenced token to the assets it means."""
+
+    def __init__(self, assets):
+        self.paths = set(assets)
+        self.by_name = {}
+        self.by_dir = {}
+        for rel_path in assets:
+            directory, _, name = rel_path.rpartition("/")
+            self.by_name.setdefault(name, []).append(rel_path)
+            self.by_dir.setdefault(directory, []).append(rel_path)
+
+    def resolve(self, token, ref_dir):
+        """Returns the asset paths a file token could refer to, seen from a file served at ref_dir."""
+        token = unquote(token.split("?", 1)[0].split("#", 1)[0])
+        if token.startswith("//"):
+            return [] # Protocol-relative URL to another host
+        if "${" in token:
+            stripped = re.sub(r"^(\$\{[^}]*\})+", "", token)
+            if "${" in stripped:
+                parts = TEMPLATE_VAR_PATTERN.split(stripped.lstrip("/"))
+                regex = re.compile("(?:.*/)?" + "[^/]*".join(map(re.escape, parts)) + "$")
+                return [p for p in self.paths if regex.match(p)]
+            token = stripped
+        if "/" not in token:
+            return self.by_name.get(token, [])
+        if token.startswith("/"):
+            candidates = [token[1:]]
+        else:
+            candidates = [posixpath.normpath(posixpath.join(ref_dir, token)), posixpath.normpath(token)]
+        return [c for c in candidates if c in self.paths]
+
+    def resolve_dir(self, prefix):
+        """Files directly inside a quoted directory prefix, if it is at least two levels deep."""
+        prefix = TEMPLATE_VAR_PATTERN.sub("", prefix).strip("/").lstrip("./")
+        if prefix.count("/") < 1:
+            return [] # "images/" or "/" says nothing about which files are used
+        return self.by_dir.get(prefix, [])
+
+
+def served_dir(source_path, public_dir=PUBLIC_DIR):
+    """The URL directory a source file is served from, for resolving its relative references."""
+    rel_to_public = os.path.relpath(source_path, public_dir).replace(os.sep, "/")
+    if not rel_to_public.startswith("../"):
+        return posixpath.dirname(rel_to_public)
+    if source_path.endswith((".html", ".css")):
+        return posixpath.dirname(os.path.normpath(source_path).replace(os.sep, "/"))
+    return "" # Module sources resolve their asset strings against the site base URL
+
+
+def collect_references(assets, reference_globs=REFERENCE_GLOBS, public_dir=PUBLIC_DIR):
+    """
+    Scans the reference sources for asset tokens.
+
+    Returns:
+        dict: {asset path: set of source files referencing it}
+    """
+    index = AssetIndex(assets)
+    file_pattern, dir_pattern = build_token_patterns(assets)
+    sources = sorted({os.path.normpath(p) for g in reference_globs for p in glob.glob(g, recursive=True) if os.path.isfile(p)})
+    references = {}
+    for source_path in sources:
+        try:
+            with open(source_path, 'r', encoding='utf-8', errors='replace') as f:
+                text = f.read()
+        except OSError as e:
+            print(f"Warning: Could not read {source_path}: {e}")
+            continue
+        ref_dir = served_dir(source_path, public_dir)
+        source_key = source_path.replace(os.sep, "/")
+        source_asset = os.path.relpath(source_path, public_dir).replace(os.sep, "/")
+        for match in file_pattern.finditer(text):
+            for rel_path in index.resolve(match.group(0), ref_dir):
+                if rel_path != source_asset:
+                    references.setdefault(rel_path, set()).add(source_key)
+        for match in dir_pattern.finditer(text):
+            for rel_path in index.resolve_dir(match.group(1)):
+                references.setdefault(rel_path, set()).add(source_key)
+    add_counts(sources=len(sources))
+    return references
+
+
+def read_manifest_entries(manifest_paths=MANIFEST_PATHS):
+    """Yields (manifest path, asset URL, [derived URLs]) for every entry of the manifests that exist."""
+    def urls_in(value):
+        if isinstance(value, str):
+            return [value]
+        if isinstance(value, dict):
+            return [url for v in value.values() for url in urls_in(v)]
+        if isinstance(value, list):
+            return [url for v in value for url in urls_in(v)]
+        return []
+
+    for manifest_path in manifest_paths:
+        try:
+            with open(manifest_path, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            continue
+        for url, entry in manifest.items():
+            yield manifest_path.replace(os.sep, "/"), url, urls_in(entry)
+
+
+def derived_assets(assets, manifest_paths=MANIFEST_PATHS):
+    """The assets the manifests list as variants or fingerprinted copies of another asset."""
+    return {url.lstrip("/") for _, _, derived in read_manifest_entries(manifest_paths)
+            for url in derived if url.lstrip("/") in assets}
+
+
+def expand_manifest_references(references, assets, manifest_paths=MANIFEST_PATHS):
+    """Marks the variants/fingerprinted copies of referenced assets as referenced, in place."""
+    for manifest_path, url, derived_urls in read_manifest_entries(manifest_paths):
+        if url.lstrip("/") not in references:
+            continue
+        for derived in derived_urls:
+            derived = derived.lstrip("/")
+            if derived in assets:
+                references.setdefault(derived, set()).add(manifest_path)
+
+
+def plan_deploy_set(assets, references, always_keep=ALWAYS_KEEP):
+    """
+    Returns (keep, prune): sorted asset paths. Files matching always_keep are kept; otherwise
+    placeholders and stray files are pruned, and so is anything unreferenced.
+    """
+    keep, prune = [], []
+    for rel_path in sorted(assets):
+        if any(fnmatch.fnmatchcase(rel_path, pattern) for pattern in always_keep):
+            keep.append(rel_path)
+        elif not is_junk(rel_path) and rel_path in references:
+            keep.append(rel_path)
+        else:
+            prune.append(rel_path)
+    return keep, prune
+
+
+def format_mb(num_bytes):
+    return f"{num_bytes / (1024 * 1024):.2f} MB"
+
+
+def print_audit_report(assets, references, duplicates, keep, prune, list_all=False):
+    total = sum(a["bytes"] for a in assets.values())
+    junk = [p for p in assets if is_junk(p)]
+    unreferenced = [p for p in prune if p not in junk]
+
+    wasted = sum((len(paths) - 1) * assets[paths[0]]["bytes"] for paths in duplicates)
+    print(f"\nDuplicates: {len(duplicates)} groups of byte-identical files, {format_mb(wasted)} redundant.")
+    for paths in duplicates[:TOP_N]:
+        print(f"  {assets[paths[0]]['bytes']:>10,} B x{len(paths)}")
+        for rel_path in paths:
+            used_by = references.get(rel_path)
+            print(f"      {rel_path}" + (f"  (used by {', '.join(sorted(used_by)[:3])}{' ...' if len(used_by) > 3 else ''})"
+                                        if used_by else "  (unreferenced)"))
+
+    print(f"\nPlaceholders and stray files: {len(junk)}")
+    for rel_path in sorted(junk):
+        print(f"  {assets[rel_path]['bytes']:>10,} B  {rel_path}")
+
+    print(f"\nUnreferenced assets: {len(unreferenced)}, {format_mb(sum(assets[p]['bytes'] for p in unreferenced))}")
+    by_dir = {}
+    for rel_path in unreferenced:
+        totals = by_dir.setdefault(posixpath.dirname(rel_path) or ".", [0, 0])
+        totals[0] += 1
+        totals[1] += assets[rel_path]["bytes"]
+    for directory, (count, num_bytes) in sorted(by_dir.items(), key=lambda item: item[1][1], reverse=True):
+        print(f"  {directory:<56} {count:>5} files {format_mb(num_bytes):>10}")
+    for rel_path in (unreferenced if list_all else unreferenced[:TOP_N]):
+        print(f"      {rel_path}")
+    if not list_all and len(unreferenced) > TOP_N:
+        print(f"      ... {len(unreferenced) - TOP_N} more (--list shows all)")
+
+    pruned_bytes = sum(assets[p]["bytes"] for p in prune)
+    print(f"\nDeploy set: {len(keep)} of {len(assets)} files, {format_mb(total - pruned_bytes)} of {format_mb(total)} "
+          f"({pruned_bytes / total if total else 0:.0%} smaller).")
+
+
+def emit_deploy_set(keep, output_dir, public_dir=PUBLIC_DIR):
+    """Hard-links (or copies, across devices) the kept files into an empty output_dir."""
+    if os.path.isdir(output_dir) and os.listdir(output_dir):
+        print(f"Error: {output_dir} is not empty; refusing to write the deploy set into it.")
+        return False
+    for rel_path in keep:
+        src_path = os.path.join(public_dir, rel_path)
+        dst_path = os.path.join(output_dir, rel_path)
+        os.makedirs(os.path.dirname(dst_path), exist_ok=True)
+        try:
+            os.link(src_path, dst_path)
+        except OSError:
+            shutil.copy2(src_path, dst_path)
+    print(f"Wrote the deploy set ({len(keep)} files) to {output_dir}.")
+    return True
+
+
+def prune_build_dir(prune, assets, build_dir=BUILD_DIR):
+    """Deletes pruned files from the build output, only where they are still the public/ copy."""
+    if not os.path.isdir(build_dir):
+        print(f"Error: {build_dir} does not exist; run the build first.")
+        return False
+    removed = removed_bytes = 0
+    file_cache = {}
+    for rel_path in prune:
+        build_path = os.path.join(build_dir, rel_path)
+        if not os.path.isfile(build_path) or file_digest(build_path, file_cache) != assets[rel_path]["sha256"]:
+            continue # Not there, or a build step produced something else at that path
+        os.remove(build_path)
+        removed += 1
+        removed_bytes += assets[rel_path]["bytes"]
+    add_counts(files_pruned=removed, bytes_pruned=removed_bytes)
+    print(f"Removed {removed} unused files ({format_mb(removed_bytes)}) from {build_dir}.")
+    return True
+
+
+def audit_assets(list_all=False, emit_dir=None, prune_dist=False):
+    """
+    Hashes public/, reports duplicates, placeholders and unreferenced assets, and optionally
+    writes the pruned deploy set.
+
+    Returns:
+        dict: {"keep": [...], "prune": [...], "duplicates": [[...]]}, or None if writing failed.
+    """
+    start = time.perf_counter()
+    with phase("hash public"):
+        assets, hashed = hash_public_tree()
+    print(f"Hashed {len(assets)} files under {PUBLIC_DIR} ({hashed} changed since the last run) "
+          f"in {time.perf_counter() - start:.2f}s.")
+    with phase("collect references"):
+        references = collect_references(assets)
+        expand_manifest_references(references, assets)
+    duplicates = find_duplicates(assets, derived_assets(assets))
+    keep, prune = plan_deploy_set(assets, references)
+    print_audit_report(assets, references, duplicates, keep, prune, list_all)
+
+    result = {"keep": keep, "prune": prune, "duplicates": duplicates}
+    with phase("write deploy set"):
+        if emit_dir and not emit_deploy_set(keep, emit_dir):
+            return None
+        if prune_dist and not prune_build_dir(prune, assets):
+            return None
+    return result
+
+
+if __name__ == "__main__":
+    # python asset_audit.py [--list] [--emit=DIR] [--prune-dist]
+    # Assuming the script is in the project root, like migrate_to_public.py
+    os.chdir(os.path.dirname(os.path.abspath(__file__)))
+    emit = next((arg.split("=", 1)[1] for arg in sys.argv if arg.startswith("--emit=")), None)
+    with instrumented_run("asset_audit"):
+        outcome = audit_assets(list_all="--list" in sys.argv, emit_dir=emit, prune_dist="--prune-dist" in sys.argv)
+    if outcome is None:
+        sys.exit(1)
@@ -0,0 +1,105 @@
+import json
+import os
+import re
+
+# Precomputed index of what seeded group documents may reference: every file under public/
+# (as the URL path the site serves it at, e.g. "/images/groups/spanish_cafe.png") and every
+# persona id declared in src/data/personas.ts. Lookups are set membership, so checking a
+# record is O(1).
+#
+# The index is cached on disk. It is reused as long as the mtime of personas.ts and of every
+# directory under public/ is unchanged - adding, removing or renaming a file bumps its
+# directory's mtime - so a warm run stats a few dozen directories instead of walking the tree.
+
+PUBLIC_DIR = './public'
+PERSONAS_TS_PATH = './src/data/personas.ts'
+ASSET_INDEX_CACHE_PATH = './.cache/asset_index.json'
+CACHE_VERSION = 1
+
+PERSONA_ID_PATTERN = re.compile(r'''^\s*id:\s*["']([^"']+)["']''', re.MULTILINE)
+
+
+class AssetIndex:
+    def __init__(self, asset_paths, persona_ids):
+        self.asset_paths = set(asset_paths)
+        self.persona_ids = set(persona_ids)
+
+    def has_asset(self, url_path):
+        """True if a site-absolute URL path like "/images/x.png" exists under public/."""
+        return url_path.split("?", 1)[0].split("#", 1)[0] in self.asset_paths
+
+    def has_persona(self, persona_id):
+        return persona_id in self.persona_ids
+
+
+def scan_public_dir(public_dir):
+    """Walks public/ and returns (asset URL paths, {relative dir: mtime_ns})."""
+    asset_paths = []
+    dir_mtimes = {}
+    for dir_path, _, file_names in os.walk(public_dir):
+        rel_dir = os.path.relpath(dir_path, public_dir).replace(os.sep, "/")
+        dir_mtimes[rel_dir] = os.stat(dir_path).st_mtime_ns
+        url_dir = "/" if rel_dir == "." else f"/{rel_dir}/"
+        asset_paths.extend(url_dir + name for name in file_names)
+    return asset_paths, dir_mtimes
+
+
+def read_persona_ids(personas_path):
+    """Extracts the persona `id: "..."` values from personas.ts."""
+    with open(personas_path, 'r', encoding='utf-8') as f:
+        return PERSONA_ID_PATTERN.findall(f.read())
+
+
+def _cache_is_fresh(cache, public_dir, personas_path):
+    if cache.get("version") != CACHE_VERSION:
+        return False
+    if cache.get("public_dir") != os.path.abspath(public_dir) or cache.get("personas_path") != os.path.abspath(personas_path):
+        return False
+    try:
+        if os.stat(personas_path).st_mtime_ns != cache["personas_mtime_ns"]:
+            return False
+        for rel_dir, mtime_ns in cache["dir_mtimes"].items():
+            if os.stat(os.path.join(public_dir, rel_dir)).st_mtime_ns != mtime_ns:
+                return False
+    except (OSError, KeyError):
+        return False
+    return True
+
+
+def load_asset_index(public_dir=PUBLIC_DIR, personas_path=PERSONAS_TS_PATH, cache_path=ASSET_INDEX_CACHE_PATH):
+    """
+    Returns an AssetIndex, from the on-disk cache when it is still fresh, otherwise by rescanning
+    and rewriting the cache. Pass cache_path=None to skip the cache entirely.
+    """
+    if cache_path and os.path.exists(cache_path):
+        try:
+            with open(cache_path, 'r', encoding='utf-8') as f:
+                cache = json.load(f)
+            if _cache_is_fresh(cache, public_dir, personas_path):
+                return AssetIndex(cache["asset_paths"], cache["persona_ids"])
+        except (OSError, ValueError) as e:
+            print(f"Warning: Ignoring unreadable asset index cache {cache_path}: {e}")
+
+    asset_paths, dir_mtimes = scan_public_dir(public_dir)
+    persona_ids = read_persona_ids(personas_path)
+    print(f"Indexed {len(asset_paths)} public assets and {len(persona_ids)} persona ids.")
+
+    if cache_path:
+        cache = {
+            "version": CACHE_VERSION,
+            "public_dir": os.path.abspath(public_dir),
+            "personas_path": os.path.abspath(personas_path),
+            "personas_mtime_ns": os.stat(personas_path).st_mtime_ns,
+            "dir_mtimes": dir_mtimes,
+            "asset_paths": sorted(asset_paths),
+            "persona_ids": sorted(persona_ids),
+        }
+        try:
+            os.makedirs(os.path.dirname(cache_path) or ".", exist_ok=True)
+            tmp_path = f"{cache_path}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(cache, f)
+            os.replace(tmp_path, cache_path)
+        except OSError as e:
+            print(f"Warning: Could not write asset index cache {cache_path}: {e}")
+    return AssetIndex(asset_paths, persona_ids)
@@ -1,20 +1,68 @@
 import shutil
 import os
 import datetime
+import stat
+import gzip
+import hashlib
+import json
+import re
+import sys
+import tarfile
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
 
-def backup_project(source_dir_path, backup_parent_dir_path):
+from ops_metrics import add_counts, instrumented_run, phase
+
+try:
+    import zstandard # Optional: pip install zstandard for multi-threaded zstd archives
+except ImportError:
+    zstandard = None
+
+# --- CONFIGURATION ---
+# "copy" makes a full copytree clone into <name>_old (the original behaviour).
+# "snapshot" makes an incremental, content-addressed snapshot under <name>_snapshots.
+# "archive" streams the tree into a single compressed <name>_<timestamp>.tar.zst / .tar.gz.
+BACKUP_MODE = "copy"
+HASH_CHUNK_SIZE = 1024 * 1024 # Read files in 1 MiB chunks when hashing
+COPY_WORKERS = min(32, (os.cpu_count() or 1) * 4) # Copies are I/O-bound, so oversubscribe the CPUs
+ZERO_COPY_THRESHOLD = 256 * 1024 # Files at least this big are copied in-kernel where the OS allows it
+ZERO_COPY_CHUNK_SIZE = 8 * 1024 * 1024
+# gitignore-style patterns left out of archives. A .backupignore file in the project root adds more.
+ARCHIVE_EXCLUDES = ["node_modules/", "dist/", ".firebase/", "__pycache__/", "*.pyc"]
+ARCHIVE_COMPRESSION = "auto" # "auto" (zstd if installed, else gzip), "zstd" or "gzip"
+ZSTD_LEVEL = 10
+GZIP_LEVEL = 6
+# --- END CONFIGURATION ---
+
+def backup_project(source_dir_path, backup_parent_dir_path, mode=BACKUP_MODE):
     """
     Backs up the project directory.
 
     Args:
-        source_dir_path (str): The path to the source project directory (e.g., "D:\\polyglot_connect").
-        backup_parent_dir_path (str): The path to the directory where the backup folder will be created 
-                                      (e.g., "D:\\" if you want "D:\\polyglot_connect_old").
+        source_dir_path (str): The path to the source project directory (e.g., "/work/polyglot_connect").
+        backup_parent_dir_path (str): The path to the directory where the backup folder will be created
+                                      (e.g., "/work" if you want "/work/polyglot_connect_old").
+        mode (str): "copy" for a full clone, "snapshot" for an incremental snapshot (see snapshot_project),
+                    "archive" for a compressed tarball (see archive_project).
+
+    Returns:
+        str: Path of the backup, or None on failure.
     """
     if not os.path.exists(source_dir_path):
         print(f"Error: Source directory '{source_dir_path}' does not exist.")
         return
 
+    if mode == "snapshot":
+        with phase("snapshot"):
+            return snapshot_project(source_dir_path, backup_parent_dir_path)
+    elif mode == "archive":
+        with phase("archive"):
+            return archive_project(source_dir_path, backup_parent_dir_path)
+    elif mode != "copy":
+        print(f"Error: Unknown backup mode '{mode}'. Use 'copy', 'snapshot' or 'archive'.")
+        return
+
     source_dir_name = os.path.basename(source_dir_path)
     backup_dir_name = f"{source_dir_name}_old"
     backup_dir_path = os.path.join(backup_parent_dir_path, backup_dir_name)
@@ -35,25 +83,545 @@ def backup_project(source_dir_path, backup_parent_dir_path):
     print(f"Starting backup of '{source_dir_path}' to '{backup_dir_path}'...")
     try:
         # Copy the entire directory tree, including node_modules for a complete snapshot.
-        # If you want to exclude node_modules, you can use shutil.copytree with an ignore pattern.
-        shutil.copytree(source_dir_path, backup_dir_path, symlinks=True) # symlinks=True if you use them
+        with phase("copy"):
+            stats = parallel_copytree(source_dir_path, backup_dir_path)
+            add_counts(files=stats["files"], bytes=stats["bytes"])
         print(f"Backup completed successfully: '{backup_dir_path}'")
+        print_copy_stats(stats)
+        return backup_dir_path
     except Exception as e:
         print(f"Error during backup: {e}")
+        return None
 
-if __name__ == "__main__":
-    # IMPORTANT: Adjust these paths if your actual polyglot_connect is elsewhere
-    # or if you want the _old directory placed differently.
-    project_directory = r"D:\polyglot_connect" 
-    parent_of_project_directory = r"D:\\" # This will create D:\polyglot_connect_old
-
-    # Confirm paths with the user
-    print(f"This script will back up: {project_directory}")
-    print(f"To a new folder named: {os.path.basename(project_directory)}_old")
-    print(f"Inside this location: {parent_of_project_directory}")
-    
-    proceed = input("Do you want to proceed? (yes/no): ").strip().lower()
-    if proceed == 'yes':
-        backup_project(project_directory, parent_of_project_directory)
+
+# --- Parallel copy engine ---
+
+def scan_tree(source_dir_path):
+    """Walks a tree with os.scandir.
+
+    Returns (dirs, files, symlinks) as lists of paths relative to source_dir_path; dirs are
+    parent-first and files carry their size: [(rel_path, size), ...].
+    """
+    dirs, files, symlinks = [], [], []
+    pending = [""]
+    while pending:
+        rel_dir = pending.pop()
+        with os.scandir(os.path.join(source_dir_path, rel_dir)) as it:
+            for entry in it:
+                rel_path = os.path.join(rel_dir, entry.name)
+                if entry.is_symlink():
+                    symlinks.append(rel_path)
+                elif entry.is_dir():
+                    dirs.append(rel_path)
+                    pending.append(rel_path)
+                else:
+                    files.append((rel_path, entry.stat().st_size))
+    return dirs, files, symlinks
+
+def zero_copy_file(src_path, dst_path, size):
+    """Copies a file in-kernel with os.copy_file_range (or os.sendfile), in fixed-size chunks.
+
+    Falls back to shutil.copyfile on platforms or filesystems that support neither.
+    """
+    copy_range = getattr(os, "copy_file_range", None)
+    sendfile = getattr(os, "sendfile", None)
+    if copy_range is None and sendfile is None:
+        shutil.copyfile(src_path, dst_path)
+        return
+    with open(src_path, 'rb') as src, open(dst_path, 'wb') as dst:
+        in_fd, out_fd = src.fileno(), dst.fileno()
+        offset = 0
+        while offset < size:
+            count = min(ZERO_COPY_CHUNK_SIZE, size - offset)
+            try:
+                if copy_range is not None:
+                    sent = copy_range(in_fd, out_fd, count)
+                else:
+                    sent = sendfile(out_fd, in_fd, offset, count)
+            except OSError:
+                # e.g. EXDEV/ENOSYS on older kernels or exotic filesystems: finish with a plain copy
+                src.seek(offset)
+                dst.seek(offset)
+                shutil.copyfileobj(src, dst, ZERO_COPY_CHUNK_SIZE)
+                return
+            if sent == 0: # File shrank while we were copying it
+                break
+            offset += sent
+
+def copy_one_file(src_path, dst_path, size):
+    """Copies a single file with its metadata, choosing the zero-copy path for large files."""
+    if size >= ZERO_COPY_THRESHOLD:
+        zero_copy_file(src_path, dst_path, size)
+    else:
+        shutil.copyfile(src_path, dst_path)
+    shutil.copystat(src_path, dst_path)
+    return size
+
+def parallel_copytree(source_dir_path, dest_dir_path, max_workers=COPY_WORKERS):
+    """
+    Copies a directory tree like shutil.copytree(symlinks=True), but fans the file copies out over
+    a bounded thread pool. Directories are created up front so workers never race on makedirs.
+
+    Args:
+        source_dir_path (str): The tree to copy.
+        dest_dir_path (str): The destination; must not exist yet.
+        max_workers (int): Upper bound on concurrent file copies.
+
+    Returns:
+        dict: {"files", "bytes", "seconds"} for throughput reporting.
+    """
+    start = time.perf_counter()
+    dirs, files, symlinks = scan_tree(source_dir_path)
+
+    os.makedirs(dest_dir_path)
+    for rel_dir in dirs:
+        os.mkdir(os.path.join(dest_dir_path, rel_dir))
+    for rel_link in symlinks:
+        os.symlink(os.readlink(os.path.join(source_dir_path, rel_link)), os.path.join(dest_dir_path, rel_link))
+
+    # Copy the biggest files first so a few large PNGs/MP3s don't end up as the long tail
+    files.sort(key=lambda item: item[1], reverse=True)
+    total_bytes = 0
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        results = executor.map(
+            lambda item: copy_one_file(os.path.join(source_dir_path, item[0]),
+                                       os.path.join(dest_dir_path, item[0]), item[1]),
+            files)
+        for copied in results:
+            total_bytes += copied
+
+    # Directory mtimes change as their contents are written, so copy them last
+    for rel_dir in reversed(dirs):
+        shutil.copystat(os.path.join(source_dir_path, rel_dir), os.path.join(dest_dir_path, rel_dir))
+    shutil.copystat(source_dir_path, dest_dir_path)
+
+    return {"files": len(files), "bytes": total_bytes, "seconds": time.perf_counter() - start}
+
+def print_copy_stats(stats):
+    """Prints file count, size and throughput for a copy run."""
+    seconds = max(stats["seconds"], 1e-9)
+    megabytes = stats["bytes"] / (1024 * 1024)
+    print(f"  {stats['files']} files, {megabytes:.1f} MB in {stats['seconds']:.2f}s "
+          f"({stats['files'] / seconds:.0f} files/s, {megabytes / seconds:.1f} MB/s)")
+
+def benchmark_copy_engines(num_files=50000, file_size=2048, files_per_dir=500):
+    """
+    Compares shutil.copytree against parallel_copytree on a synthetic tree of small files,
+    roughly the shape of a node_modules folder. Everything lives in a temporary directory.
+    """
+    with tempfile.TemporaryDirectory(prefix="backup_bench_") as work_dir:
+        source = os.path.join(work_dir, "source")
+        print(f"Creating synthetic tree: {num_files} files of {file_size} bytes in {source}...")
+        payload = os.urandom(file_size)
+        for i in range(num_files):
+            dir_path = os.path.join(source, f"pkg_{i // files_per_dir:04d}", "lib")
+            if i % files_per_dir == 0:
+                os.makedirs(dir_path)
+            with open(os.path.join(dir_path, f"module_{i}.js"), 'wb') as f:
+                f.write(payload)
+
+        start = time.perf_counter()
+        shutil.copytree(source, os.path.join(work_dir, "copytree"), symlinks=True)
+        copytree_seconds = time.perf_counter() - start
+        print(f"shutil.copytree:   {copytree_seconds:.2f}s ({num_files / copytree_seconds:.0f} files/s)")
+
+        stats = parallel_copytree(source, os.path.join(work_dir, "parallel"))
+        print(f"parallel_copytree: {stats['seconds']:.2f}s ({num_files / stats['seconds']:.0f} files/s, "
+              f"{COPY_WORKERS} workers)")
+        print(f"Speedup: {copytree_seconds / stats['seconds']:.2f}x")
+
+
+# --- Incremental snapshots ---
+# Layout under <backup_parent>/<name>_snapshots:
+#   objects/ab/abcdef...   one file per unique content hash (sha256)
+#   manifests/<id>.json    relative path -> {"hash", "size", "mtime_ns", "mode"} (or {"symlink": target})
+#   snapshots/<id>/...     the browsable tree, every file hardlinked to its blob in objects/
+# Blobs are stored read-only: a snapshot file shares its inode with every other snapshot holding
+# the same content, so an in-place edit would change them all. A shared inode can't carry each
+# file's own mode and mtime either; the manifest keeps those, and restore_snapshot applies them.
+
+def hash_file(file_path):
+    """Returns the sha256 hex digest of a file, read in chunks."""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def load_latest_manifest(manifests_dir):
+    """Returns (snapshot_id, entries) for the newest manifest, or (None, {}) if there is none."""
+    if not os.path.isdir(manifests_dir):
+        return None, {}
+    manifest_names = sorted(n for n in os.listdir(manifests_dir) if n.endswith('.json'))
+    if not manifest_names:
+        return None, {}
+    latest = manifest_names[-1]
+    try:
+        with open(os.path.join(manifests_dir, latest), 'r', encoding='utf-8') as f:
+            return latest[:-len('.json')], json.load(f)["files"]
+    except (OSError, ValueError, KeyError) as e:
+        print(f"Warning: Could not read previous manifest '{latest}', every file will be rehashed: {e}")
+        return None, {}
+
+def store_blob(objects_dir, file_path, file_hash):
+    """Copies file_path into the object store under its hash unless that blob already exists.
+
+    Returns the blob path and the number of bytes written (0 when the blob was already stored).
+    """
+    blob_dir = os.path.join(objects_dir, file_hash[:2])
+    blob_path = os.path.join(blob_dir, file_hash)
+    if os.path.exists(blob_path):
+        return blob_path, 0
+    os.makedirs(blob_dir, exist_ok=True)
+    # Copy to a temp name first so an interrupted run never leaves a truncated blob behind
+    tmp_path = f"{blob_path}.tmp"
+    shutil.copyfile(file_path, tmp_path)
+    os.chmod(tmp_path, stat.S_IRUSR | stat.S_IRGRP | stat.S_IROTH) # Shared by every snapshot: read-only
+    os.replace(tmp_path, blob_path)
+    return blob_path, os.path.getsize(blob_path)
+
+def link_or_copy(blob_path, target_path):
+    """Hardlinks a blob into a snapshot tree, falling back to a copy where hardlinks are unsupported."""
+    try:
+        os.link(blob_path, target_path)
+    except OSError:
+        shutil.copyfile(blob_path, target_path)
+
+def snapshot_project(source_dir_path, backup_parent_dir_path):
+    """
+    Takes an incremental, content-addressed snapshot of the project directory.
+
+    Files whose size and mtime match the previous manifest reuse the recorded hash without being
+    re-read; changed files are hashed and only stored if their content is new. Every snapshot tree
+    is made of hardlinks into the shared object store, so an unchanged tree costs only directory
+    entries and a manifest. Blobs are shared between snapshots and stored read-only; the files'
+    own modes and mtimes are kept in the manifest (see restore_snapshot).
+
+    Args:
+        source_dir_path (str): The path to the source project directory.
+        backup_parent_dir_path (str): The directory that will hold the "<name>_snapshots" store.
+
+    Returns:
+        str: The path of the new snapshot tree, or None on failure.
+    """
+    source_dir_path = os.path.abspath(source_dir_path)
+    source_dir_name = os.path.basename(source_dir_path)
+    store_path = os.path.join(backup_parent_dir_path, f"{source_dir_name}_snapshots")
+    objects_dir = os.path.join(store_path, "objects")
+    manifests_dir = os.path.join(store_path, "manifests")
+    snapshots_dir = os.path.join(store_path, "snapshots")
+
+    if os.path.abspath(store_path).startswith(source_dir_path + os.sep):
+        print(f"Error: Snapshot store '{store_path}' must not live inside the source directory.")
+        return None
+
+    previous_id, previous_files = load_latest_manifest(manifests_dir)
+    snapshot_id = datetime.datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+    snapshot_path = os.path.join(snapshots_dir, snapshot_id)
+
+    print(f"Starting snapshot of '{source_dir_path}' to '{snapshot_path}'...")
+    if previous_id:
+        print(f"Comparing against previous snapshot '{previous_id}' ({len(previous_files)} files).")
+
+    files = {}
+    stats = {"files": 0, "reused": 0, "hashed": 0, "new_blobs": 0, "bytes_written": 0}
+    try:
+        os.makedirs(objects_dir, exist_ok=True)
+        os.makedirs(manifests_dir, exist_ok=True)
+        for dir_path, dir_names, file_names in os.walk(source_dir_path):
+            rel_dir = os.path.relpath(dir_path, source_dir_path)
+            target_dir = os.path.normpath(os.path.join(snapshot_path, rel_dir))
+            os.makedirs(target_dir, exist_ok=True)
+
+            # os.walk does not descend into symlinked directories; record them as links
+            for name in list(dir_names):
+                src_path = os.path.join(dir_path, name)
+                if os.path.islink(src_path):
+                    dir_names.remove(name)
+                    file_names.append(name)
+
+            for name in file_names:
+                src_path = os.path.join(dir_path, name)
+                rel_path = os.path.normpath(os.path.join(rel_dir, name)).replace(os.sep, '/')
+                target_path = os.path.join(target_dir, name)
+
+                if os.path.islink(src_path):
+                    link_target = os.readlink(src_path)
+                    os.symlink(link_target, target_path)
+                    files[rel_path] = {"symlink": link_target}
+                    continue
+
+                st = os.stat(src_path)
+                previous = previous_files.get(rel_path)
+                if previous and previous.get("size") == st.st_size and previous.get("mtime_ns") == st.st_mtime_ns:
+                    file_hash = previous["hash"]
+                    stats["reused"] += 1
+                else:
+                    file_hash = hash_file(src_path)
+                    stats["hashed"] += 1
+
+                blob_path, written = store_blob(objects_dir, src_path, file_hash)
+                if written:
+                    stats["new_blobs"] += 1
+                    stats["bytes_written"] += written
+                link_or_copy(blob_path, target_path)
+                files[rel_path] = {"hash": file_hash, "size": st.st_size, "mtime_ns": st.st_mtime_ns,
+                                   "mode": stat.S_IMODE(st.st_mode)}
+                stats["files"] += 1
+
+        manifest = {"snapshot": snapshot_id, "source": source_dir_path, "parent": previous_id, "files": files}
+        tmp_manifest = os.path.join(manifests_dir, f"{snapshot_id}.json.tmp")
+        with open(tmp_manifest, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=1, sort_keys=True)
+        os.replace(tmp_manifest, os.path.join(manifests_dir, f"{snapshot_id}.json"))
+    except Exception as e:
+        print(f"Error during snapshot: {e}")
+        return None
+
+    add_counts(files=stats["files"], files_hashed=stats["hashed"], bytes=stats["bytes_written"])
+    print(f"Snapshot completed successfully: '{snapshot_path}'")
+    print(f"  {stats['files']} files ({stats['reused']} unchanged, {stats['hashed']} hashed), "
+          f"{stats['new_blobs']} new blobs, {stats['bytes_written']} bytes written.")
+    return snapshot_path
+
+def restore_snapshot(store_path, dest_dir_path, snapshot_id=None):
+    """
+    Restores a snapshot as independent files (copies, not links to the object store), with the
+    mode and mtime each file had when the snapshot was taken.
+
+    Args:
+        store_path (str): The "<name>_snapshots" store.
+        dest_dir_path (str): Where to restore; must not exist or be empty.
+        snapshot_id (str): The snapshot to restore (a manifest name without .json); the newest if None.
+
+    Returns:
+        str: dest_dir_path, or None on failure.
+    """
+    manifests_dir = os.path.join(store_path, "manifests")
+    if snapshot_id is None:
+        snapshot_id, files = load_latest_manifest(manifests_dir)
     else:
-        print("Backup operation cancelled by the user.")
\ No newline at end of file
+        try:
+            with open(os.path.join(manifests_dir, f"{snapshot_id}.json"), 'r', encoding='utf-8') as f:
+                files = json.load(f)["files"]
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Error: Could not read manifest of snapshot '{snapshot_id}': {e}")
+            return None
+    if snapshot_id is None:
+        print(f"Error: No snapshot found in '{store_path}'.")
+        return None
+    if os.path.isdir(dest_dir_path) and os.listdir(dest_dir_path):
+        print(f"Error: '{dest_dir_path}' is not empty; refusing to restore into it.")
+        return None
+
+    objects_dir = os.path.join(store_path, "objects")
+    for rel_path, entry in sorted(files.items()):
+        target_path = os.path.join(dest_dir_path, *rel_path.split('/'))
+        os.makedirs(os.path.dirname(target_path), exist_ok=True)
+        if "symlink" in entry:
+            os.symlink(entry["symlink"], target_path)
+            continue
+        shutil.copyfile(os.path.join(objects_dir, entry["hash"][:2], entry["hash"]), target_path)
+        if "mode" in entry: # Manifests from before modes were recorded keep the default mode
+            os.chmod(target_path, entry["mode"])
+        os.utime(target_path, ns=(entry["mtime_ns"], entry["mtime_ns"]))
+    add_counts(files=len(files))
+    print(f"Restored snapshot '{snapshot_id}' ({len(files)} entries) to '{dest_dir_path}'.")
+    return dest_dir_path
+
+# --- Compressed archives ---
+
+def _gitignore_pattern_to_regex(pattern):
+    """Translates one gitignore-style pattern into a regex source matching a relative POSIX path."""
+    dir_only = pattern.endswith("/")
+    pattern = pattern.rstrip("/")
+    # Patterns without an inner slash match at any depth; otherwise they are anchored to the root
+    anchored = "/" in pattern
+    pattern = pattern.lstrip("/")
+
+    parts = []
+    i = 0
+    while i < len(pattern):
+        if pattern.startswith("**/", i):
+            parts.append("(?:.*/)?")
+            i += 3
+        elif pattern.startswith("**", i):
+            parts.append(".*")
+            i += 2
+        elif pattern[i] == "*":
+            parts.append("[^/]*")
+            i += 1
+        elif pattern[i] == "?":
+            parts.append("[^/]")
+            i += 1
+        else:
+            parts.append(re.escape(pattern[i]))
+            i += 1
+    body = "".join(parts)
+    prefix = "" if anchored else "(?:.*/)?"
+    # A directory pattern matches "<dir>/" only; the walker appends "/" to directory paths
+    suffix = "/" if dir_only else "/?"
+    return f"{prefix}{body}{suffix}"
+
+class ExcludeMatcher:
+    """
+    Compiles a list of gitignore-style patterns into two regexes (excludes and "!" re-includes),
+    so each path is checked with a single match call instead of looping over patterns.
+    Directory paths must be passed with a trailing "/".
+    """
+
+    def __init__(self, patterns):
+        excludes, includes = [], []
+        for raw in patterns:
+            pattern = raw.strip()
+            if not pattern or pattern.startswith("#"):
+                continue
+            if pattern.startswith("!"):
+                includes.append(_gitignore_pattern_to_regex(pattern[1:]))
+            else:
+                excludes.append(_gitignore_pattern_to_regex(pattern))
+        self._exclude = re.compile("|".join(f"(?:{r})" for r in excludes)) if excludes else None
+        self._include = re.compile("|".join(f"(?:{r})" for r in includes)) if includes else None
+
+    def is_excluded(self, rel_path):
+        if self._exclude is None or not self._exclude.fullmatch(rel_path):
+            return False
+        return not (self._include is not None and self._include.fullmatch(rel_path))
+
+def load_exclude_patterns(source_dir_path, base_patterns=ARCHIVE_EXCLUDES):
+    """Returns base_patterns plus any patterns from a .backupignore file in the project root."""
+    patterns = list(base_patterns)
+    ignore_file = os.path.join(source_dir_path, ".backupignore")
+    if os.path.isfile(ignore_file):
+        with open(ignore_file, 'r', encoding='utf-8') as f:
+            patterns.extend(line.rstrip("\n") for line in f)
+    return patterns
+
+def iter_included_paths(source_dir_path, matcher):
+    """Yields relative POSIX paths to archive, pruning excluded directories without descending."""
+    for dir_path, dir_names, file_names in os.walk(source_dir_path):
+        rel_dir = os.path.relpath(dir_path, source_dir_path).replace(os.sep, "/")
+        rel_dir = "" if rel_dir == "." else rel_dir + "/"
+        kept_dirs = []
+        for name in sorted(dir_names):
+            rel_path = rel_dir + name
+            if os.path.islink(os.path.join(dir_path, name)):
+                # Archived as a link entry, never followed
+                if not matcher.is_excluded(rel_path):
+                    yield rel_path
+            elif not matcher.is_excluded(rel_path + "/"):
+                kept_dirs.append(name)
+                yield rel_path
+        dir_names[:] = kept_dirs
+        for name in sorted(file_names):
+            rel_path = rel_dir + name
+            if not matcher.is_excluded(rel_path):
+                yield rel_path
+
+def resolve_compression(compression=ARCHIVE_COMPRESSION):
+    """Returns "zstd" or "gzip", honouring "auto" and falling back when zstandard is missing."""
+    if compression == "auto":
+        return "zstd" if zstandard is not None else "gzip"
+    if compression == "zstd" and zstandard is None:
+        print("Warning: zstandard is not installed (pip install zstandard); falling back to gzip.")
+        return "gzip"
+    if compression not in ("zstd", "gzip"):
+        raise ValueError(f"Unknown compression '{compression}'. Use 'auto', 'zstd' or 'gzip'.")
+    return compression
+
+def archive_project(source_dir_path, backup_parent_dir_path, compression=ARCHIVE_COMPRESSION, exclude_patterns=None):
+    """
+    Streams the project tree into a single compressed tar archive in one pass.
+
+    zstd archives are compressed on all cores via zstandard's worker threads; gzip is the stdlib
+    fallback. Paths matching the gitignore-style exclude patterns are skipped, and excluded
+    directories are never walked.
+
+    Args:
+        source_dir_path (str): The path to the source project directory.
+        backup_parent_dir_path (str): The directory the archive is written to.
+        compression (str): "auto", "zstd" or "gzip".
+        exclude_patterns (list): gitignore-style patterns; defaults to ARCHIVE_EXCLUDES plus .backupignore.
+
+    Returns:
+        str: The archive path, or None on failure.
+    """
+    source_dir_path = os.path.abspath(source_dir_path)
+    source_dir_name = os.path.basename(source_dir_path)
+    if exclude_patterns is None:
+        exclude_patterns = load_exclude_patterns(source_dir_path)
+    matcher = ExcludeMatcher(exclude_patterns)
+
+    try:
+        compression = resolve_compression(compression)
+    except ValueError as e:
+        print(f"Error: {e}")
+        return None
+    extension = "tar.zst" if compression == "zstd" else "tar.gz"
+    timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+    archive_path = os.path.join(backup_parent_dir_path, f"{source_dir_name}_{timestamp}.{extension}")
+    tmp_path = f"{archive_path}.partial"
+
+    print(f"Starting archive of '{source_dir_path}' to '{archive_path}' ({compression})...")
+    start = time.perf_counter()
+    file_count = 0
+    input_bytes = 0
+    try:
+        with open(tmp_path, 'wb') as raw_out:
+            if compression == "zstd":
+                compressor = zstandard.ZstdCompressor(level=ZSTD_LEVEL, threads=-1)
+                stream = compressor.stream_writer(raw_out, closefd=False)
+            else:
+                stream = gzip.GzipFile(fileobj=raw_out, mode='wb', compresslevel=GZIP_LEVEL)
+            with tarfile.open(fileobj=stream, mode="w|") as tar:
+                for rel_path in iter_included_paths(source_dir_path, matcher):
+                    full_path = os.path.join(source_dir_path, rel_path)
+                    tar.add(full_path, arcname=f"{source_dir_name}/{rel_path}", recursive=False)
+                    if os.path.isfile(full_path) and not os.path.islink(full_path):
+                        file_count += 1
+                        input_bytes += os.path.getsize(full_path)
+            stream.close()
+        os.replace(tmp_path, archive_path)
+    except Exception as e:
+        print(f"Error during archive: {e}")
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        return None
+
+    seconds = time.perf_counter() - start
+    output_bytes = os.path.getsize(archive_path)
+    ratio = output_bytes / input_bytes if input_bytes else 0
+    add_counts(files=file_count, bytes=input_bytes, output_bytes=output_bytes)
+    print(f"Archive completed successfully: '{archive_path}'")
+    print(f"  {file_count} files, {input_bytes / (1024 * 1024):.1f} MB -> {output_bytes / (1024 * 1024):.1f} MB "
+          f"({ratio:.0%}) in {seconds:.2f}s")
+    return archive_path
+
+if __name__ == "__main__":
+    # python backup_script.py [source_dir] [backup_parent_dir] [--mode=copy|snapshot|archive]
+    # source_dir defaults to the directory this script is in, backup_parent_dir to its parent.
+    # Runs without prompting, so it can be scheduled or chained (see ops.py backup).
+    # python backup_script.py --restore <name>_snapshots <dest_dir> [--snapshot=<id>]
+    if "--benchmark" in sys.argv:
+        benchmark_copy_engines()
+        sys.exit(0)
+
+    args = [arg for arg in sys.argv[1:] if not arg.startswith("--")]
+    if "--restore" in sys.argv:
+        if len(args) != 2:
+            print("Usage: backup_script.py --restore <name>_snapshots <dest_dir> [--snapshot=<id>]")
+            sys.exit(2)
+        snapshot = next((arg.split("=", 1)[1] for arg in sys.argv if arg.startswith("--snapshot=")), None)
+        with instrumented_run("restore"):
+            result = restore_snapshot(os.path.abspath(args[0]), os.path.abspath(args[1]), snapshot)
+        sys.exit(0 if result else 1)
+
+    project_directory = os.path.abspath(args[0] if args else os.path.dirname(os.path.abspath(__file__)))
+    parent_of_project_directory = os.path.abspath(args[1] if len(args) > 1 else os.path.dirname(project_directory))
+    mode = next((arg.split("=", 1)[1] for arg in sys.argv if arg.startswith("--mode=")), BACKUP_MODE)
+
+    print(f"Backing up {project_directory} ({mode}) into {parent_of_project_directory}")
+    with instrumented_run("backup"):
+        result = backup_project(project_directory, parent_of_project_directory, mode)
+    if result is None:
+        sys.exit(1)
@@ -1 +1,269 @@
-find . -name "*.js" -exec wc -l {} +
\ No newline at end of file
+import gzip
+import hashlib
+import os
+import re
+import sys
+import time
+
+from task_runner import load_json_cache, save_json_cache
+
+try:
+    import brotli # Optional: pip install brotli to also report brotli sizes
+except ImportError:
+    brotli = None
+
+# Bundle-size and module-count analyzer for the JS/TS sources.
+#
+# Scans src/ and landing/ for modules, follows their import statements (plus the <script> tags in
+# our HTML pages) into an import graph, and reports per-module bytes, gzip/brotli size and line
+# count, modules no entry point reaches, oversized data modules and code duplicated across files.
+# If a Vite build exists in dist/, its output files are listed too.
+#
+# Per-file results are cached by mtime and size (in the analysed tree's own .cache/), so re-running
+# on an unchanged tree only stats files.
+
+# --- CONFIGURATION ---
+PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__))
+SOURCE_DIRS = ["src", "landing"]
+BUILD_DIR = "dist"
+HTML_PAGE_GLOBS_DIRS = [".", "landing", "y"] # Directories whose *.html pages are scanned for entry <script> tags
+IMPORT_ALIASES = {"@/": "src/"} # Mirrors resolve.alias in vite.config.js
+MODULE_EXTENSIONS = (".ts", ".tsx", ".js", ".mjs")
+BUILD_EXTENSIONS = (".js", ".css", ".html")
+CACHE_PATH = os.path.join(".cache", "count_js_cache.json") # Relative to the root being analysed
+CACHE_VERSION = 1
+DATA_MODULE_DIR = "src/data/"
+DATA_MODULE_WARN_BYTES = 100 * 1024 # Data modules above this are flagged as candidates for lazy loading
+MODULE_WARN_BYTES = 150 * 1024 # Any other module above this is flagged
+DUPLICATE_WINDOW = 6 # Consecutive significant lines that make up a duplicate-code fingerprint
+DUPLICATE_MIN_LINE_LENGTH = 12 # Shorter lines ("}", "return;", ...) are ignored when fingerprinting
+TOP_N = 25
+# --- END CONFIGURATION ---
+
+IMPORT_PATTERN = re.compile(
+    r"""^\s*(?:import|export)\s+(type\s+)?(?:[^'";]*?\sfrom\s+)?['"]([^'"]+)['"]"""
+    r"""|\bimport\(\s*['"]([^'"]+)['"]\s*\)(\s*\.)?""",
+    re.MULTILINE)
+SCRIPT_SRC_PATTERN = re.compile(r"""<script\b[^>]*\bsrc=["']([^"']+)["']""", re.IGNORECASE)
+
+
+def analyze_file(file_path):
+    """Computes the cacheable facts for one module: sizes, line count, imports, duplicate fingerprints."""
+    with open(file_path, 'rb') as f:
+        data = f.read()
+    text = data.decode('utf-8', errors='replace')
+
+    imports = []
+    for match in IMPORT_PATTERN.finditer(text):
+        static_type_only, static_spec, dynamic_spec, type_query = match.groups()
+        # "import type ..." and "import('x').Foo" are erased by the compiler and weigh nothing
+        if static_spec and not static_type_only:
+            imports.append(static_spec)
+        elif dynamic_spec and not type_query:
+            imports.append(dynamic_spec)
+
+    significant = [line.strip() for line in text.splitlines()]
+    significant = [line for line in significant
+                   if len(line) >= DUPLICATE_MIN_LINE_LENGTH and not line.startswith(("//", "*", "/*", "import "))]
+    windows = sorted({hashlib.sha1("\n".join(significant[i:i + DUPLICATE_WINDOW]).encode()).hexdigest()[:16]
+                      for i in range(len(significant) - DUPLICATE_WINDOW + 1)})
+
+    return {
+        "bytes": len(data),
+        "lines": text.count("\n") + (1 if text and not text.endswith("\n") else 0),
+        "gzip": len(gzip.compress(data, compresslevel=9)),
+        "brotli": len(brotli.compress(data, quality=11)) if brotli is not None else None,
+        "imports": imports,
+        "windows": windows,
+    }
+
+
+def cache_version():
+    """Brotli sizes are only in the cache if brotli was installed when it was written."""
+    return f"{CACHE_VERSION}+br" if brotli is not None else str(CACHE_VERSION)
+
+
+def find_files(root, dirs, extensions):
+    """Returns POSIX paths relative to root for every file under dirs with one of the extensions."""
+    found = []
+    for directory in dirs:
+        for dir_path, dir_names, file_names in os.walk(os.path.join(root, directory)):
+            dir_names[:] = [d for d in dir_names if d != "node_modules"]
+            for name in file_names:
+                if name.endswith(extensions) and not name.endswith(".d.ts"):
+                    found.append(os.path.relpath(os.path.join(dir_path, name), root).replace(os.sep, "/"))
+    return sorted(found)
+
+
+def analyze_files(root, rel_paths, cache):
+    """Returns {rel_path: facts}, reusing cached facts for files whose mtime and size are unchanged."""
+    results = {}
+    reused = 0
+    for rel_path in rel_paths:
+        st = os.stat(os.path.join(root, rel_path))
+        cached = cache.get(rel_path)
+        if cached and cached["mtime_ns"] == st.st_mtime_ns and cached["size"] == st.st_size:
+            results[rel_path] = cached
+            reused += 1
+            continue
+        facts = analyze_file(os.path.join(root, rel_path))
+        facts.update(mtime_ns=st.st_mtime_ns, size=st.st_size)
+        results[rel_path] = facts
+    print(f"Analyzed {len(rel_paths)} files ({reused} from cache).")
+    return results
+
+
+def resolve_import(spec, importer, modules):
+    """Resolves an import specifier to a module path in `modules`, or returns None (external/unresolved)."""
+    for alias, target in IMPORT_ALIASES.items():
+        if spec.startswith(alias):
+            spec = "/" + target + spec[len(alias):]
+    if spec.startswith("/"):
+        base = spec.lstrip("/")
+    elif spec.startswith("."):
+        base = os.path.normpath(os.path.join(os.path.dirname(importer), spec)).replace(os.sep, "/")
+    else:
+        return None
+    stem, ext = os.path.splitext(base)
+    candidates = [base] + [base + e for e in MODULE_EXTENSIONS] + [f"{base}/index{e}" for e in MODULE_EXTENSIONS]
+    if ext in (".js", ".mjs"):
+        # TS sources import "./x.js" for a file that is really ./x.ts
+        candidates += [stem + e for e in MODULE_EXTENSIONS]
+    for candidate in candidates:
+        if candidate in modules:
+            return candidate
+    return None
+
+
+def find_entry_points(root, modules):
+    """Returns the modules loaded by <script src> tags in our HTML pages."""
+    entries = set()
+    for directory in HTML_PAGE_GLOBS_DIRS:
+        dir_path = os.path.join(root, directory)
+        if not os.path.isdir(dir_path):
+            continue
+        for name in sorted(os.listdir(dir_path)):
+            if not name.endswith(".html"):
+                continue
+            with open(os.path.join(dir_path, name), 'r', encoding='utf-8', errors='replace') as f:
+                html = f.read()
+            page = os.path.normpath(os.path.join(directory, name)).replace(os.sep, "/")
+            for src in SCRIPT_SRC_PATTERN.findall(html):
+                resolved = resolve_import(src if src.startswith("/") else "./" + src, page, modules)
+                if resolved:
+                    entries.add(resolved)
+    return entries
+
+
+def build_import_graph(facts):
+    """Returns ({module: set(imported modules)}, {external package: import count})."""
+    graph = {}
+    externals = {}
+    for module, module_facts in facts.items():
+        edges = set()
+        for spec in module_facts["imports"]:
+            resolved = resolve_import(spec, module, facts)
+            if resolved:
+                edges.add(resolved)
+            elif not spec.startswith((".", "/") + tuple(IMPORT_ALIASES)):
+                package = "/".join(spec.split("/")[:2]) if spec.startswith("@") else spec.split("/")[0]
+                externals[package] = externals.get(package, 0) + 1
+        graph[module] = edges
+    return graph, externals
+
+
+def reachable_from(entries, graph):
+    seen = set()
+    stack = list(entries)
+    while stack:
+        module = stack.pop()
+        if module in seen:
+            continue
+        seen.add(module)
+        stack.extend(graph.get(module, ()))
+    return seen
+
+
+def find_duplicates(facts):
+    """Returns [((file_a, file_b), shared_windows)] sorted by how much code the two files share."""
+    owners = {}
+    for module, module_facts in facts.items():
+        for window in module_facts["windows"]:
+            owners.setdefault(window, []).append(module)
+    pairs = {}
+    for modules in owners.values():
+        if 1 < len(modules) <= 10: # Boilerplate shared by dozens of files isn't actionable duplication
+            for i, a in enumerate(modules):
+                for b in modules[i + 1:]:
+                    pairs[(a, b)] = pairs.get((a, b), 0) + 1
+    return sorted(pairs.items(), key=lambda item: item[1], reverse=True)
+
+
+def format_kb(num_bytes):
+    return "-" if num_bytes is None else f"{num_bytes / 1024:,.1f}"
+
+
+def print_report(facts, graph, externals, entries, build_facts):
+    reachable = reachable_from(entries, graph)
+    total = {key: sum(f[key] or 0 for f in facts.values()) for key in ("bytes", "gzip", "lines")}
+    print(f"\n{len(facts)} modules, {total['lines']:,} lines, {format_kb(total['bytes'])} KB "
+          f"({format_kb(total['gzip'])} KB gzipped), {len(entries)} HTML entry points.")
+
+    print(f"\nLargest modules (KB):\n{'Module':<60} {'Lines':>7} {'Raw':>9} {'Gzip':>8} {'Brotli':>8}  Imported by")
+    imported_by = {}
+    for module, edges in graph.items():
+        for target in edges:
+            imported_by[target] = imported_by.get(target, 0) + 1
+    for module, f in sorted(facts.items(), key=lambda item: item[1]["bytes"], reverse=True)[:TOP_N]:
+        print(f"{module:<60} {f['lines']:>7,} {format_kb(f['bytes']):>9} {format_kb(f['gzip']):>8} "
+              f"{format_kb(f['brotli']):>8}  {imported_by.get(module, 0)}")
+
+    oversized = [(m, f["bytes"]) for m, f in facts.items()
+                 if f["bytes"] > (DATA_MODULE_WARN_BYTES if m.startswith(DATA_MODULE_DIR) else MODULE_WARN_BYTES)]
+    if oversized:
+        print("\nOversized modules (candidates for splitting or lazy loading):")
+        for module, size in sorted(oversized, key=lambda item: item[1], reverse=True):
+            print(f"  {module}: {format_kb(size)} KB")
+
+    if entries:
+        unreachable = sorted(set(facts) - reachable)
+        print(f"\n{len(reachable)} modules reachable from the HTML entry points, {len(unreachable)} not reached:")
+        for module in unreachable[:TOP_N]:
+            print(f"  {module}")
+
+    if externals:
+        print("\nExternal packages (import sites): " +
+              ", ".join(f"{name} ({count})" for name, count in sorted(externals.items(), key=lambda i: -i[1])))
+
+    duplicates = find_duplicates(facts)
+    if duplicates:
+        print(f"\nDuplicated code (shared {DUPLICATE_WINDOW}-line blocks):")
+        for (a, b), windows in duplicates[:10]:
+            print(f"  ~{windows + DUPLICATE_WINDOW - 1} lines shared: {a} <-> {b}")
+
+    if build_facts:
+        print(f"\nBuilt output in {BUILD_DIR}/ (KB):")
+        for path, f in sorted(build_facts.items(), key=lambda item: item[1]["bytes"], reverse=True)[:TOP_N]:
+            print(f"  {path:<58} {format_kb(f['bytes']):>9} {format_kb(f['gzip']):>8} {format_kb(f['brotli']):>8}")
+
+
+def analyze_project(root=PROJECT_ROOT):
+    """Runs the analysis over SOURCE_DIRS (and BUILD_DIR if present) and prints the report."""
+    start = time.perf_counter()
+    cache_path = os.path.join(root, CACHE_PATH)
+    cache = load_json_cache(cache_path, cache_version(), {"files": {}})["files"]
+    source_files = find_files(root, SOURCE_DIRS, MODULE_EXTENSIONS)
+    build_files = find_files(root, [BUILD_DIR], BUILD_EXTENSIONS) if os.path.isdir(os.path.join(root, BUILD_DIR)) else []
+    all_facts = analyze_files(root, source_files + build_files, cache)
+    save_json_cache({"version": cache_version(), "files": all_facts}, cache_path)
+
+    facts = {path: all_facts[path] for path in source_files}
+    build_facts = {path: all_facts[path] for path in build_files}
+    graph, externals = build_import_graph(facts)
+    entries = find_entry_points(root, facts)
+    print_report(facts, graph, externals, entries, build_facts)
+    print(f"\nDone in {time.perf_counter() - start:.2f}s.")
+
+
+if __name__ == "__main__":
+    analyze_project(sys.argv[1] if len(sys.argv) > 1 else PROJECT_ROOT)
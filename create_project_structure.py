@@ -1,234 +1,183 @@
 import os
-import shutil # For deleting if it's a true reset
+import sys
+import json
+import hashlib
+import datetime
+from concurrent.futures import ThreadPoolExecutor
 
-# --- CONFIGURATION ---
-# Set to True if you want to delete existing 'css', 'data', 'images', 'js' folders and 'index.html'
-# in the current directory before creating the new structure.
-# BE VERY CAREFUL WITH THIS IF YOU HAVE OTHER FILES YOU WANT TO KEEP.
-PERFORM_CLEAN_RESET = True # Set to False if you want to merge/add to existing structure
-
-def clean_existing_structure():
-    """Deletes specified folders and index.html in the current directory."""
-    folders_to_delete = ["css", "data", "images", "js"]
-    files_to_delete = ["index.html"]
-    
-    for folder in folders_to_delete:
-        if os.path.exists(folder) and os.path.isdir(folder):
-            try:
-                shutil.rmtree(folder)
-                print(f"Removed existing directory: {folder}")
-            except OSError as e:
-                print(f"Error removing directory {folder}: {e}")
-        elif os.path.exists(folder):
-            print(f"'{folder}' exists but is not a directory. Manual check needed.")
+from ops_metrics import add_counts, instrumented_run, phase
 
-    for file_path in files_to_delete:
-        if os.path.exists(file_path) and os.path.isfile(file_path):
+# --- CONFIGURATION ---
+# The skeleton lives in an external template manifest: nested JSON objects are folders, string
+# values are file contents (null for an empty file).
+TEMPLATE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "project_template.json")
+# By default only missing files are created; files that differ from the template (most likely
+# edited since they were scaffolded) are reported and left alone.
+# Set to True (or pass --overwrite) to replace files whose content differs from the template.
+OVERWRITE_CHANGED = False
+# Set to True (or pass --clean) to also remove files inside the template's top-level folders ('css',
+# 'data', 'images', 'js') that the template doesn't define. Files outside those folders are never touched.
+PERFORM_CLEAN_RESET = False
+# Overwritten and removed files are moved here (under a timestamped folder) instead of being lost
+SCAFFOLD_TRASH_DIR = ".scaffold_trash"
+WRITE_BATCH_SIZE = 32 # Files written per task in the thread pool
+WRITE_WORKERS = 8
+
+def load_template(template_path=TEMPLATE_PATH):
+    """Reads the template manifest and flattens it to {relative/posix/path: content}."""
+    with open(template_path, 'r', encoding='utf-8') as f:
+        template = json.load(f)
+
+    files = {}
+    def flatten(prefix, node):
+        for name, content in node.items():
+            rel_path = f"{prefix}{name}"
+            if isinstance(content, dict): # It's a directory
+                flatten(rel_path + "/", content)
+            else: # It's a file
+                files[rel_path] = content or ""
+    flatten("", template)
+    return files
+
+def content_hash(data):
+    return hashlib.sha256(data).hexdigest()
+
+def file_hash(file_path):
+    with open(file_path, 'rb') as f:
+        return content_hash(f.read())
+
+def plan_structure(base_path, files, clean_reset=PERFORM_CLEAN_RESET, overwrite=OVERWRITE_CHANGED):
+    """
+    Diffs the template against what is on disk.
+
+    Returns:
+        dict: {"create": [path], "update": [path], "keep": [path], "delete": [path], "unchanged": int},
+              paths relative to base_path. Files that differ from the template go to "update" with
+              overwrite, else to "keep". Files whose content hash already matches are only counted.
+    """
+    plan = {"create": [], "update": [], "keep": [], "delete": [], "unchanged": 0}
+    for rel_path, content in files.items():
+        full_path = os.path.join(base_path, rel_path)
+        if not os.path.exists(full_path):
+            plan["create"].append(rel_path)
+        elif not os.path.isfile(full_path):
+            print(f"'{full_path}' exists but is not a file. Manual check needed.")
+        elif file_hash(full_path) != content_hash(content.encode("utf-8")):
+            plan["update" if overwrite else "keep"].append(rel_path)
+        else:
+            plan["unchanged"] += 1
+
+    if clean_reset:
+        managed_roots = {rel_path.split("/", 1)[0] for rel_path in files if "/" in rel_path}
+        for root in sorted(managed_roots):
+            for dir_path, _, file_names in os.walk(os.path.join(base_path, root)):
+                for name in file_names:
+                    rel_path = os.path.relpath(os.path.join(dir_path, name), base_path).replace(os.sep, "/")
+                    if rel_path not in files:
+                        plan["delete"].append(rel_path)
+    return plan
+
+def write_batch(base_path, batch):
+    """Writes one batch of (rel_path, content) files. Returns the list of error messages."""
+    errors = []
+    for rel_path, content in batch:
+        current_path = os.path.join(base_path, rel_path)
+        try:
+            os.makedirs(os.path.dirname(current_path) or ".", exist_ok=True)
+            # Write with UTF-8 encoding; newline="" keeps the bytes identical to the template on
+            # every OS, so the content-hash comparison doesn't flag every file on Windows
+            with open(current_path, "w", encoding="utf-8", newline="") as f:
+                f.write(content)
+        except IOError as e:
+            errors.append(f"Error creating file {current_path}: {e}")
+    return errors
+
+def move_to_trash(base_path, rel_path, trash_root):
+    """Moves base_path/rel_path to the same relative path under trash_root."""
+    target = os.path.join(trash_root, rel_path)
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    os.replace(os.path.join(base_path, rel_path), target)
+
+def print_plan(plan):
+    for kind in ("create", "update", "keep", "delete"):
+        for rel_path in plan[kind]:
+            print(f"  {kind:<6} {rel_path}")
+
+def apply_plan(base_path, files, plan):
+    """
+    Moves the files to update or delete into a trash folder, then writes created/updated files in
+    parallel batches.
+
+    Returns:
+        str: The trash folder, or None if nothing was moved there.
+    """
+    trash_root = None
+    not_saved = set()
+    if plan["update"] or plan["delete"]:
+        trash_root = os.path.join(base_path, SCAFFOLD_TRASH_DIR, datetime.datetime.now().strftime("%Y%m%d_%H%M%S"))
+    for kind in ("update", "delete"):
+        for rel_path in plan[kind]:
             try:
-                os.remove(file_path)
-                print(f"Removed existing file:      {file_path}")
+                move_to_trash(base_path, rel_path, trash_root)
             except OSError as e:
-                print(f"Error removing file {file_path}: {e}")
-        elif os.path.exists(file_path):
-             print(f"'{file_path}' exists but is not a file. Manual check needed.")
-
-
-# Define the directory structure and files
-# (filename, content_placeholder - None for just folder creation)
-structure = {
-    "css": {
-        "base": {
-            "_reset.css": "/* CSS Reset - consider using normalize.css or a modern reset */\nbody, h1, h2, p, ul, li { margin: 0; padding: 0; box-sizing: border-box; }",
-            "_variables.css": ":root {\n  /* Define your CSS custom properties here */\n  --primary-color: #007bff;\n  --dark-bg: #18191a;\n  --light-text: #e4e6eb;\n  /* Add more variables for fonts, spacing, etc. */\n  --font-primary: 'Roboto', sans-serif;\n  --font-secondary: 'Merriweather Sans', sans-serif;\n}",
-            "global.css": "/* Global styles for body, typography, etc. */\nbody { font-family: var(--font-primary); line-height: 1.6; background-color: #f0f2f5; color: #1c1e21; margin:0; display: flex; height: 100vh; overflow: hidden;}\n\n.loading-message, .empty-list-msg {\n    text-align: center;\n    padding: 40px;\n    font-size: 1.1em;\n    color: #777;\n    font-style: italic;\n}"
-        },
-        "components": {
-            "card.css": "/* Styles for connector cards */\n.connector-card { /* Basic placeholder */ border: 1px solid #ddd; margin-bottom: 10px; padding: 10px; border-radius: 8px; }",
-            "modal_call.css": "/* Styles for call-related modals (virtual, direct, voice-chat) */\n.calling-modal { /* Basic placeholder */ background: white; padding: 20px; border-radius: 8px; }",
-            "modal_message.css": "/* Styles for messaging_interface modal */",
-            "modal_persona.css": "/* Styles for detailed_persona_modal */",
-            "modal_recap.css": "/* Styles for session_recap modal */",
-            "buttons.css": "/* Styles for common buttons */\n.action-btn { /* Basic placeholder */ padding: 10px 15px; background-color: var(--primary-color); color: white; border: none; border-radius: 5px; cursor: pointer; }",
-            "chat_bubbles.css": "/* Styles for chat messages UI */\n.chat-message-ui { /* Basic placeholder */ padding: 8px 12px; border-radius: 15px; margin-bottom: 5px; max-width: 75%; }"
-        },
-        "layout": {
-            "shell.css": "/* Styles for the main 3-panel app shell layout */\n#polyglot-connect-app-shell { display: flex; height: 100vh; }",
-            "hub.css": "/* Styles for the connector grid (hub) */\n.connector-grid { display: grid; gap: 20px; }"
-        },
-        "theme": {
-            "dark_mode.css": "/* Dark mode specific theme overrides */\nbody.dark-mode { background-color: var(--dark-bg); color: var(--light-text); }"
-        }
-    },
-    "data": {
-        "personas.js": "// Data for AI Persona Objects\nconsole.log('data/personas.js loaded');\nwindow.polyglotPersonasDataSource = [];",
-        "groups.js": "// Data for Group Definitions\nconsole.log('data/groups.js loaded');\nwindow.polyglotGroupsData = [];",
-        "minigames.js": "// Data for Minigame Definitions\nconsole.log('data/minigames.js loaded');\nwindow.polyglotMinigamesData = [];",
-        "shared_content.js": "// Data for Shared Tutor Images, Homepage Tips, etc.\nconsole.log('data/shared_content.js loaded');\nwindow.polyglotSharedContent = { tutorImages: [], homepageTips: [] };"
-    },
-    "images": { # This will create the folders. You add actual images manually.
-        "characters": {
-            "polyglot_connect_modern": {
-                "Emile_Modern.png.txt": "Placeholder for Emile_Modern.png",
-                "Sofia_Modern.png.txt": "Placeholder for Sofia_Modern.png",
-                "Liselotte_Modern.png.txt": "Placeholder for Liselotte_Modern.png",
-                "Chloe_Modern.png.txt": "Placeholder for Chloe_Modern.png",
-                "Mateo_Modern.png.txt": "Placeholder for Mateo_Modern.png",
-                # Add more character image name placeholders (48+ total)
-                "Astrid_Modern.png.txt": "Placeholder for Astrid_Modern.png",
-                "Rizki_Modern.png.txt": "Placeholder for Rizki_Modern.png",
-                "Giorgio_Modern.png.txt": "Placeholder for Giorgio_Modern.png",
-                "Mateus_Modern.png.txt": "Placeholder for Mateus_Modern.png (Portuguese)",
-                "Yelena_Modern.png.txt": "Placeholder for Yelena_Modern.png (Russian)",
-                # ... etc for all your personas
-            }
-        },
-        "tutor_games": {
-            "market_scene.jpg.txt": "Placeholder for market_scene.jpg",
-            "travel_landmark_paris.jpg.txt": "Placeholder for travel_landmark_paris.jpg",
-            # ... etc.
-        },
-        "flags": {
-            "unknown.png.txt": "Placeholder for unknown.png (default/fallback flag)"
-        },
-        "channel_profile_aljohn_polyglot.png.txt": "Placeholder for your logo/favicon (channel_profile_aljohn_polyglot.png)"
-    },
-    "js": {
-        "app.js": "// Main Application Logic (formerly connect_main.js)\ndocument.addEventListener('DOMContentLoaded', () => {\n  console.log('App.js loaded - Main Application Logic Initializing...');\n  if (window.shellController && typeof window.shellController.initializeAppShell === 'function') {\n    window.shellController.initializeAppShell();\n  } else { \n    console.error('Error: shellController or initializeAppShell not found!');\n  }\n  // Further app-wide initializations if needed\n});",
-        "core": {
-            "session_manager.js": "// Manages modal-based session states (calls, voice chats)\nconsole.log('core/session_manager.js loaded');\nwindow.sessionManager = {};",
-            "chat_manager.js": "// Manages 1-on-1 persistent text chats (embedded UI & modal messaging)\nconsole.log('core/chat_manager.js loaded');\nwindow.chatManager = {};",
-            "group_manager.js": "// Manages group chat logic (formerly group_chat_manager.js)\nconsole.log('core/group_manager.js loaded');\nwindow.groupManager = {};",
-            "activity_manager.js": "// Manages persona active status, typing indicators, etc.\nconsole.log('core/activity_manager.js loaded');\nwindow.activityManager = {};"
-        },
-        "services": {
-            "gemini_service.js": "// All Gemini API interactions (formerly connect_gemini.js)\nconsole.log('services/gemini_service.js loaded');\nwindow.geminiService = {};"
-        },
-        "ui": {
-            "shell_controller.js": "// Manages the 3-panel app shell, tabs, main view switching (formerly app_shell_controller.js)\nconsole.log('ui/shell_controller.js loaded');\nwindow.shellController = {};",
-            "modal_handler.js": "// Generic open/close for all modals (extracted from connect_ui.js)\nconsole.log('ui/modal_handler.js loaded');\nwindow.modalHandler = {};",
-            "card_renderer.js": "// Renders connector cards into the hub\nconsole.log('ui/card_renderer.js loaded');\nwindow.cardRenderer = {};",
-            "list_renderer.js": "// Renders dynamic lists (chat, summary, groups)\nconsole.log('ui/list_renderer.js loaded');\nwindow.listRenderer = {};",
-            "dom_elements.js": "// Centralized DOM element selectors\nconsole.log('ui/dom_elements.js loaded');\nwindow.domElements = {};",
-            "ui_updater.js": "// Functions to update various parts of the UI (e.g., chat logs, status indicators)\nconsole.log('ui/ui_updater.js loaded');\nwindow.uiUpdater = {};"
-        },
-        "utils": {
-            "helpers.js": "// Utility functions (calculateAge, FlagCDN, localStorage, UUID, etc., formerly utils.js)\nconsole.log('utils/helpers.js loaded');\nwindow.polyglotHelpers = {};"
-        },
-        "config": {
-            "api_keys.js": "// window.GEMINI_API_KEY = 'YOUR_ACTUAL_GEMINI_API_KEY_HERE';\nconsole.log('config/api_keys.js loaded - IMPORTANT: Add your Gemini API Key here and ensure this file is NOT committed to public repositories if it contains sensitive keys.');"
-        }
-    },
-    "index.html": """<!DOCTYPE html>
-<html lang="en">
-<head>
-  <meta charset="UTF-8">
-  <meta name="viewport" content="width=device-width, initial-scale=1.0">
-  <title>Polyglot Connect - Revamped</title>
-  <link rel="icon" href="images/channel_profile_aljohn_polyglot.png" type="image/png">
-
-  <!-- Base CSS -->
-  <link rel="stylesheet" href="css/base/_reset.css">
-  <link rel="stylesheet" href="css/base/_variables.css">
-  <link rel="stylesheet" href="css/base/global.css">
-
-  <!-- Layout CSS -->
-  <link rel="stylesheet" href="css/layout/shell.css">
-  <link rel="stylesheet" href="css/layout/hub.css">
-
-  <!-- Component CSS (add as needed) -->
-  <link rel="stylesheet" href="css/components/card.css">
-  <link rel="stylesheet" href="css/components/modal_call.css">
-  <link rel="stylesheet" href="css/components/modal_message.css">
-  <link rel="stylesheet" href="css/components/modal_persona.css">
-  <link rel="stylesheet" href="css/components/modal_recap.css">
-  <link rel="stylesheet" href="css/components/buttons.css">
-  <link rel="stylesheet" href="css/components/chat_bubbles.css">
-
-
-  <!-- Theme CSS (optional) -->
-  <link rel="stylesheet" href="css/theme/dark_mode.css">
-
-  <!-- Font Awesome -->
-  <link rel="stylesheet" href="https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.5.1/css/all.min.css">
-  <!-- Google Fonts (Example) -->
-  <link rel="preconnect" href="https://fonts.googleapis.com">
-  <link rel="preconnect" href="https://fonts.gstatic.com" crossorigin>
-  <link href="https://fonts.googleapis.com/css2?family=Roboto:wght@400;500;700&family=Merriweather+Sans:wght@400;700&display=swap" rel="stylesheet">
-
-</head>
-<body>
-  <div id="polyglot-connect-app-shell">
-    <!-- App shell structure will be defined here by JavaScript or static HTML -->
-    <p style="padding:20px; text-align:center;">Loading Polyglot Connect Interface...</p>
-  </div>
-
-  <!-- Configuration -->
-  <script src="js/config/api_keys.js"></script>
-
-  <!-- Utilities -->
-  <script src="js/utils/helpers.js"></script>
-
-  <!-- Data Files -->
-  <script src="data/personas.js"></script>
-  <script src="data/groups.js"></script>
-  <script src="data/minigames.js"></script>
-  <script src="data/shared_content.js"></script>
-
-  <!-- Services -->
-  <script src="js/services/gemini_service.js"></script>
-
-  <!-- UI Modules -->
-  <script src="js/ui/dom_elements.js"></script>
-  <script src="js/ui/modal_handler.js"></script>
-  <script src="js/ui/card_renderer.js"></script>
-  <script src="js/ui/list_renderer.js"></script>
-  <script src="js/ui/ui_updater.js"></script>
-  <script src="js/ui/shell_controller.js"></script> <!-- Shell controller depends on other UI modules -->
-
-
-  <!-- Core Logic Modules -->
-  <script src="js/core/activity_manager.js"></script>
-  <script src="js/core/session_manager.js"></script>
-  <script src="js/core/chat_manager.js"></script>
-  <script src="js/core/group_manager.js"></script>
-
-  <!-- Main Application Entry Point -->
-  <script src="js/app.js"></script>
-</body>
-</html>
-"""
-}
-
-def create_dir_structure(base_path, structure_dict):
-    """Recursively creates directories and files."""
-    for name, content in structure_dict.items():
-        current_path = os.path.join(base_path, name)
-        if isinstance(content, dict): # It's a directory
-            os.makedirs(current_path, exist_ok=True)
-            # print(f"Created directory: {current_path}") # Less verbose
-            create_dir_structure(current_path, content) # Recurse
-        else: # It's a file
-            try:
-                # Write with UTF-8 encoding
-                with open(current_path, "w", encoding="utf-8") as f:
-                    if content is not None:
-                        f.write(content)
-                # print(f"Created file:      {current_path}") # Less verbose
-            except IOError as e:
-                print(f"Error creating file {current_path}: {e}")
+                print(f"Error moving {rel_path} to {trash_root}: {e}")
+                not_saved.add(rel_path) # Never write over a file that wasn't saved first
+                continue
+            if kind == "delete":
+                print(f"Removed file not in template: {rel_path}")
+
+    to_write = [(rel_path, files[rel_path]) for rel_path in plan["create"] + plan["update"] if rel_path not in not_saved]
+    batches = [to_write[i:i + WRITE_BATCH_SIZE] for i in range(0, len(to_write), WRITE_BATCH_SIZE)]
+    with ThreadPoolExecutor(max_workers=WRITE_WORKERS) as executor:
+        for errors in executor.map(lambda batch: write_batch(base_path, batch), batches):
+            for message in errors:
+                print(message)
+    return trash_root
+
+def create_dir_structure(base_path, files=None, clean_reset=PERFORM_CLEAN_RESET, overwrite=OVERWRITE_CHANGED,
+                         dry_run=False):
+    """
+    Brings base_path in line with the template: creates missing files and, only when asked, replaces
+    changed files (overwrite) and removes files the template doesn't define (clean_reset). The plan
+    is printed before anything is touched; replaced and removed files go to SCAFFOLD_TRASH_DIR.
+    """
+    with phase("plan"):
+        if files is None:
+            files = load_template()
+        plan = plan_structure(base_path, files, clean_reset, overwrite)
+        add_counts(files=len(files))
+    print(f"Plan: {len(plan['create'])} to create, {len(plan['update'])} to update, "
+          f"{len(plan['keep'])} changed but kept, {len(plan['delete'])} to delete, "
+          f"{plan['unchanged']} already up to date.")
+    print_plan(plan)
+    if plan["keep"]:
+        print("Files marked 'keep' differ from the template; pass --overwrite to replace them.")
+    if dry_run:
+        return plan
+    with phase("apply"):
+        trash_root = apply_plan(base_path, files, plan)
+        if trash_root:
+            print(f"Replaced and removed files were moved to {trash_root}")
+        add_counts(files=len(plan["create"]) + len(plan["update"]) + len(plan["delete"]),
+                   bytes=sum(len((files[p] or "").encode('utf-8')) for p in plan["create"] + plan["update"]))
+    return plan
 
 if __name__ == "__main__":
     print("Starting project structure creation in the current directory.")
 
-    if PERFORM_CLEAN_RESET:
-        print("\nPERFORM_CLEAN_RESET is True. Attempting to remove existing structure...")
-        clean_existing_structure()
-        print("Cleaning attempt complete.\n")
-    else:
-        print("\nPERFORM_CLEAN_RESET is False. Will create files/folders; existing ones might be overwritten if names match.\n")
+    clean_reset = PERFORM_CLEAN_RESET or "--clean" in sys.argv
+    overwrite = OVERWRITE_CHANGED or "--overwrite" in sys.argv
+    if clean_reset:
+        print(f"\nClean reset is on. Files in the template's folders that the template doesn't define will be moved to {SCAFFOLD_TRASH_DIR}.")
+    if overwrite:
+        print(f"\nOverwrite is on. Files that differ from the template will be replaced (old copies go to {SCAFFOLD_TRASH_DIR}).")
+    if not (clean_reset or overwrite):
+        print("\nOnly missing files will be created; existing files are left as they are.\n")
 
     # Create the structure in the current directory (".")
-    create_dir_structure(".", structure)
+    # Pass --dry-run to only print the plan
+    with instrumented_run("create_project_structure"):
+        create_dir_structure(".", clean_reset=clean_reset, overwrite=overwrite, dry_run="--dry-run" in sys.argv)
 
     print("\n-------------------------------------------")
     print("Project structure creation complete!")
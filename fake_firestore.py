@@ -0,0 +1,240 @@
+import copy
+import random
+import threading
+import time
+
+# An in-process stand-in for the parts of the firebase_admin Firestore client our scripts use,
+# so seeding/sync/export code can be exercised and timed offline without the emulator.
+# Each call sleeps for a configurable round-trip latency, and commits can randomly fail with
+# Aborted to exercise retry paths.
+
+MAX_BATCH_WRITES = 500 # Same limit the real WriteBatch enforces
+
+
+class Aborted(Exception):
+    """Mirrors google.api_core.exceptions.Aborted (transaction/batch contention)."""
+
+
+class FieldFilter:
+    """Mirrors google.cloud.firestore_v1.base_query.FieldFilter."""
+
+    def __init__(self, field_path, op_string, value=None):
+        self.field_path = field_path
+        self.op_string = op_string
+        self.value = value
+
+
+FILTER_OPS = {
+    "==": lambda a, b: a == b,
+    "<": lambda a, b: a < b,
+    "<=": lambda a, b: a <= b,
+    ">": lambda a, b: a > b,
+    ">=": lambda a, b: a >= b,
+}
+
+
+class FakeSnapshot:
+    def __init__(self, reference, data):
+        self.reference = reference
+        self.id = reference.id
+        self._data = data
+
+    @property
+    def exists(self):
+        return self._data is not None
+
+    def to_dict(self):
+        return copy.deepcopy(self._data) if self._data is not None else None
+
+
+class FakeDocumentReference:
+    def __init__(self, client, path):
+        self._client = client
+        self.path = path
+        self.id = path.rsplit("/", 1)[-1]
+
+    def collection(self, name):
+        return FakeCollectionReference(self._client, f"{self.path}/{name}")
+
+    def get(self):
+        self._client._round_trip()
+        return self._client._snapshot(self.path)
+
+    def set(self, data, merge=False):
+        self._client._round_trip()
+        self._client._apply([("set", self.path, data, merge)])
+
+    def update(self, data):
+        self._client._round_trip()
+        self._client._apply([("update", self.path, data, True)])
+
+    def delete(self):
+        self._client._round_trip()
+        self._client._apply([("delete", self.path, None, False)])
+
+
+class FakeCollectionReference:
+    def __init__(self, client, path):
+        self._client = client
+        self.path = path
+        self.id = path.rsplit("/", 1)[-1]
+
+    def document(self, doc_id):
+        return FakeDocumentReference(self._client, f"{self.path}/{doc_id}")
+
+    def stream(self):
+        return FakeQuery(self).stream()
+
+    def list_documents(self):
+        return [snap.reference for snap in self.stream()]
+
+    def where(self, filter):
+        return FakeQuery(self).where(filter=filter)
+
+    def order_by(self, field_path):
+        return FakeQuery(self).order_by(field_path)
+
+    def limit(self, count):
+        return FakeQuery(self).limit(count)
+
+
+class FakeQuery:
+    """
+    Immutable query over one collection: where() with FieldFilters, order_by(), start_after(snapshot)
+    and limit(). "__name__" refers to the document id (values may be ids or document references).
+    """
+
+    def __init__(self, collection, filters=(), order=None, after=None, count=None):
+        self._collection = collection
+        self._filters = filters
+        self._order = order
+        self._after = after
+        self._count = count
+
+    def _copy(self, **changes):
+        fields = {"filters": self._filters, "order": self._order, "after": self._after, "count": self._count}
+        fields.update(changes)
+        return FakeQuery(self._collection, **fields)
+
+    def where(self, filter):
+        return self._copy(filters=self._filters + (filter,))
+
+    def order_by(self, field_path):
+        return self._copy(order=field_path)
+
+    def start_after(self, snapshot):
+        return self._copy(after=snapshot)
+
+    def limit(self, count):
+        return self._copy(count=count)
+
+    def _key(self, snapshot, field_path):
+        return snapshot.id if field_path == "__name__" else (snapshot._data or {}).get(field_path)
+
+    def stream(self):
+        client = self._collection._client
+        client._round_trip()
+        prefix = self._collection.path + "/"
+        with client._lock:
+            paths = sorted(p for p in client.documents if p.startswith(prefix) and "/" not in p[len(prefix):])
+        snapshots = [client._snapshot(path) for path in paths]
+        for f in self._filters:
+            value = getattr(f.value, "id", f.value) if f.field_path == "__name__" else f.value
+            snapshots = [s for s in snapshots if FILTER_OPS[f.op_string](self._key(s, f.field_path), value)]
+        order = self._order or "__name__"
+        snapshots.sort(key=lambda s: self._key(s, order))
+        if self._after is not None:
+            after_key = self._key(self._after, order)
+            snapshots = [s for s in snapshots if self._key(s, order) > after_key]
+        return iter(snapshots[:self._count] if self._count is not None else snapshots)
+
+
+class FakeWriteBatch:
+    def __init__(self, client):
+        self._client = client
+        self._writes = []
+
+    def _add(self, write):
+        if len(self._writes) >= MAX_BATCH_WRITES:
+            raise ValueError(f"Maximum {MAX_BATCH_WRITES} writes allowed per batch.")
+        self._writes.append(write)
+
+    def set(self, reference, data, merge=False):
+        self._add(("set", reference.path, data, merge))
+
+    def update(self, reference, data):
+        self._add(("update", reference.path, data, True))
+
+    def delete(self, reference):
+        self._add(("delete", reference.path, None, False))
+
+    def commit(self):
+        self._client._round_trip()
+        if random.random() < self._client.abort_rate:
+            raise Aborted("Too much contention on these documents. Please try again.")
+        self._client._apply(self._writes)
+        return [None] * len(self._writes)
+
+
+class FakeFirestoreClient:
+    """
+    Dict-backed Firestore client. `documents` maps "collection/doc[/sub/doc...]" to plain dicts.
+    set(..., merge=True) merges top-level fields only.
+
+    Args:
+        latency (float): Seconds slept per round trip (commit, get, get_all, stream).
+        abort_rate (float): Probability in [0, 1] that a batch commit raises Aborted.
+    """
+
+    def __init__(self, latency=0.0, abort_rate=0.0):
+        self.latency = latency
+        self.abort_rate = abort_rate
+        self.documents = {}
+        self.round_trips = 0
+        self.writes = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0 # Most round trips in progress at once, to check callers overlap them
+        self._lock = threading.Lock()
+
+    def collection(self, name):
+        return FakeCollectionReference(self, name)
+
+    def document(self, path):
+        return FakeDocumentReference(self, path)
+
+    def batch(self):
+        return FakeWriteBatch(self)
+
+    def get_all(self, references):
+        self._round_trip()
+        return [self._snapshot(ref.path) for ref in references]
+
+    def _round_trip(self):
+        with self._lock:
+            self.round_trips += 1
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        try:
+            if self.latency:
+                time.sleep(self.latency)
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+    def _snapshot(self, path):
+        with self._lock:
+            data = self.documents.get(path)
+        return FakeSnapshot(FakeDocumentReference(self, path), copy.deepcopy(data))
+
+    def _apply(self, writes):
+        with self._lock:
+            for op, path, data, merge in writes:
+                if op == "delete":
+                    self.documents.pop(path, None)
+                elif op == "update" and path not in self.documents:
+                    raise KeyError(f"No document to update: {path}")
+                elif merge and path in self.documents:
+                    self.documents[path].update(copy.deepcopy(data))
+                else:
+                    self.documents[path] = copy.deepcopy(data)
+                self.writes += 1
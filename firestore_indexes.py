@@ -0,0 +1,288 @@
+import json
+import os
+import sys
+
+from seed_loader import iter_json_records
+
+# Generates firestore.indexes.json from the query patterns the app declares below, instead of
+# collecting composite indexes one "missing index" error at a time.
+#
+# For every pattern the tool works out how Firestore will serve it - an automatic single-field
+# index, a merge of single-field indexes, or a composite index - and emits exactly the composite
+# indexes needed. Field overrides switch off automatic indexing for fields nobody queries (long
+# description text, the lastMessage map rewritten on every message), which cuts the index
+# entries, and so the cost, of every write. A per-document estimate of that saving is printed.
+#
+# Patterns are checked statically (one array-contains per query, range field ordered first, no
+# filters on fields with indexing disabled). With FIRESTORE_EMULATOR_HOST set, --validate also runs
+# every pattern against the emulator. The emulator does not enforce composite indexes, so this
+# catches queries Firestore rejects outright, not missing indexes. --planned also indexes the
+# PLANNED_QUERY_PATTERNS, which no app code runs yet.
+
+# --- CONFIGURATION ---
+FIRESTORE_INDEXES_PATH = './firestore.indexes.json'
+GROUPS_DATA_JSON_PATH = './groups_data.json' # Sample documents for the write-cost estimate and emulator queries
+# A pattern is one query shape the app runs. collection is a collection path ("{...}" segments are
+# placeholders); filters are (field, op) or (field, op, sample value); order_by is (field, "asc"|"desc").
+QUERY_PATTERNS = [
+    # group_manager.ts
+    {"name": "group_messages", "collection": "groups/{groupId}/messages", "order_by": [("timestamp", "asc")]},
+    # conversation_manager.ts
+    {"name": "conversations_for_user", "collection": "conversations",
+     "filters": [("participants", "array-contains", "sample_uid")], "order_by": [("lastActivity", "desc")]},
+    {"name": "conversation_messages", "collection": "conversations/{conversationId}/messages",
+     "order_by": [("timestamp", "asc")]},
+    # session_history_manager.ts
+    {"name": "user_sessions_recent", "collection": "users/{uid}/sessions", "order_by": [("startTimeISO", "desc")]},
+]
+# Group browsing queries no code runs yet (the hub reads group_listings). Each composite index costs
+# index writes on every group write, so these are only included with --planned, once the app needs them.
+PLANNED_QUERY_PATTERNS = [
+    {"name": "groups_recent", "collection": "groups", "order_by": [("lastActivity", "desc")]},
+    {"name": "groups_by_language_recent", "collection": "groups",
+     "filters": [("language", "==")], "order_by": [("lastActivity", "desc")]},
+    {"name": "groups_by_category_recent", "collection": "groups",
+     "filters": [("category", "==")], "order_by": [("lastActivity", "desc")]},
+    {"name": "groups_by_tag_recent", "collection": "groups",
+     "filters": [("tags", "array-contains")], "order_by": [("lastActivity", "desc")]},
+    {"name": "groups_by_language_and_tag_recent", "collection": "groups",
+     "filters": [("language", "=="), ("tags", "array-contains")], "order_by": [("lastActivity", "desc")]},
+    {"name": "groups_by_language_and_category", "collection": "groups",
+     "filters": [("language", "=="), ("category", "==")]},
+    {"name": "groups_by_community_tag", "collection": "groups", "filters": [("communityTags", "array-contains")]},
+]
+# Fields whose automatic single-field indexes are disabled, per collection group
+UNINDEXED_FIELDS = {
+    "groups": ["description", "groupPhotoUrl", "lastMessage"],
+    "group_listings": ["groups"], # Only ever read by id
+}
+# --- END CONFIGURATION ---
+
+EQUALITY_OPS = {"==", "in"}
+ARRAY_OPS = {"array-contains", "array-contains-any"}
+RANGE_OPS = {"<", "<=", ">", ">=", "!=", "not-in"}
+ORDER_NAMES = {"asc": "ASCENDING", "desc": "DESCENDING"}
+
+
+def collection_group_of(collection_path):
+    """"users/{uid}/sessions" -> "sessions"."""
+    return collection_path.rstrip("/").split("/")[-1]
+
+
+def check_pattern(pattern):
+    """Returns the list of reasons Firestore would reject this pattern (empty if it is valid)."""
+    errors = []
+    filters = pattern.get("filters", [])
+    order_by = pattern.get("order_by", [])
+    unindexed = set(UNINDEXED_FIELDS.get(collection_group_of(pattern["collection"]), []))
+    for field, op, *_ in filters:
+        if op not in EQUALITY_OPS | ARRAY_OPS | RANGE_OPS:
+            errors.append(f"unknown operator {op!r} on '{field}'")
+    if sum(op in ARRAY_OPS for _, op, *_ in filters) > 1:
+        errors.append("at most one array-contains / array-contains-any filter per query")
+    range_fields = {field for field, op, *_ in filters if op in RANGE_OPS}
+    if len(range_fields) > 1:
+        errors.append(f"range filters on more than one field: {sorted(range_fields)}")
+    if range_fields and order_by and order_by[0][0] not in range_fields:
+        errors.append(f"first order_by must be the range-filtered field '{next(iter(range_fields))}'")
+    for field, direction in order_by:
+        if direction not in ORDER_NAMES:
+            errors.append(f"order_by direction for '{field}' must be 'asc' or 'desc'")
+    for field in [f for f, *_ in filters] + [f for f, _ in order_by]:
+        if field in unindexed or field.split(".")[0] in unindexed:
+            errors.append(f"'{field}' has indexing disabled in UNINDEXED_FIELDS")
+    return errors
+
+
+def plan_query(pattern):
+    """
+    Works out how Firestore serves a pattern.
+
+    Returns:
+        tuple: (description, composite index fields or None). Index fields are in
+               firestore.indexes.json form, e.g. {"fieldPath": "tags", "arrayConfig": "CONTAINS"}.
+    """
+    filters = pattern.get("filters", [])
+    order_by = pattern.get("order_by", [])
+    equality = [field for field, op, *_ in filters if op in EQUALITY_OPS]
+    array = [field for field, op, *_ in filters if op in ARRAY_OPS]
+    range_fields = [field for field, op, *_ in filters if op in RANGE_OPS]
+    ordered = [(field, ORDER_NAMES[direction]) for field, direction in order_by]
+    if range_fields and range_fields[0] not in [field for field, _ in ordered]:
+        ordered.insert(0, (range_fields[0], "ASCENDING"))
+
+    if not ordered:
+        if len(equality) + len(array) <= 1:
+            return f"automatic single-field index on '{(equality + array or ['__name__'])[0]}'", None
+        return f"merge of automatic single-field indexes on {', '.join(equality + array)}", None
+    if not equality and not array and len(ordered) == 1:
+        return f"automatic single-field index on '{ordered[0][0]}'", None
+
+    fields = [{"fieldPath": field, "order": "ASCENDING"} for field in equality]
+    fields += [{"fieldPath": field, "arrayConfig": "CONTAINS"} for field in array]
+    fields += [{"fieldPath": field, "order": order} for field, order in ordered]
+    return "composite index", fields
+
+
+def build_index_config(patterns=QUERY_PATTERNS, unindexed_fields=UNINDEXED_FIELDS):
+    """Returns (firestore.indexes.json content, [(pattern name, plan description)])."""
+    indexes = []
+    plans = []
+    for pattern in patterns:
+        description, fields = plan_query(pattern)
+        if fields:
+            index = {"collectionGroup": collection_group_of(pattern["collection"]),
+                     "queryScope": pattern.get("scope", "COLLECTION"), "fields": fields}
+            if index not in indexes:
+                indexes.append(index)
+            description = f"composite index #{indexes.index(index) + 1} (" + ", ".join(
+                f"{f['fieldPath']} {f.get('order', f.get('arrayConfig'))}" for f in fields) + ")"
+        plans.append((pattern["name"], description))
+    field_overrides = [{"collectionGroup": group, "fieldPath": field, "indexes": []}
+                       for group, fields in sorted(unindexed_fields.items()) for field in fields]
+    return {"indexes": indexes, "fieldOverrides": field_overrides}, plans
+
+
+def count_index_entries(value, path, unindexed):
+    """Estimates the automatic single-field index entries Firestore maintains for one field value."""
+    if path in unindexed:
+        return 0
+    if isinstance(value, dict):
+        return sum(count_index_entries(v, f"{path}.{k}", unindexed) for k, v in value.items())
+    if isinstance(value, list):
+        return len({json.dumps(item, sort_keys=True) for item in value}) # One array-contains entry per distinct element
+    return 2 # Ascending + descending
+
+
+def estimate_write_cost(config, documents, collection_group="groups"):
+    """Returns (entries per document with default indexing, entries with the generated config)."""
+    unindexed = {o["fieldPath"] for o in config["fieldOverrides"] if o["collectionGroup"] == collection_group and not o["indexes"]}
+    composites = [i for i in config["indexes"] if i["collectionGroup"] == collection_group]
+    before = after = 0
+    for doc in documents:
+        before += sum(count_index_entries(v, k, set()) for k, v in doc.items())
+        after += sum(count_index_entries(v, k, unindexed) for k, v in doc.items())
+        for index in composites:
+            entries = 1
+            for field in index["fields"]:
+                value = doc.get(field["fieldPath"])
+                entries *= 0 if value is None else (len(set(map(str, value))) if field.get("arrayConfig") else 1)
+            before += entries
+            after += entries
+    count = max(len(documents), 1)
+    return before / count, after / count
+
+
+def sample_group_documents(path=GROUPS_DATA_JSON_PATH):
+    """Seed records shaped like the stored documents (activity fields included, id and client-only fields dropped)."""
+    if not os.path.exists(path):
+        return []
+    docs = []
+    for _, record in iter_json_records(path):
+        doc = {k: v for k, v in record.items() if k not in ("id", "memberSelectionCriteria")}
+        doc["lastActivity"] = 0
+        doc["lastMessage"] = {"text": "", "senderId": "", "senderName": "", "timestamp": 0, "type": ""}
+        docs.append(doc)
+    return docs
+
+
+def validate_against_emulator(patterns, samples):
+    """
+    Runs each pattern as a limit(1) query against the Firestore emulator. Returns the number of failures.
+    """
+    from populate_firestore_groups import initialize_firebase
+    from google.cloud.firestore_v1.base_query import FieldFilter
+
+    db = initialize_firebase()
+    if db is None:
+        return len(patterns)
+    failures = 0
+    for pattern in patterns:
+        query = db.collection(pattern["collection"].replace("{", "").replace("}", ""))
+        for field, op, *value in pattern.get("filters", []):
+            sample = value[0] if value else next((doc[field] for doc in samples if field in doc), "sample")
+            if op in ARRAY_OPS and isinstance(sample, list):
+                sample = sample[0] if op == "array-contains" else sample[:10]
+            elif op in ("in", "not-in") and not isinstance(sample, list):
+                sample = [sample]
+            query = query.where(filter=FieldFilter(field, op, sample))
+        for field, direction in pattern.get("order_by", []):
+            query = query.order_by(field, direction=ORDER_NAMES[direction])
+        try:
+            query.limit(1).get()
+            print(f"  OK    {pattern['name']}")
+        except Exception as e:
+            failures += 1
+            print(f"  FAIL  {pattern['name']}: {e}")
+    return failures
+
+
+def generate_indexes(check_only=False, validate=False, include_planned=False):
+    """
+    Checks the declared patterns, prints their query plans and writes firestore.indexes.json.
+
+    Args:
+        check_only (bool): Don't write; fail if firestore.indexes.json differs from what would be generated.
+        validate (bool): Also run every pattern against the emulator (needs FIRESTORE_EMULATOR_HOST).
+        include_planned (bool): Also index PLANNED_QUERY_PATTERNS.
+
+    Returns:
+        bool: True on success.
+    """
+    patterns = QUERY_PATTERNS + (PLANNED_QUERY_PATTERNS if include_planned else [])
+    errors = [f"{p['name']}: {message}" for p in patterns for message in check_pattern(p)]
+    if errors:
+        print(f"Error: {len(errors)} invalid query pattern(s):")
+        for message in errors:
+            print(f"  - {message}")
+        return False
+
+    config, plans = build_index_config(patterns)
+    print(f"Query plans for {len(plans)} declared patterns:")
+    for name, description in plans:
+        print(f"  {name:<36} {description}")
+
+    samples = sample_group_documents()
+    if samples:
+        before, after = estimate_write_cost(config, samples)
+        print(f"\nIndex entries per group document write: {before:.0f} with default indexing, {after:.0f} with the "
+              f"generated config ({1 - after / before:.0%} fewer).")
+
+    content = json.dumps(config, indent=2) + "\n"
+    try:
+        with open(FIRESTORE_INDEXES_PATH, 'r', encoding='utf-8') as f:
+            current = f.read()
+    except FileNotFoundError:
+        current = None
+    if check_only:
+        if current is not None and json.loads(current) == config:
+            print(f"\n{FIRESTORE_INDEXES_PATH} is up to date.")
+        else:
+            print(f"\n{FIRESTORE_INDEXES_PATH} is out of date; run firestore_indexes.py.")
+            return False
+    elif current != content:
+        with open(FIRESTORE_INDEXES_PATH, 'w', encoding='utf-8') as f:
+            f.write(content)
+        print(f"\nWrote {len(config['indexes'])} composite indexes and {len(config['fieldOverrides'])} field overrides "
+              f"to {FIRESTORE_INDEXES_PATH}.")
+    else:
+        print(f"\n{FIRESTORE_INDEXES_PATH} unchanged.")
+
+    if validate:
+        if not os.environ.get("FIRESTORE_EMULATOR_HOST"):
+            print("Error: --validate needs FIRESTORE_EMULATOR_HOST (e.g. localhost:8080) pointing at a running emulator.")
+            return False
+        print("\nRunning every pattern against the emulator:")
+        failures = validate_against_emulator(patterns, samples)
+        print(f"{len(patterns) - failures} of {len(patterns)} queries accepted by the emulator.")
+        return failures == 0
+    return True
+
+
+if __name__ == "__main__":
+    # Assuming the script is in the project root, like populate_firestore_groups.py
+    os.chdir(os.path.dirname(os.path.abspath(__file__)))
+    # Deploy the result with: firebase deploy --only firestore:indexes
+    if not generate_indexes(check_only="--check" in sys.argv, validate="--validate" in sys.argv,
+                            include_planned="--planned" in sys.argv):
+        sys.exit(1)
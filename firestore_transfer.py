@@ -0,0 +1,240 @@
+import base64
+import datetime
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from populate_firestore_groups import initialize_firebase, write_documents_batched
+from seed_loader import iter_json_records
+
+try:
+    from google.cloud.firestore_v1.base_query import FieldFilter
+except ImportError: # Offline runs against fake_firestore
+    from fake_firestore import FieldFilter
+
+# Bulk export/import of Firestore collections (and chosen subcollections) as newline-delimited JSON.
+#
+# Export splits a collection into document-id ranges, one per leading id character, and pages each
+# range with cursor queries (order by id, start after the last document, limit PAGE_SIZE) on a
+# thread pool. Auto-generated ids spread evenly over those ranges; slug ids like ours cluster in a
+# few, and the empty ranges cost one query each. The configured subcollections of every exported
+# document are paged as separate tasks on the same pool. Each document is written as
+# {"path": "groups/x", "data": {...}} as soon as its page arrives, so memory stays at one page
+# per worker (plus a pending task per parent document) however large the export is.
+#
+# Import streams the file back through the batched, retrying writer from populate_firestore_groups.
+# Both directions report docs/sec. Set FIRESTORE_EMULATOR_HOST to run against the local emulator.
+
+# --- CONFIGURATION ---
+EXPORT_WORKERS = 8
+PAGE_SIZE = 300 # Documents per cursor query
+# Every character a document id can start with, in Firestore's (byte-wise) order; one range per character
+PARTITION_ALPHABET = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ_abcdefghijklmnopqrstuvwxyz"
+SUBCOLLECTIONS = {"groups": ("members", "messages")} # Exported along with each document of the collection
+# --- END CONFIGURATION ---
+
+
+def encode_value(value):
+    """Turns Firestore values that JSON can't hold (timestamps, references, bytes, geopoints) into tagged dicts."""
+    if isinstance(value, dict):
+        return {k: encode_value(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [encode_value(v) for v in value]
+    if isinstance(value, datetime.datetime):
+        return {"__type__": "timestamp", "value": value.isoformat()}
+    if isinstance(value, bytes):
+        return {"__type__": "bytes", "value": base64.b64encode(value).decode('ascii')}
+    if hasattr(value, "latitude") and hasattr(value, "longitude"):
+        return {"__type__": "geopoint", "value": [value.latitude, value.longitude]}
+    if hasattr(value, "path") and hasattr(value, "collection"): # DocumentReference
+        return {"__type__": "reference", "value": value.path}
+    return value
+
+
+def decode_value(value, db):
+    """Inverse of encode_value; references are rebuilt against db."""
+    if isinstance(value, list):
+        return [decode_value(v, db) for v in value]
+    if not isinstance(value, dict):
+        return value
+    kind = value.get("__type__")
+    if kind == "timestamp":
+        return datetime.datetime.fromisoformat(value["value"])
+    if kind == "bytes":
+        return base64.b64decode(value["value"])
+    if kind == "reference":
+        return db.document(value["value"])
+    if kind == "geopoint":
+        from google.cloud.firestore_v1 import GeoPoint
+        return GeoPoint(*value["value"])
+    return {k: decode_value(v, db) for k, v in value.items()}
+
+
+def id_ranges(alphabet=PARTITION_ALPHABET):
+    """Returns [(low, high)] id ranges covering every id: (None, "0"), ("0", "1"), ..., ("z", None)."""
+    bounds = [None] + list(alphabet) + [None]
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+def iter_pages(collection_ref, low=None, high=None, page_size=PAGE_SIZE):
+    """Yields lists of snapshots for the documents with low <= id < high, one cursor query per page."""
+    query = collection_ref.order_by("__name__")
+    if low is not None:
+        query = query.where(filter=FieldFilter("__name__", ">=", collection_ref.document(low)))
+    if high is not None:
+        query = query.where(filter=FieldFilter("__name__", "<", collection_ref.document(high)))
+    last = None
+    while True:
+        page_query = query.start_after(last) if last is not None else query
+        page = list(page_query.limit(page_size).stream())
+        if page:
+            yield page
+        if len(page) < page_size:
+            return
+        last = page[-1]
+
+
+class NdjsonWriter:
+    """Thread-safe line writer that counts documents and bytes."""
+
+    def __init__(self, f):
+        self._f = f
+        self._lock = threading.Lock()
+        self.docs = 0
+        self.bytes = 0
+
+    def write(self, path, data):
+        line = json.dumps({"path": path, "data": encode_value(data)}, ensure_ascii=False) + "\n"
+        with self._lock:
+            self._f.write(line)
+            self.docs += 1
+            self.bytes += len(line)
+
+
+def export_collection(db, collection_path, output_path, subcollections=None, max_workers=EXPORT_WORKERS):
+    """
+    Exports a collection to an NDJSON file using parallel id-range partitions. Each subcollection
+    under an exported document is paged as its own task on the same pool, so documents with large
+    subcollections (groups and their messages) spread across workers even when their ids share a range.
+
+    Args:
+        db: Firestore client.
+        collection_path (str): e.g. "groups".
+        output_path (str): Destination .jsonl file (written via a temp file, replaced on success).
+        subcollections (tuple): Subcollection names to export under each document; defaults to
+                                SUBCOLLECTIONS for the collection.
+
+    Returns:
+        dict: {"docs", "bytes", "pages", "seconds"}
+    """
+    if subcollections is None:
+        subcollections = SUBCOLLECTIONS.get(collection_path, ())
+    collection_ref = db.collection(collection_path)
+    ranges = id_ranges()
+    start = time.perf_counter()
+    tmp_path = f"{output_path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        writer = NdjsonWriter(f)
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = []
+            futures_lock = threading.Lock()
+
+            def export_pages(ref, low=None, high=None, with_subcollections=False):
+                pages = 0
+                for page in iter_pages(ref, low, high):
+                    pages += 1
+                    for snapshot in page:
+                        writer.write(snapshot.reference.path, snapshot.to_dict())
+                        if with_subcollections:
+                            with futures_lock:
+                                futures.extend(executor.submit(export_pages, snapshot.reference.collection(name))
+                                               for name in subcollections)
+                return pages
+
+            with futures_lock:
+                futures.extend(executor.submit(export_pages, collection_ref, low, high, True) for low, high in ranges)
+            pages = 0
+            done = 0
+            while True: # Range tasks add subcollection tasks while they run
+                with futures_lock:
+                    if done == len(futures):
+                        break
+                    future = futures[done]
+                pages += future.result()
+                done += 1
+    os.replace(tmp_path, output_path)
+    seconds = time.perf_counter() - start
+    print(f"Exported {writer.docs} documents from '{collection_path}'"
+          f"{' (with ' + ', '.join(subcollections) + ')' if subcollections else ''} to {output_path}: "
+          f"{writer.bytes / 1024:,.1f} KB, {pages} pages over {len(ranges)} id ranges, {seconds:.2f}s "
+          f"({writer.docs / max(seconds, 1e-9):.0f} docs/s).")
+    return {"docs": writer.docs, "bytes": writer.bytes, "pages": pages, "seconds": seconds}
+
+
+def import_documents(db, input_path, merge=False):
+    """
+    Re-imports an export file with batched, concurrent writes. Documents are replaced whole
+    unless merge=True. The file is streamed, never loaded in full; .jsonl and .ndjson files (or any
+    file of one JSON object per line) and JSON arrays of records are all accepted.
+
+    Returns:
+        dict: The stats from write_documents_batched.
+    """
+    docs = ((record["path"], decode_value(record["data"], db)) for _, record in iter_json_records(input_path))
+    stats = write_documents_batched(db, None, docs, merge=merge)
+    print(f"Imported {stats['written']} documents from {input_path} ({stats['failed']} failed), "
+          f"{stats['written'] / max(stats['seconds'], 1e-9):.0f} docs/s.")
+    return stats
+
+
+def benchmark_export(num_groups=200, messages_per_group=50, latency=0.01):
+    """
+    Times export offline against fake_firestore.FakeFirestoreClient with a simulated round trip,
+    sequential (one worker) vs. the partitioned thread pool, then checks an import round-trips.
+    """
+    import tempfile
+    from fake_firestore import FakeFirestoreClient
+
+    source = FakeFirestoreClient(latency=latency)
+    for i in range(num_groups):
+        source.documents[f"groups/group_{i:04d}"] = {"name": f"Group {i}", "lastActivity": datetime.datetime(2024, 1, 1)}
+        for j in range(messages_per_group):
+            source.documents[f"groups/group_{i:04d}/messages/{os.urandom(10).hex()}"] = {"text": f"message {j}"}
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        output_path = os.path.join(tmp_dir, "groups.jsonl")
+        sequential = export_collection(source, "groups", output_path, max_workers=1)
+        parallel = export_collection(source, "groups", output_path)
+        print(f"Parallel export speedup: {sequential['seconds'] / parallel['seconds']:.1f}x")
+
+        target = FakeFirestoreClient(latency=latency)
+        import_documents(target, output_path)
+        print("Round trip matches source." if target.documents == source.documents else "Round trip MISMATCH.")
+
+
+if __name__ == "__main__":
+    # python firestore_transfer.py export <collection> <file.jsonl>
+    # python firestore_transfer.py import <file.jsonl|file.ndjson> [--merge]
+    # python firestore_transfer.py --benchmark
+    if "--benchmark" in sys.argv:
+        benchmark_export()
+        sys.exit(0)
+
+    args = [arg for arg in sys.argv[1:] if not arg.startswith("--")]
+    if not (len(args) == 3 and args[0] == "export") and not (len(args) == 2 and args[0] == "import"):
+        print("Usage: firestore_transfer.py export <collection> <file.jsonl> | import <file.jsonl|file.ndjson> [--merge] | --benchmark")
+        sys.exit(2)
+
+    db_client = initialize_firebase()
+    if not db_client:
+        print("Aborting script due to Firebase initialization failure.")
+        sys.exit(1)
+    if args[0] == "export":
+        export_collection(db_client, args[1], args[2])
+    else:
+        stats = import_documents(db_client, args[1], merge="--merge" in sys.argv)
+        if stats["failed"]:
+            sys.exit(1)
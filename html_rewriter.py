@@ -0,0 +1,191 @@
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+# URL rewriter for our HTML pages.
+#
+# Each document is scanned once for comments and <script>/<style> blocks and once for URL-bearing
+# attributes between them, and every URL found is handed to a resolver: src/href/poster/data-src
+# attributes, each candidate of a srcset, and url(...) inside style attributes and <style>
+# blocks. Only attributes inside start tags are touched; text nodes, comments and <script> bodies
+# are copied untouched.
+#
+# A resolver is called as resolve(url, base_url_dir) and returns the replacement URL, or None to
+# leave the value alone. base_url_dir is the page's URL directory ("/" for root pages, "/landing"
+# for landing/*.html) so relative references can be resolved. Resolvers must be picklable
+# (a top-level function or a functools.partial of one), because pages are rewritten in a process pool.
+
+URL_ATTRIBUTE_NAMES = ("src", "href", "poster", "data-src", "srcset", "style")
+ATTRIBUTE_VALUE = r"""(?:"[^"]*"|'[^']*'|[^\s"'=<>`]+)"""
+# Both scans start with a literal, which keeps them close to a plain substring search; one pattern
+# alternating between blocks and attributes is over twice as slow, because the engine can no
+# longer skip ahead to a candidate start. Block bodies use the "unrolled loop" form
+# ([^<]*(?:<(?!/x)[^<]*)*) instead of a lazy .*?, which the engine would advance one character at a time.
+BLOCK_PATTERN = re.compile(
+    r"<(?:(?P<comment>!--[^-]*(?:-(?!->)[^-]*)*-->)"
+    r"|(?P<script>script\b[^>]*>)(?P<script_body>[^<]*(?:<(?!/script)[^<]*)*)(?P<script_end></script\s*>)"
+    r"|(?P<style>style\b[^>]*>)(?P<style_body>[^<]*(?:<(?!/style)[^<]*)*)(?P<style_end></style\s*>))")
+# Stops at the "=" of a URL attribute: fixed-width lookbehinds check that whitespace and one of the
+# names come right before it (so "data-srcset=" or "x.src=" don't match; "src = x", with spaces
+# before the "=", isn't recognised either). Group 1 is the value, quotes included.
+ATTRIBUTE_SCAN = re.compile(
+    "=(?:" + "|".join(rf"(?<=\s{name}=)" for name in URL_ATTRIBUTE_NAMES) + r")\s*(" + ATTRIBUTE_VALUE + ")")
+# A start tag from its "<" up to the end of an attribute name (group 1). Fullmatched against the
+# text before each "=" the scan stops at, which rejects names in text nodes ("<p>set src=x</p>")
+# and inside another attribute's quoted value.
+START_TAG_PREFIX = re.compile(
+    r"""<[a-zA-Z][^\s/>]*(?:\s+[^\s"'>/=]+(?:\s*=\s*""" + ATTRIBUTE_VALUE + r""")?)*\s+([^\s"'>/=]+)""")
+CSS_URL_PATTERN = re.compile(r"""url\(\s*(["']?)([^"')]+)\1\s*\)""")
+
+
+def rewrite_css_urls(css, resolve, base_url_dir):
+    """Rewrites every url(...) in a CSS fragment."""
+    def replacer(match):
+        new_url = resolve(match.group(2).strip(), base_url_dir)
+        return f"url({match.group(1)}{new_url}{match.group(1)})" if new_url else match.group(0)
+    return CSS_URL_PATTERN.sub(replacer, css)
+
+
+def rewrite_srcset(srcset, resolve, base_url_dir):
+    """Rewrites the URL of each "url [descriptor]" candidate in a srcset value."""
+    candidates = []
+    for candidate in srcset.split(","):
+        parts = candidate.strip().split(None, 1)
+        if not parts:
+            continue
+        new_url = resolve(parts[0], base_url_dir)
+        candidates.append(" ".join([new_url or parts[0]] + parts[1:]))
+    return ", ".join(candidates)
+
+
+def _rewrite_attribute(name, raw_value, resolve, base_url_dir):
+    """Returns the rewritten value of one attribute with its quotes (unquoted values gain double quotes), or None if unchanged."""
+    quote = raw_value[0]
+    if quote == '"' or quote == "'":
+        value = raw_value[1:-1]
+    else:
+        quote, value = '"', raw_value
+    if name == "srcset":
+        new_value = rewrite_srcset(value, resolve, base_url_dir)
+    elif name == "style":
+        new_value = rewrite_css_urls(value, resolve, base_url_dir)
+    else:
+        new_value = resolve(value, base_url_dir) or value
+    return None if new_value == value else quote + new_value + quote
+
+
+def _rewrite_markup(content, start, end, copied, resolve, base_url_dir, output):
+    """
+    Rewrites the URL attributes of the start tags in content[start:end], which holds no comment or block body.
+
+    Args:
+        copied (int): content[:copied] is already in output.
+
+    Returns:
+        int: The new copied position.
+    """
+    for match in ATTRIBUTE_SCAN.finditer(content, start, end):
+        equals = match.start()
+        tag_start = content.rfind("<", 0, equals)
+        tag_prefix = START_TAG_PREFIX.fullmatch(content, tag_start, equals) if tag_start != -1 else None
+        if tag_prefix is None:
+            continue
+        new_value = _rewrite_attribute(tag_prefix.group(1), match.group(1), resolve, base_url_dir)
+        if new_value is not None:
+            value_start, value_end = match.span(1)
+            output.append(content[copied:value_start])
+            output.append(new_value)
+            copied = value_end
+    return copied
+
+
+def rewrite_html(content, resolve, base_url_dir="/"):
+    """Rewrites every URL reference in an HTML document (start tags, srcset, style and <style> url())."""
+    output = []
+    copied = 0 # content[:copied] is already in output
+    gap_start = 0
+    for block in BLOCK_PATTERN.finditer(content):
+        block_start = block.start()
+        if content.find("=", gap_start, block_start) != -1: # No "=", no attributes
+            copied = _rewrite_markup(content, gap_start, block_start, copied, resolve, base_url_dir, output)
+        gap_start = block.end()
+        if block.start("script") != -1:
+            copied = _rewrite_markup(content, block_start, block.end("script"), copied, resolve, base_url_dir, output)
+        elif block.start("style") != -1:
+            copied = _rewrite_markup(content, block_start, block.end("style"), copied, resolve, base_url_dir, output)
+            css = block.group("style_body")
+            new_css = rewrite_css_urls(css, resolve, base_url_dir)
+            if new_css != css:
+                output.append(content[copied:block.start("style_body")])
+                output.append(new_css)
+                copied = block.end("style_body")
+    copied = _rewrite_markup(content, gap_start, len(content), copied, resolve, base_url_dir, output)
+    output.append(content[copied:])
+    return "".join(output)
+
+
+def page_url_dir(page_path, site_root):
+    """Returns the URL directory a page is served from, e.g. "/" or "/landing"."""
+    rel_dir = os.path.relpath(os.path.dirname(os.path.abspath(page_path)), os.path.abspath(site_root))
+    return "/" if rel_dir == "." else "/" + rel_dir.replace(os.sep, "/")
+
+
+def rewrite_html_file(page_path, site_root, resolve):
+    """Rewrites one page in place, only touching the file if its content changed. Returns True if written."""
+    with open(page_path, 'r', encoding='utf-8') as f:
+        content = f.read()
+    updated_content = rewrite_html(content, resolve, page_url_dir(page_path, site_root))
+    if updated_content == content:
+        return False
+    tmp_path = f"{page_path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(updated_content)
+    os.replace(tmp_path, page_path)
+    return True
+
+
+def rewrite_html_files(page_paths, site_root, resolve, max_workers=None):
+    """
+    Rewrites many pages in parallel. Returns the list of pages that were actually changed.
+
+    Small page sets are done in-process; a process pool only pays off once there is real work.
+    """
+    if len(page_paths) < 4:
+        return [p for p in page_paths if rewrite_html_file(p, site_root, resolve)]
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        changed = executor.map(rewrite_html_file, page_paths, [site_root] * len(page_paths), [resolve] * len(page_paths))
+        return [page for page, was_changed in zip(page_paths, changed) if was_changed]
+
+
+def benchmark_rewriters(pages, resolve, legacy_patterns, repeat=50, rounds=5):
+    """
+    Compares rewrite_html with the old approach of one re.sub(callback) pass per pattern, on a large
+    page built by concatenating `pages` `repeat` times. legacy_patterns are regexes whose group 1 is
+    the attribute, group 2 the quote and group 3 the URL (the shape migrate_to_public used).
+    """
+    content = "".join(open(p, 'r', encoding='utf-8').read() for p in pages) * repeat
+    print(f"Benchmark page: {len(content) / (1024 * 1024):.1f} MB ({len(pages)} pages x {repeat})")
+
+    def legacy_replacer(match):
+        new_url = resolve(match.group(3), "/")
+        return f"{match.group(1)}={match.group(2)}{new_url}{match.group(2)}" if new_url else match.group(0)
+
+    def legacy_rewrite():
+        result = content
+        for pattern in legacy_patterns:
+            result = re.sub(pattern, legacy_replacer, result)
+
+    # Alternate the two and keep each one's best time, so load on the machine hits both alike
+    legacy_seconds = tokenizer_seconds = float("inf")
+    for _ in range(rounds):
+        start = time.perf_counter()
+        legacy_rewrite()
+        legacy_seconds = min(legacy_seconds, time.perf_counter() - start)
+        start = time.perf_counter()
+        rewrite_html(content, resolve, "/")
+        tokenizer_seconds = min(tokenizer_seconds, time.perf_counter() - start)
+
+    print(f"Per-pattern re.sub ({len(legacy_patterns)} patterns): {legacy_seconds:.3f}s")
+    print(f"Start-tag scan (+srcset/style/url()): {tokenizer_seconds:.3f}s")
+    print(f"Ratio: {legacy_seconds / tokenizer_seconds:.2f}x (best of {rounds})")
@@ -0,0 +1,239 @@
+import asyncio
+import os
+import random
+import sys
+import threading
+import time
+
+from populate_firestore_groups import EMULATOR_PROJECT_ID, GROUPS_DATA_JSON_PATH, build_group_data, write_documents_batched
+from seed_loader import iter_json_records
+
+try:
+    from google.cloud import firestore # Installed with firebase-admin
+except ImportError:
+    firestore = None
+
+# Load generator for group chat traffic against the Firestore emulator.
+#
+# Seeds copies of the groups in groups_data.json under a per-run id prefix, then has several
+# writers per group (learners, the tutor and AI personas) post messages concurrently, the way
+# group_data_manager.ts does: add a message to groups/<id>/messages, then update the group's
+# lastMessage/lastActivity. Every message therefore also writes the parent group document, which
+# makes it a hot document. Listeners on each group's messages measure how long a write takes to reach
+# other clients.
+#
+# Reports write latency percentiles per operation, errors by type (Aborted = contention), and
+# per-group document write rates against Firestore's sustained limit of about one write per second
+# per document. The emulator does not throttle hot documents the way production does, so treat rates
+# above the limit as what production would push back on.
+#
+# WRITE_MODE compares strategies: "app" (add + update, as the client does today), "batch" (both
+# writes in one atomic batch) or "transaction" (read-modify-write of a messageCount on the group).
+
+# --- CONFIGURATION ---
+LOAD_GROUPS = 10 # Groups seeded for the run (groups_data.json is cycled if it has fewer)
+WRITERS_PER_GROUP = 6 # maxLearners (4) plus the tutor and an AI persona
+LISTENERS_PER_GROUP = 4
+MESSAGES_PER_WRITER = 30
+THINK_TIME_SECONDS = (0.05, 0.5) # Random pause between a writer's messages
+WRITE_MODE = "app" # "app" | "batch" | "transaction"
+HOT_DOCUMENT_WRITES_PER_SECOND = 1.0 # Firestore's sustained per-document write guidance
+LOAD_TEST_PREFIX = "loadtest_" # Seeded group ids start with this; they are deleted after the run
+# --- END CONFIGURATION ---
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+
+class LoadStats:
+    """Thread-safe counters shared by writer coroutines and listener callback threads."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies = {} # operation -> [seconds]
+        self.errors = {} # exception class name -> count
+        self.group_writes = {} # group id -> parent document writes
+        self.propagation = [] # seconds from a writer's send to a listener seeing the message
+        self.listener_events = 0
+
+    def record(self, operation, seconds):
+        with self._lock:
+            self.latencies.setdefault(operation, []).append(seconds)
+
+    def record_error(self, error):
+        with self._lock:
+            name = type(error).__name__
+            self.errors[name] = self.errors.get(name, 0) + 1
+
+    def record_group_write(self, group_id):
+        with self._lock:
+            self.group_writes[group_id] = self.group_writes.get(group_id, 0) + 1
+
+    def record_delivery(self, sent_at):
+        with self._lock:
+            self.listener_events += 1
+            if sent_at:
+                self.propagation.append(time.time() - sent_at)
+
+
+def seed_load_groups(db, run_id, count=LOAD_GROUPS):
+    """Writes `count` groups copied from groups_data.json under LOAD_TEST_PREFIX. Returns their ids."""
+    templates = [record for _, record in iter_json_records(GROUPS_DATA_JSON_PATH)]
+    docs = []
+    for i in range(count):
+        template = templates[i % len(templates)]
+        group_id = f"{LOAD_TEST_PREFIX}{run_id}_{i}_{template['id']}"
+        docs.append((group_id, dict(build_group_data(template), messageCount=0)))
+    write_documents_batched(db, 'groups', docs)
+    return [group_id for group_id, _ in docs]
+
+
+def start_listeners(db, group_ids, stats, per_group=LISTENERS_PER_GROUP):
+    """Attaches per_group message listeners to each group (sync client, one watch stream each). Returns the watches."""
+    watches = []
+
+    def on_messages(snapshots, changes, read_time):
+        for change in changes:
+            if change.type.name == "ADDED":
+                stats.record_delivery(change.document.get("clientSentAt"))
+
+    for group_id in group_ids:
+        query = db.collection('groups').document(group_id).collection('messages')
+        for _ in range(per_group):
+            watches.append(query.on_snapshot(on_messages))
+    return watches
+
+
+async def post_message(async_db, group_id, writer_id, mode, stats):
+    """Posts one message the way `mode` says, recording per-operation latency."""
+    group_ref = async_db.collection('groups').document(group_id)
+    message = {"senderId": writer_id, "text": f"load test message from {writer_id}", "type": "text",
+               "timestamp": firestore.SERVER_TIMESTAMP, "clientSentAt": time.time()}
+    last_message = {"text": message["text"], "senderId": writer_id, "timestamp": firestore.SERVER_TIMESTAMP, "type": "text"}
+    start = time.perf_counter()
+
+    if mode == "app":
+        await group_ref.collection('messages').add(message)
+        stats.record("add message", time.perf_counter() - start)
+        update_start = time.perf_counter()
+        await group_ref.update({"lastActivity": firestore.SERVER_TIMESTAMP, "lastMessage": last_message})
+        stats.record("update group", time.perf_counter() - update_start)
+    elif mode == "batch":
+        batch = async_db.batch()
+        batch.set(group_ref.collection('messages').document(), message)
+        batch.update(group_ref, {"lastActivity": firestore.SERVER_TIMESTAMP, "lastMessage": last_message})
+        await batch.commit()
+    elif mode == "transaction":
+        @firestore.async_transactional
+        async def append(transaction):
+            snapshot = await group_ref.get(transaction=transaction)
+            transaction.set(group_ref.collection('messages').document(), message)
+            transaction.update(group_ref, {"lastActivity": firestore.SERVER_TIMESTAMP, "lastMessage": last_message,
+                                           "messageCount": (snapshot.get("messageCount") or 0) + 1})
+        await append(async_db.transaction())
+    else:
+        raise ValueError(f"Unknown WRITE_MODE {mode!r}")
+
+    stats.record("post (total)", time.perf_counter() - start)
+    stats.record_group_write(group_id)
+
+
+async def run_writer(async_db, group_id, writer_id, stats, mode=WRITE_MODE, messages=MESSAGES_PER_WRITER):
+    for _ in range(messages):
+        await asyncio.sleep(random.uniform(*THINK_TIME_SECONDS))
+        try:
+            await post_message(async_db, group_id, writer_id, mode, stats)
+        except Exception as e:
+            stats.record_error(e)
+
+
+async def run_load(async_db, group_ids, stats, mode=WRITE_MODE):
+    """Runs WRITERS_PER_GROUP writer coroutines per group concurrently. Returns the wall-clock seconds."""
+    start = time.perf_counter()
+    await asyncio.gather(*(run_writer(async_db, group_id, f"writer_{w}", stats, mode)
+                           for group_id in group_ids for w in range(WRITERS_PER_GROUP)))
+    return time.perf_counter() - start
+
+
+def print_load_report(stats, seconds, mode):
+    posted = sum(stats.group_writes.values())
+    print(f"\nWrite mode '{mode}': {posted} messages posted in {seconds:.1f}s "
+          f"({posted / max(seconds, 1e-9):.0f} messages/s), {sum(stats.errors.values())} errors.")
+
+    print(f"\n{'Operation':<16} {'Count':>7} {'p50 ms':>8} {'p90 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+    for operation, values in sorted(stats.latencies.items()):
+        values = sorted(values)
+        print(f"{operation:<16} {len(values):>7} " + " ".join(
+            f"{percentile(values, q) * 1000:>8.1f}" for q in (0.5, 0.9, 0.99, 1.0)))
+
+    if stats.errors:
+        print("\nErrors: " + ", ".join(f"{name} x{count}" for name, count in sorted(stats.errors.items())))
+        contention = stats.errors.get("Aborted", 0)
+        if contention:
+            print(f"  {contention} Aborted errors = transaction/batch contention on the group documents.")
+
+    rates = sorted(((count / max(seconds, 1e-9), group_id) for group_id, count in stats.group_writes.items()), reverse=True)
+    hot = [(rate, group_id) for rate, group_id in rates if rate > HOT_DOCUMENT_WRITES_PER_SECOND]
+    print(f"\nGroup document writes/s: max {rates[0][0] if rates else 0:.2f}, "
+          f"{len(hot)} of {len(rates)} groups above the {HOT_DOCUMENT_WRITES_PER_SECOND:g}/s sustained limit.")
+    for rate, group_id in hot[:5]:
+        print(f"  {group_id}: {rate:.2f} writes/s")
+
+    propagation = sorted(stats.propagation)
+    if propagation:
+        print(f"\nListener delivery: {stats.listener_events} events, write-to-listener latency "
+              f"p50 {percentile(propagation, 0.5) * 1000:.0f} ms, p99 {percentile(propagation, 0.99) * 1000:.0f} ms.")
+
+
+def delete_load_groups(db, group_ids):
+    """Deletes the seeded groups and their subcollections."""
+    for group_id in group_ids:
+        db.recursive_delete(db.collection('groups').document(group_id))
+    print(f"Deleted {len(group_ids)} load test groups.")
+
+
+def run_load_test(mode=WRITE_MODE, keep_data=False):
+    """
+    Seeds groups, runs the writers and listeners, prints the report and cleans up.
+
+    Returns:
+        LoadStats: The collected measurements, or None if the run could not start.
+    """
+    if mode not in ("app", "batch", "transaction"):
+        print(f"Error: Unknown write mode {mode!r} (expected app, batch or transaction).")
+        return None
+    if firestore is None:
+        print("Error: google-cloud-firestore is required (pip install firebase-admin).")
+        return None
+    if not os.environ.get("FIRESTORE_EMULATOR_HOST"):
+        print("Error: Set FIRESTORE_EMULATOR_HOST (e.g. localhost:8080). The load test only runs against the emulator.")
+        return None
+
+    db = firestore.Client(project=EMULATOR_PROJECT_ID)
+    async_db = firestore.AsyncClient(project=EMULATOR_PROJECT_ID)
+    run_id = time.strftime("%Y%m%d%H%M%S")
+    group_ids = seed_load_groups(db, run_id)
+    stats = LoadStats()
+    watches = start_listeners(db, group_ids, stats)
+    print(f"Running {WRITERS_PER_GROUP} writers and {LISTENERS_PER_GROUP} listeners on each of {len(group_ids)} groups "
+          f"({MESSAGES_PER_WRITER} messages per writer, mode '{mode}')...")
+    try:
+        seconds = asyncio.run(run_load(async_db, group_ids, stats, mode))
+        time.sleep(1.0) # Let listeners catch up with the last writes
+    finally:
+        for watch in watches:
+            watch.unsubscribe()
+        if not keep_data:
+            delete_load_groups(db, group_ids)
+    print_load_report(stats, seconds, mode)
+    return stats
+
+
+if __name__ == "__main__":
+    # python load_test_groups.py [--mode=app|batch|transaction] [--keep]
+    mode = next((arg.split("=", 1)[1] for arg in sys.argv if arg.startswith("--mode=")), WRITE_MODE)
+    if run_load_test(mode, keep_data="--keep" in sys.argv) is None:
+        sys.exit(1)
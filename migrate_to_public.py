@@ -1,11 +1,51 @@
 import os
 import shutil
 import re
+import sys
+import glob
+import json
+import hashlib
+import posixpath
+import errno
+import threading
+import datetime
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from html_rewriter import benchmark_rewriters, rewrite_css_urls, rewrite_html_files
+from ops_metrics import add_counts, instrumented_run, phase
+
+# Relative paths starting with these are prefixed with "/" once their directory lives in public/
+MIGRATED_PATH_PREFIXES = ("js/utils/", "js/services/", "js/core/", "js/sessions/", "js/ui/", "data/", "css/", "images/")
+
+# --- MIGRATION JOURNAL CONFIGURATION ---
+MIGRATION_JOURNAL_NAME = ".migrate_journal.jsonl" # In the project root; lets an interrupted run resume
+MIGRATION_TRASH_DIR = ".migrate_trash" # Targets the migration replaces are moved here, so rollback can restore them
+MIGRATION_WORKERS = 8
+# --- END MIGRATION JOURNAL CONFIGURATION ---
+
+# --- FINGERPRINTING CONFIGURATION ---
+FINGERPRINT_DIRS = ["css", "images", "sounds"] # Directories under public/ to fingerprint
+FINGERPRINT_OUTPUT_DIR = "static" # public/static/... holds the hash-suffixed copies, served as /static/...
+ASSET_MANIFEST_NAME = "asset_manifest.json" # Written to the project root: original URL -> fingerprinted URL
+FINGERPRINT_HASH_LENGTH = 8
+# Site pages whose src/href references are rewritten (globs relative to the project root)
+HTML_PAGE_GLOBS = ["*.html", "landing/*.html", "y/*.html"]
+# --- END FINGERPRINTING CONFIGURATION ---
+
+def prefix_migrated_path(value, base_url_dir):
+    """Resolver for html_rewriter: "css/x.css" -> "/css/x.css" for paths into the migrated directories."""
+    if value.startswith(MIGRATED_PATH_PREFIXES):
+        return "/" + value
+    return None
 
 def migrate_assets_to_public(project_root):
     """
     Moves specified asset directories into a 'public' directory
-    and updates src/href paths in index.html.
+    and updates src/href/srcset/url() paths in every site page.
+
+    Returns:
+        bool: True if the migration completed, False if it stopped (re-run to resume).
     """
     public_dir_name = "public"
     public_dir_path = os.path.join(project_root, public_dir_name)
@@ -29,126 +69,24 @@ def migrate_assets_to_public(project_root):
     else:
         print(f"Directory already exists: {public_dir_path}")
 
-    # 2. Move specified directories into public
-    for src_dir_name, target_dir_name_in_public in directories_to_move.items():
-        src_path = os.path.join(project_root, src_dir_name)
-        target_path_in_public = os.path.join(public_dir_path, target_dir_name_in_public)
-
-        if os.path.exists(src_path):
-            if os.path.exists(target_path_in_public):
-                # If target exists, move contents of src into target (merge)
-                # This is a bit more complex to do robustly, for simplicity,
-                # we'll assume if target_path_in_public exists, we might be re-running.
-                # A more robust version would handle merging or ask the user.
-                # For now, if it's just files, we can copy them over.
-                # If it has subdirectories, shutil.move might error if target exists.
-                # Let's try to move and if it fails, it means the dir is already there.
-                try:
-                    print(f"Moving contents from {src_path} to {target_path_in_public} (if target exists, merging)...")
-                    # Move each item from src_path to target_path_in_public
-                    for item_name in os.listdir(src_path):
-                        s_item = os.path.join(src_path, item_name)
-                        d_item = os.path.join(target_path_in_public, item_name)
-                        if os.path.isdir(s_item):
-                            if os.path.exists(d_item):
-                                shutil.rmtree(d_item) # Remove existing target dir to avoid merge issues with move
-                            shutil.move(s_item, d_item)
-                        else:
-                            shutil.move(s_item, d_item)
-                    # Remove the now-empty source directory
-                    if not os.listdir(src_path): # Check if it's actually empty
-                         os.rmdir(src_path)
-                    print(f"Moved contents of {src_dir_name} and removed source directory.")
-
-                except Exception as e:
-                    print(f"Could not move {src_path} to {target_path_in_public}. It might already exist or there was an error: {e}")
-                    print(f"Skipping move for {src_dir_name}. Please check manually.")
-            else:
-                # Target does not exist, so just move the whole directory
-                try:
-                    shutil.move(src_path, target_path_in_public)
-                    print(f"Moved {src_path} to {target_path_in_public}")
-                except Exception as e:
-                    print(f"Error moving {src_path} to {target_path_in_public}: {e}")
-        else:
-            print(f"Source directory not found, skipping: {src_path}")
-
-    # 3. Update paths in index.html
-    if os.path.exists(index_html_path):
-        try:
-            with open(index_html_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-
-            updated_content = content
-
-            # Regex to find src="..." or href="..."
-            # It looks for src=" or href=" followed by a quote,
-            # then captures the path up to the closing quote.
-            # It specifically targets paths starting with js/, data/, css/, images/
-            # that are NOT http/https URLs.
-            # And it ensures we don't add a slash if one is already there.
-            # It also avoids re-prepending "/" if it's already done.
-
-            def path_replacer(match):
-                attr = match.group(1) # src or href
-                quote = match.group(2) # " or '
-                path = match.group(3)  # the actual path
-
-                # Check if path starts with one of our target directories
-                # and doesn't already start with '/' or 'http'
-                is_target_path = False
-                for prefix in directories_to_move.keys():
-                    if path.startswith(prefix + "/"):
-                        is_target_path = True
-                        break
-                
-                if is_target_path and not path.startswith('/') and not path.startswith(('http://', 'https://')):
-                    new_path = "/" + path
-                    print(f"  Updating path: '{path}' to '{new_path}'")
-                    return f'{attr}={quote}{new_path}{quote}'
-                else:
-                    # No change needed for this path
-                    return match.group(0)
-
-
-            # Update script src paths (excluding the main Vite entry point if it's specific)
-            # This regex tries to be more specific to avoid modifying the Vite entry point `src="js/app.js"`
-            # if it should remain relative for Vite's processing.
-            # We want to change <script src="js/utils/helpers.js"> to <script src="/js/utils/helpers.js">
-
-            # More robust: update only for directories we moved
-            path_patterns_to_update = [
-                r'(src|href)=(["\'])((?:js/utils/|js/services/|js/core/|js/sessions/|js/ui/|data/|css/|images/)[^"\']+)\2'
-            ]
-
-            for pattern in path_patterns_to_update:
-                 updated_content = re.sub(pattern, path_replacer, updated_content)
-
-
-            # Specifically for the main Vite module entry point:
-            # If your Vite entry is <script type="module" src="js/app.js">,
-            # it should become <script type="module" src="./js/app.js"> for Vite to resolve it as a source file.
-            # Or, if your index.html is in the root alongside vite.config.js, it might be fine as is.
-            # This script assumes that if it's `js/app.js`, it's the Vite entry.
-            # Be careful with this part, verify it after running.
-            # For now, the generic replacer above should handle most cases by adding a leading '/'.
-            # The Vite entry point should be handled by Vite itself. The script tags we are modifying
-            # are for *assets that will be in the public folder*.
-
-            # If your main app.js is <script type="module" src="js/app.js"> and your index.html is in the root,
-            # Vite handles this. We are only concerned with the *other* script tags.
-
-            if updated_content != content:
-                with open(index_html_path, 'w', encoding='utf-8') as f:
-                    f.write(updated_content)
-                print(f"Updated paths in {index_html_path}")
-            else:
-                print(f"No path changes needed in {index_html_path} based on current rules.")
+    # 2. Move specified directories into public, through a journal so an interrupted
+    #    run resumes where it stopped (and can be rolled back with --rollback)
+    with phase("move directories"):
+        if not run_journaled_migration(project_root, directories_to_move):
+            print("Migration stopped before updating any HTML. Re-run to resume, or use --rollback.")
+            return False
 
-        except Exception as e:
-            print(f"Error processing {index_html_path}: {e}")
-    else:
-        print(f"File not found, skipping update: {index_html_path}")
+    # 3. Update paths in every site page (index.html, app.html, landing/, y/ ...)
+    # Paths into the moved directories get a leading "/" so they resolve from the public root.
+    # The Vite entry point (js/app.js) is deliberately not in MIGRATED_PATH_PREFIXES: Vite resolves
+    # it as a source file itself. We are only concerned with *assets that will be in the public folder*.
+    with phase("rewrite pages"):
+        pages = find_html_pages(project_root)
+        changed_pages = rewrite_html_files(pages, project_root, prefix_migrated_path)
+        add_counts(files=len(pages), files_changed=len(changed_pages))
+    for page_path in changed_pages:
+        print(f"Updated paths in {page_path}")
+    print(f"Checked {len(pages)} pages, {len(changed_pages)} needed path changes.")
 
     print("\nMigration process complete.")
     print("Please review the changes, especially in index.html and the public/ directory.")
@@ -156,11 +94,381 @@ def migrate_assets_to_public(project_root):
     print("  git add .")
     print("  git commit -m \"Refactor static assets into public directory for Vite build\"")
     print("  git push origin main")
+    return True
+
+# --- Journaled moves ---
+# The migration is planned up front as a list of steps. Each step is a short sequence of renames
+# that touches paths no other step touches, so steps run in parallel. A target that already exists
+# is never deleted: it is first moved into MIGRATION_TRASH_DIR, which is what makes rollback possible.
+# The journal is JSON Lines: a "plan" record, then an "op" record after every rename and a "done" record
+# per finished step, then "complete". Recording each rename (not just each step) matters for steps that
+# first set a target aside and then move the source in: a rerun must know which of the two happened.
+
+def plan_migration(project_root, directories_to_move):
+    """
+    Computes every move needed to migrate directories_to_move into public/ without touching the disk.
+
+    Returns:
+        list: Steps; each is {"id", "ops": [[kind, src, dst], ...]} with kind "move" or "rmdir"
+              and paths relative to project_root. rmdir steps come after all the moves they depend on.
+    """
+    trash_root = os.path.join(MIGRATION_TRASH_DIR, datetime.datetime.now().strftime("%Y%m%d_%H%M%S"))
+    move_steps, rmdir_steps = [], []
+    for src_dir_name, target_dir_name_in_public in directories_to_move.items():
+        src_path = os.path.join(project_root, src_dir_name)
+        target_rel = os.path.join("public", target_dir_name_in_public)
+        if not os.path.exists(src_path):
+            print(f"Source directory not found, skipping: {src_path}")
+            continue
+        if not os.path.exists(os.path.join(project_root, target_rel)):
+            # Target does not exist, so the whole directory moves in one rename
+            move_steps.append([["move", src_dir_name, target_rel]])
+            continue
+        # Target exists: move item by item, setting aside anything we would overwrite
+        for item_name in sorted(os.listdir(src_path)):
+            s_item = os.path.join(src_dir_name, item_name)
+            d_item = os.path.join(target_rel, item_name)
+            ops = []
+            if os.path.lexists(os.path.join(project_root, d_item)):
+                ops.append(["move", d_item, os.path.join(trash_root, d_item)])
+            ops.append(["move", s_item, d_item])
+            move_steps.append(ops)
+        rmdir_steps.append([["rmdir", src_dir_name, None]])
+    return [{"id": i, "ops": ops} for i, ops in enumerate(move_steps + rmdir_steps)]
+
+def _rename(project_root, src_rel, dst_rel):
+    src = os.path.join(project_root, src_rel)
+    dst = os.path.join(project_root, dst_rel)
+    if os.path.lexists(dst):
+        # os.rename silently replaces files; the migration must never destroy anything
+        raise FileExistsError(errno.EEXIST, "Refusing to overwrite", dst)
+    os.makedirs(os.path.dirname(dst), exist_ok=True)
+    try:
+        os.rename(src, dst) # Same filesystem: a cheap metadata-only operation
+    except OSError as e:
+        if e.errno != errno.EXDEV:
+            raise
+        shutil.move(src, dst) # Different filesystem: fall back to copy + delete
+
+def apply_step(project_root, step, ops_done=(), on_op=None):
+    """
+    Runs one step's operations, skipping those already applied before a crash.
+
+    Args:
+        ops_done: Indexes of operations the journal records as applied.
+        on_op (callable): Called with the index of each operation right after it is applied.
+    """
+    for index, (kind, src_rel, dst_rel) in enumerate(step["ops"]):
+        if index in ops_done:
+            continue
+        src = os.path.join(project_root, src_rel)
+        if kind == "rmdir":
+            if os.path.isdir(src) and not os.listdir(src):
+                os.rmdir(src)
+        elif not os.path.lexists(src) and os.path.lexists(os.path.join(project_root, dst_rel)):
+            pass # Renamed by an interrupted run just before it could journal the rename
+        else:
+            _rename(project_root, src_rel, dst_rel)
+        if on_op:
+            on_op(index)
+
+def revert_step(project_root, step):
+    """Undoes one step's operations in reverse order."""
+    for kind, src_rel, dst_rel in reversed(step["ops"]):
+        src = os.path.join(project_root, src_rel)
+        if kind == "rmdir":
+            os.makedirs(src, exist_ok=True)
+        elif os.path.lexists(os.path.join(project_root, dst_rel)) and not os.path.lexists(src):
+            _rename(project_root, dst_rel, src_rel)
+
+def read_journal(journal_path):
+    """
+    Returns (steps, done_step_ids, ops_done, complete) from a journal file, where ops_done is
+    {step id: set of applied op indexes}, or (None, set(), {}, False) if there is no journal.
+    """
+    if not os.path.exists(journal_path):
+        return None, set(), {}, False
+    steps, done, ops_done, complete = None, set(), {}, False
+    with open(journal_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                break # A torn last line from a crash; everything before it is valid
+            if record["event"] == "plan":
+                steps = record["steps"]
+            elif record["event"] == "op":
+                ops_done.setdefault(record["step"], set()).add(record["op"])
+            elif record["event"] == "done":
+                done.add(record["step"])
+            elif record["event"] == "complete":
+                complete = True
+    return steps, done, ops_done, complete
+
+def run_journaled_migration(project_root, directories_to_move, max_workers=MIGRATION_WORKERS):
+    """
+    Plans (or resumes) the move set and executes it, journaling each finished step.
+
+    Returns:
+        bool: True if every step completed.
+    """
+    journal_path = os.path.join(project_root, MIGRATION_JOURNAL_NAME)
+    steps, done, ops_done, complete = read_journal(journal_path)
+    if steps is not None and not complete:
+        print(f"Resuming interrupted migration: {len(done)}/{len(steps)} steps already done.")
+        journal = open(journal_path, 'a', encoding='utf-8')
+    else:
+        # A finished migration's trash is only needed until the next migration starts
+        if complete and os.path.isdir(os.path.join(project_root, MIGRATION_TRASH_DIR)):
+            shutil.rmtree(os.path.join(project_root, MIGRATION_TRASH_DIR))
+        steps, done, ops_done = plan_migration(project_root, directories_to_move), set(), {}
+        print(f"Planned {len(steps)} migration steps.")
+        journal = open(journal_path, 'w', encoding='utf-8')
+        journal.write(json.dumps({"event": "plan", "steps": steps}) + "\n")
+        journal.flush()
+
+    lock = threading.Lock()
+    failures = []
+
+    def record(event):
+        with lock:
+            journal.write(json.dumps(event) + "\n")
+            journal.flush()
+
+    def run(step):
+        try:
+            apply_step(project_root, step, ops_done.get(step["id"], set()),
+                       on_op=lambda index: record({"event": "op", "step": step["id"], "op": index}))
+        except Exception as e:
+            failures.append((step, e))
+            return
+        record({"event": "done", "step": step["id"]})
+
+    with journal:
+        pending = [step for step in steps if step["id"] not in done]
+        move_steps = [step for step in pending if step["ops"][0][0] != "rmdir"]
+        rmdir_steps = [step for step in pending if step["ops"][0][0] == "rmdir"]
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            list(executor.map(run, move_steps))
+        if not failures:
+            for step in rmdir_steps:
+                run(step)
+        for step, e in failures:
+            print(f"Error in migration step {step['id']} {step['ops']}: {e}")
+        if failures:
+            return False
+        journal.write(json.dumps({"event": "complete"}) + "\n")
+    for step in pending:
+        for kind, src_rel, dst_rel in step["ops"]:
+            if kind == "move" and not dst_rel.startswith(MIGRATION_TRASH_DIR):
+                print(f"Moved {src_rel} to {dst_rel}")
+    add_counts(steps=len(pending), steps_resumed=len(steps) - len(pending))
+    print(f"Migration moves complete ({len(pending)} steps run, {len(steps) - len(pending)} already done).")
+    return True
+
+def rollback_migration(project_root):
+    """
+    Reverts every planned step in reverse order, restoring any targets that were set aside.
+
+    All steps are reverted, not just those the journal shows as started: a crash between a rename
+    and its "op" record leaves a step that ran but was never journaled. revert_step only moves a
+    file back when it is at the destination and missing at the source, so steps that never ran are no-ops.
+    """
+    journal_path = os.path.join(project_root, MIGRATION_JOURNAL_NAME)
+    steps, done, ops_done, _ = read_journal(journal_path)
+    if steps is None:
+        print(f"No migration journal found at {journal_path}; nothing to roll back.")
+        return
+    for step in sorted(steps, key=lambda s: s["id"], reverse=True):
+        revert_step(project_root, step)
+    os.remove(journal_path)
+    # Everything set aside has been moved back; drop the now-empty trash directories
+    trash_path = os.path.join(project_root, MIGRATION_TRASH_DIR)
+    for dir_path, _, _ in sorted(os.walk(trash_path), key=lambda entry: len(entry[0]), reverse=True):
+        if not os.listdir(dir_path):
+            os.rmdir(dir_path)
+    print(f"Rolled back {len(steps)} migration steps. HTML path changes are not reverted; use git for those.")
+
+
+# --- Asset fingerprinting ---
+# Every file under public/css, public/images and public/sounds gets a copy named
+# "<name>.<hash><ext>" under public/static/ (a real copy, never a hard link, so editing an original
+# can't change what a fingerprinted URL serves; Firebase Hosting uploads identical content only once). HTML pages are rewritten to the fingerprinted URLs,
+# which never change content and so can be served with a year-long immutable Cache-Control
+# (see the /static/** headers in firebase.json and netlify.toml). The originals stay in place
+# because TS sources and seeded Firestore documents still reference them by name.
+
+FINGERPRINTED_URL_PATTERN = re.compile(
+    r"^/%s/(.+)\.[0-9a-f]{%d}(\.[^./]+)?$" % (FINGERPRINT_OUTPUT_DIR, FINGERPRINT_HASH_LENGTH))
+URL_SUFFIX_PATTERN = re.compile(r"([^?#]*)(.*)", re.DOTALL) # path, then any ?query/#fragment
+
+def fingerprint_path(rel_path, content):
+    """Returns rel_path with a content hash inserted before the extension ("a/b.css" -> "a/b.1a2b3c4d.css")."""
+    digest = hashlib.sha256(content).hexdigest()[:FINGERPRINT_HASH_LENGTH]
+    root, ext = posixpath.splitext(rel_path)
+    return f"{root}.{digest}{ext}"
+
+def resolve_asset_reference(value, base_url_dir, manifest):
+    """
+    Maps a src/href/url() value to its fingerprinted URL, or returns None if it isn't a fingerprinted asset.
+
+    Relative values are resolved against base_url_dir (the referencing file's URL directory). Values that
+    already point at an older fingerprinted copy are mapped back to their original first, so re-running
+    after an asset changes updates the reference.
+    """
+    if not value or value.startswith(("http://", "https://", "//", "data:", "#", "mailto:", "${")):
+        return None
+    path, suffix = URL_SUFFIX_PATTERN.match(value).groups()
+    url = path if path.startswith("/") else posixpath.normpath(posixpath.join(base_url_dir, path))
+    old = FINGERPRINTED_URL_PATTERN.match(url)
+    if old:
+        url = "/" + old.group(1) + (old.group(2) or "")
+    fingerprinted = manifest.get(url)
+    return fingerprinted + suffix if fingerprinted else None
+
+def copy_fingerprinted(src_path, dst_path):
+    """
+    Copies an asset to its fingerprinted path through a temp file. Never a hard link: an in-place
+    edit of the original would silently change content served as immutable under the old hash.
+    """
+    tmp_path = f"{dst_path}.tmp"
+    shutil.copyfile(src_path, tmp_path)
+    os.replace(tmp_path, dst_path)
+
+def plan_fingerprints(project_root):
+    """
+    Hashes the public/ assets and works out their fingerprinted names without writing anything.
+
+    Non-CSS files are fingerprinted first so url() references inside CSS can be rewritten to
+    fingerprinted URLs before the CSS itself is hashed.
+
+    Returns:
+        tuple: (manifest, copies, hashed_bytes) - manifest maps original URL ("/css/layout/shell.css")
+               to fingerprinted URL; copies maps each fingerprinted path (relative to the output dir)
+               to the source file path (str) or, for rewritten CSS, the bytes to write.
+    """
+    public_dir_path = os.path.join(project_root, "public")
+    manifest = {}
+    copies = {}
+    css_files = []
+    hashed_bytes = 0
+
+    for dir_name in FINGERPRINT_DIRS:
+        for dir_path, _, file_names in os.walk(os.path.join(public_dir_path, dir_name)):
+            for name in sorted(file_names):
+                src_path = os.path.join(dir_path, name)
+                rel_path = os.path.relpath(src_path, public_dir_path).replace(os.sep, "/")
+                if name.lower().endswith(".css"):
+                    css_files.append(rel_path)
+                    continue
+                with open(src_path, 'rb') as f:
+                    content = f.read()
+                hashed_bytes += len(content)
+                fingerprinted = fingerprint_path(rel_path, content)
+                copies[fingerprinted] = src_path
+                manifest["/" + rel_path] = f"/{FINGERPRINT_OUTPUT_DIR}/{fingerprinted}"
+
+    for rel_path in css_files:
+        with open(os.path.join(public_dir_path, rel_path), 'r', encoding='utf-8') as f:
+            css = f.read()
+        css = rewrite_css_urls(css, partial(resolve_asset_reference, manifest=manifest), posixpath.dirname("/" + rel_path))
+        content = css.encode('utf-8')
+        hashed_bytes += len(content)
+        fingerprinted = fingerprint_path(rel_path, content)
+        copies[fingerprinted] = content
+        manifest["/" + rel_path] = f"/{FINGERPRINT_OUTPUT_DIR}/{fingerprinted}"
+    return manifest, copies, hashed_bytes
+
+def fingerprint_public_assets(project_root):
+    """
+    Creates hash-suffixed copies of the public/ assets (see plan_fingerprints) and writes the
+    asset manifest. Stale copies from earlier runs are removed.
+
+    Returns:
+        dict: The manifest, original URL ("/css/layout/shell.css") -> fingerprinted URL.
+    """
+    output_root = os.path.join(project_root, "public", FINGERPRINT_OUTPUT_DIR)
+    manifest, copies, hashed_bytes = plan_fingerprints(project_root)
+    for fingerprinted, source in copies.items():
+        dst_path = os.path.join(output_root, fingerprinted)
+        if os.path.exists(dst_path) and (isinstance(source, bytes) or not os.path.samefile(source, dst_path)):
+            continue # Already there; hard links left by older runs are replaced with copies below
+        os.makedirs(os.path.dirname(dst_path), exist_ok=True)
+        if isinstance(source, bytes):
+            with open(dst_path, 'wb') as f:
+                f.write(source)
+        else:
+            copy_fingerprinted(source, dst_path)
+
+    # Remove copies that no longer correspond to any current asset
+    current = {url[len(FINGERPRINT_OUTPUT_DIR) + 2:] for url in manifest.values()}
+    removed = 0
+    for dir_path, _, file_names in os.walk(output_root, topdown=False):
+        for name in file_names:
+            rel_path = os.path.relpath(os.path.join(dir_path, name), output_root).replace(os.sep, "/")
+            if rel_path not in current:
+                os.remove(os.path.join(dir_path, name))
+                removed += 1
+        if dir_path != output_root and not os.listdir(dir_path):
+            os.rmdir(dir_path)
+
+    manifest_path = os.path.join(project_root, ASSET_MANIFEST_NAME)
+    with open(manifest_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    add_counts(files=len(manifest), bytes=hashed_bytes, stale_removed=removed)
+    print(f"Fingerprinted {len(manifest)} assets into {output_root} ({removed} stale copies removed).")
+    print(f"Wrote asset manifest: {manifest_path}")
+    return manifest
+
+def find_html_pages(project_root):
+    """Returns the site's HTML pages matched by HTML_PAGE_GLOBS."""
+    pages = []
+    for pattern in HTML_PAGE_GLOBS:
+        pages.extend(sorted(glob.glob(os.path.join(project_root, pattern))))
+    return pages
+
+def rewrite_html_references(project_root, manifest):
+    """Rewrites asset references in every site page to the fingerprinted URLs from the manifest."""
+    resolve = partial(resolve_asset_reference, manifest=manifest)
+    for page_path in rewrite_html_files(find_html_pages(project_root), project_root, resolve):
+        print(f"Rewrote asset references in {page_path}")
+
+def benchmark_html_rewrite(project_root, repeat=50):
+    """
+    Times the original migration's path-prefix regex rewrite against html_rewriter on a large page
+    built from our pages. The manifest is planned in memory; nothing in the project is written.
+    """
+    manifest, _, _ = plan_fingerprints(project_root)
+    legacy_patterns = [
+        r'(src|href)=(["\'])((?:js/utils/|js/services/|js/core/|js/sessions/|js/ui/|data/|css/|images/)[^"\']+)\2',
+    ]
+    benchmark_rewriters(find_html_pages(project_root), partial(resolve_asset_reference, manifest=manifest),
+                        legacy_patterns, repeat=repeat)
+
+def fingerprint_assets(project_root):
+    """Fingerprinting stage: hash-suffixed asset copies, manifest, and HTML reference rewrite."""
+    with phase("fingerprint assets"):
+        manifest = fingerprint_public_assets(project_root)
+    with phase("rewrite asset references"):
+        rewrite_html_references(project_root, manifest)
+    print("Fingerprinting complete. Fingerprinted URLs live under "
+          f"/{FINGERPRINT_OUTPUT_DIR}/ and are served with immutable cache headers.")
 
 if __name__ == "__main__":
     # Assuming the script is in the project root
     project_directory = os.path.dirname(os.path.abspath(__file__))
-    # Or, if you run it from elsewhere, set it manually:
-    # project_directory = "D:\\polyglot_connect"
+    # Or pass the project root explicitly: python migrate_to_public.py --root=/path/to/polyglot_connect
+    project_directory = next((os.path.abspath(arg.split("=", 1)[1]) for arg in sys.argv if arg.startswith("--root=")),
+                             project_directory)
+
+    if "--benchmark" in sys.argv:
+        benchmark_html_rewrite(project_directory)
+        sys.exit(0)
+    if "--rollback" in sys.argv:
+        rollback_migration(project_directory)
+        sys.exit(0)
 
-    migrate_assets_to_public(project_directory)
\ No newline at end of file
+    with instrumented_run("migrate_to_public"):
+        migrate_assets_to_public(project_directory)
+        if "--fingerprint" in sys.argv:
+            fingerprint_assets(project_directory)
\ No newline at end of file
@@ -0,0 +1,300 @@
+import argparse
+import json
+import os
+import sys
+
+from ops_metrics import instrumented_run
+from task_runner import TASK_WORKERS, Task, run_tasks
+
+# One non-interactive entry point for the ops scripts, so they can be chained in CI:
+#
+#   python ops.py backup [--source DIR] [--dest DIR] [--mode copy|snapshot|archive]
+#   python ops.py migrate [--fingerprint] [--rollback]
+#   python ops.py scaffold [--target DIR] [--dry-run] [--overwrite] [--clean]
+#   python ops.py seed [--sync|--listings] [--dry-run] [--prune] [--key FILE] [--groups FILE]
+#   python ops.py analyze [ROOT]
+#   python ops.py run [TASK ...] [--force] [--jobs N] [--list]
+#
+# Settings come from ops.json next to this script (or --config / OPS_CONFIG); flags override
+# them. Relative paths in the config are relative to the project root, which is also the working
+# directory every command runs in.
+#
+# `run` brings build tasks (data shards, Firestore indexes, image variants, bundle analysis, ...)
+# up to date with task_runner: independent tasks run concurrently and tasks whose inputs are
+# unchanged since their last successful run are skipped.
+#
+# The script modules are imported inside the command that needs them, so firebase_admin, Pillow
+# and friends are only loaded by the commands that use them.
+
+DEFAULT_CONFIG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "ops.json")
+
+DEFAULT_CONFIG = {
+    "project_root": ".",
+    "jobs": TASK_WORKERS,
+    "task_cache": "./.cache/ops_tasks.json",
+    "pipeline": ["shards", "indexes", "images", "analyze"], # Tasks `run` brings up to date when none are named
+    "backup": {"source": ".", "dest": "..", "mode": "copy"},
+    "migrate": {"fingerprint": False},
+    "scaffold": {"target": ".", "overwrite": False, "clean_reset": False},
+    "seed": {"mode": "populate", "service_account_key": None, "groups_data": "./groups_data.json"},
+    "analyze": {"root": "."},
+}
+
+
+def load_config(path=None):
+    """
+    Reads the JSON config and merges it over DEFAULT_CONFIG (one level deep per section).
+
+    Returns:
+        dict: The merged config, with "config_dir" set to the directory of the file that was read.
+    """
+    path = path or os.environ.get("OPS_CONFIG") or DEFAULT_CONFIG_PATH
+    config = {key: dict(value) if isinstance(value, dict) else value for key, value in DEFAULT_CONFIG.items()}
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            overrides = json.load(f)
+    except FileNotFoundError:
+        if path != DEFAULT_CONFIG_PATH:
+            raise
+        overrides = {}
+    for key, value in overrides.items():
+        if isinstance(value, dict) and isinstance(config.get(key), dict):
+            config[key].update(value)
+        else:
+            config[key] = value
+    config["config_dir"] = os.path.dirname(os.path.abspath(path))
+    return config
+
+
+def pick(flag_value, config_value):
+    """A flag overrides the config when it was given on the command line."""
+    return config_value if flag_value is None else flag_value
+
+
+# --- Commands (each returns True on success) ---
+
+def cmd_backup(args, config):
+    from backup_script import backup_project
+
+    settings = config["backup"]
+    source = os.path.abspath(pick(args.source, settings["source"]))
+    dest = os.path.abspath(pick(args.dest, settings["dest"]))
+    mode = pick(args.mode, settings["mode"])
+    print(f"Backing up {source} ({mode}) into {dest}")
+    return backup_project(source, dest, mode) is not None
+
+
+def cmd_migrate(args, config):
+    import migrate_to_public
+
+    project_root = os.getcwd()
+    if args.rollback:
+        migrate_to_public.rollback_migration(project_root)
+        return True
+    if not migrate_to_public.migrate_assets_to_public(project_root):
+        return False
+    if args.fingerprint or config["migrate"]["fingerprint"]:
+        migrate_to_public.fingerprint_assets(project_root)
+    return True
+
+
+def cmd_scaffold(args, config):
+    from create_project_structure import create_dir_structure
+
+    settings = config["scaffold"]
+    create_dir_structure(pick(args.target, settings["target"]), clean_reset=args.clean or settings["clean_reset"],
+                         overwrite=args.overwrite or settings["overwrite"], dry_run=args.dry_run)
+    return True
+
+
+def seed_key(settings, key=None):
+    """
+    The service account key the seed uses: --key, else $GOOGLE_APPLICATION_CREDENTIALS, else the
+    config's service_account_key. None leaves populate_firestore_groups' own default in place.
+    """
+    return key or os.environ.get("GOOGLE_APPLICATION_CREDENTIALS") or settings["service_account_key"]
+
+
+def configure_seed(settings, key=None, groups=None):
+    """Points populate_firestore_groups at the key (see seed_key) and groups file. Returns the module."""
+    import populate_firestore_groups
+
+    key = seed_key(settings, key)
+    if key:
+        populate_firestore_groups.SERVICE_ACCOUNT_KEY_PATH = key
+    populate_firestore_groups.GROUPS_DATA_JSON_PATH = pick(groups, settings["groups_data"])
+    return populate_firestore_groups
+
+
+def seed_groups(module, mode, dry_run=False, prune=False):
+    db = module.initialize_firebase()
+    if not db:
+        return False
+    if mode == "listings":
+        return module.sync_group_listings(db, dry_run=dry_run) is not None
+    if mode == "sync":
+        return module.sync_groups(db, dry_run=dry_run, prune=prune) is not None
+    stats = module.populate_groups(db)
+    return stats is not None and not stats["failed"]
+
+
+def cmd_seed(args, config):
+    settings = config["seed"]
+    module = configure_seed(settings, args.key, args.groups)
+    mode = "listings" if args.listings else "sync" if args.sync else settings["mode"]
+    return seed_groups(module, mode, dry_run=args.dry_run, prune=args.prune)
+
+
+def cmd_analyze(args, config):
+    from count_js import analyze_project
+
+    analyze_project(os.path.abspath(pick(args.root, config["analyze"]["root"])))
+    return True
+
+
+# --- Build tasks for `run` ---
+
+def build_tasks(config):
+    """Returns {name: Task} for every task `run` knows about."""
+
+    def shards():
+        from shard_data import generate_shards
+        return generate_shards()
+
+    def indexes():
+        from firestore_indexes import generate_indexes
+        return generate_indexes()
+
+    def images():
+        from optimize_images import optimize_images
+        return optimize_images() is not None
+
+    def analyze():
+        from count_js import analyze_project
+        analyze_project(os.path.abspath(config["analyze"]["root"]))
+        return True
+
+    def fingerprint():
+        from migrate_to_public import fingerprint_assets
+        fingerprint_assets(os.getcwd())
+        return True
+
+    def audit():
+        from asset_audit import audit_assets
+        return audit_assets() is not None
+
+    def seed():
+        settings = config["seed"]
+        return seed_groups(configure_seed(settings), settings["mode"])
+
+    from asset_audit import MANIFEST_PATHS, REFERENCE_GLOBS
+
+    pages = ["*.html", "landing/*.html", "y/*.html"]
+    task_list = [
+        Task("shards", shards, description="Per-language data shards and groups_data.json from src/data",
+             inputs=["src/data/personas.ts", "src/data/groups.ts", "shard_data.py", "seed_loader.py"],
+             outputs=["public/data/shards/index.json", "groups_data.json"]),
+        Task("indexes", indexes, deps=["shards"], description="firestore.indexes.json from the declared query patterns",
+             inputs=["firestore_indexes.py", "groups_data.json"], outputs=["firestore.indexes.json"]),
+        Task("images", images, description="WebP/AVIF variants of public/images",
+             inputs=["public/images/**", "optimize_images.py"], outputs=["image_manifest.json"]),
+        Task("analyze", analyze, description="Bundle and import-graph report",
+             inputs=["src/**", "landing/**", "dist/**", "count_js.py"] + pages),
+        Task("fingerprint", fingerprint, description="Hash-suffixed asset copies and rewritten page references",
+             inputs=["public/css/**", "public/images/**", "public/sounds/**", "migrate_to_public.py", "html_rewriter.py"] + pages,
+             outputs=["asset_manifest.json"] + pages), # The pages are rewritten in place
+        Task("audit", audit, deps=["shards"], description="Duplicate and unreferenced files under public/",
+             inputs=["public/**", "asset_audit.py"] + REFERENCE_GLOBS + MANIFEST_PATHS,
+             after=["images", "fingerprint"]), # They write and prune public/optimized and public/static
+        Task("seed", seed, deps=["shards"], description="Sync groups_data.json into Firestore",
+             inputs=["groups_data.json", "populate_firestore_groups.py", "seed_loader.py", "asset_index.py",
+                     "src/data/personas.ts"],
+             params={"mode": config["seed"]["mode"], "emulator": os.environ.get("FIRESTORE_EMULATOR_HOST", ""),
+                     "key": seed_key(config["seed"])}),
+    ]
+    return {task.name: task for task in task_list}
+
+
+def cmd_run(args, config):
+    tasks = build_tasks(config)
+    if args.list:
+        for task in tasks.values():
+            deps = f" (after {', '.join(task.deps)})" if task.deps else ""
+            if task.after:
+                deps += f" (after {', '.join(task.after)} if they run too)"
+            print(f"  {task.name:<12} {task.description}{deps}")
+        return True
+    targets = args.tasks or config["pipeline"]
+    try:
+        results = run_tasks(tasks, targets, max_workers=pick(args.jobs, config["jobs"]), force=args.force,
+                            cache_path=config["task_cache"])
+    except (KeyError, ValueError) as e:
+        print(f"Error: {e.args[0]}")
+        return False
+    return all(state in ("ran", "skipped") for state in results.values())
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="ops.py", description="Polyglot Connect ops commands.")
+    parser.add_argument("--config", help="JSON config file (default: ops.json next to this script, or $OPS_CONFIG)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    p = commands.add_parser("backup", help="Back up the project (copy, snapshot or archive)")
+    p.add_argument("--source")
+    p.add_argument("--dest", help="Directory the backup is created in")
+    p.add_argument("--mode", choices=["copy", "snapshot", "archive"])
+    p.set_defaults(handler=cmd_backup)
+
+    p = commands.add_parser("migrate", help="Move assets into public/ and rewrite page references")
+    p.add_argument("--fingerprint", action="store_true", help="Also fingerprint public assets")
+    p.add_argument("--rollback", action="store_true", help="Undo a (partial) migration from its journal")
+    p.set_defaults(handler=cmd_migrate)
+
+    p = commands.add_parser("scaffold", help="Create/update the project structure from project_template.json")
+    p.add_argument("--target")
+    p.add_argument("--dry-run", action="store_true")
+    p.add_argument("--overwrite", action="store_true", help="Replace files that differ from the template")
+    p.add_argument("--clean", action="store_true", help="Remove files in the template's folders it doesn't define")
+    p.set_defaults(handler=cmd_scaffold)
+
+    p = commands.add_parser("seed", help="Write groups_data.json to Firestore")
+    group = p.add_mutually_exclusive_group()
+    group.add_argument("--sync", action="store_true", help="Only write changed fields")
+    group.add_argument("--listings", action="store_true", help="Only rebuild the group listing documents")
+    p.add_argument("--dry-run", action="store_true")
+    p.add_argument("--prune", action="store_true", help="With --sync, delete groups removed from the file")
+    p.add_argument("--key", help="Service account key (default: $GOOGLE_APPLICATION_CREDENTIALS, then the config; "
+                                 "not needed with FIRESTORE_EMULATOR_HOST)")
+    p.add_argument("--groups", help="Group definitions file")
+    p.set_defaults(handler=cmd_seed)
+
+    p = commands.add_parser("analyze", help="Bundle size and import graph report")
+    p.add_argument("root", nargs="?")
+    p.set_defaults(handler=cmd_analyze)
+
+    p = commands.add_parser("run", help="Bring build tasks up to date (default: the configured pipeline)")
+    p.add_argument("tasks", nargs="*")
+    p.add_argument("--force", action="store_true", help="Run tasks even if their inputs are unchanged")
+    p.add_argument("--jobs", type=int, help="Tasks run concurrently (1: in the main thread, e.g. to profile them)")
+    p.add_argument("--list", action="store_true", help="List the available tasks")
+    p.set_defaults(handler=cmd_run)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    try:
+        config = load_config(args.config)
+    except (OSError, ValueError) as e:
+        print(f"Error: Could not read config: {e}")
+        return 2
+    os.chdir(os.path.normpath(os.path.join(config["config_dir"], config["project_root"])))
+    with instrumented_run(f"ops_{args.command}") as run:
+        ok = args.handler(args, config)
+        if not ok:
+            run.status = "failed"
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,263 @@
+import cProfile
+import datetime
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# Shared timing and metrics for the ops scripts (backup, migration, seeding, scaffolding).
+#
+# A script wraps its work in instrumented_run("<script>") and its steps in phase("<step>"). Code
+# inside a phase reports what it processed with add_counts(files=..., bytes=...), and Firestore
+# writers report each round trip with record_firestore_op(). When the run ends, a per-phase
+# summary is printed and, if configured, the metrics are written out as:
+#   - JSON lines: one object per run appended to OPS_METRICS_PATH (history to diff over time), or
+#   - Prometheus textfile: OPS_METRICS_PATH/<script>.prom, replaced atomically, for node_exporter's
+#     textfile collector.
+# With OPS_PROFILE_DIR set, the whole run is also profiled with cProfile and the stats are dumped
+# there (inspect with `python -m pstats <file>`). cProfile only sees the thread that started the run:
+# work on worker threads (task_runner's pool, thread-pooled Firestore writes) is timed by its phases
+# but missing from the profile. To profile `ops.py run`, use `--jobs 1`, which runs the tasks in
+# the main thread.
+#
+# Phases nest per thread: each thread has its own stack of open phases, and a phase opened on a
+# thread with none open (e.g. a task on a worker thread) has the run itself as its parent.
+#
+# phase() and the record functions are no-ops outside a run, so instrumented helpers can be
+# called from anywhere.
+
+# --- CONFIGURATION (environment variables override) ---
+METRICS_FORMAT = os.environ.get("OPS_METRICS_FORMAT", "jsonl") # "jsonl" or "prometheus"
+METRICS_PATH = os.environ.get("OPS_METRICS_PATH", "") # jsonl: file to append to; prometheus: textfile directory. Empty = off
+PROFILE_DIR = os.environ.get("OPS_PROFILE_DIR", "") # Empty = no profiling
+# --- END CONFIGURATION ---
+
+METRIC_PREFIX = "polyglot_ops"
+
+_lock = threading.Lock()
+_run = None
+
+
+def _add_counts(totals, counts):
+    """Adds counts into totals (callers updating a live run hold _lock)."""
+    for key, value in counts.items():
+        totals[key] = totals.get(key, 0) + value
+
+
+class PhaseStats:
+    def __init__(self, name, parent=None):
+        self.name = name
+        self.parent = parent # Name of the enclosing phase on the same thread; None for the run itself
+        self.seconds = 0.0
+        self.counts = {}
+
+    def add(self, **counts):
+        with _lock:
+            _add_counts(self.counts, counts)
+
+
+class RunStats:
+    def __init__(self, script):
+        self.script = script
+        self.started = datetime.datetime.now(datetime.timezone.utc)
+        self.seconds = 0.0
+        self.status = "ok"
+        self.phases = []
+        self.counts = {}
+        self._threads = threading.local()
+        self.firestore = {} # operation -> {"latencies": [...], "docs": n, "errors": n}
+
+    def phase_stack(self):
+        """The calling thread's open phases, innermost last."""
+        stack = getattr(self._threads, "stack", None)
+        if stack is None:
+            stack = self._threads.stack = []
+        return stack
+
+    def to_dict(self):
+        return {
+            "script": self.script,
+            "started": self.started.isoformat(),
+            "seconds": round(self.seconds, 6),
+            "status": self.status,
+            "counts": self.counts,
+            "phases": [{"name": p.name, "parent": p.parent, "seconds": round(p.seconds, 6), **p.counts}
+                       for p in self.phases],
+            "firestore": {op: summarize_latencies(s) for op, s in sorted(self.firestore.items())},
+        }
+
+
+def summarize_latencies(op_stats):
+    latencies = sorted(op_stats["latencies"])
+    pick = lambda q: latencies[min(len(latencies) - 1, int(q * len(latencies)))] if latencies else 0.0
+    return {"count": len(latencies), "docs": op_stats["docs"], "errors": op_stats["errors"],
+            "seconds_total": round(sum(latencies), 6), "p50_ms": round(pick(0.5) * 1000, 2),
+            "p99_ms": round(pick(0.99) * 1000, 2), "max_ms": round(pick(1.0) * 1000, 2)}
+
+
+@contextmanager
+def phase(name):
+    """Times one step of the current run. Yields a PhaseStats; add_counts() inside updates it."""
+    run = _run
+    if run is None:
+        stats = PhaseStats(name)
+    else:
+        stack = run.phase_stack()
+        stats = PhaseStats(name, parent=stack[-1].name if stack else None)
+        stack.append(stats)
+        with _lock:
+            run.phases.append(stats)
+    start = time.perf_counter()
+    try:
+        yield stats
+    finally:
+        stats.seconds = time.perf_counter() - start
+        if run is not None:
+            stack.pop()
+
+
+def add_counts(**counts):
+    """Adds e.g. files=10, bytes=2048 to this thread's innermost open phase (or to the run outside phases)."""
+    run = _run
+    if run is None:
+        return
+    stack = run.phase_stack()
+    with _lock:
+        _add_counts(stack[-1].counts if stack else run.counts, counts)
+
+
+def record_firestore_op(operation, seconds, docs=1, error=None):
+    """Records one Firestore round trip (e.g. a batch commit of `docs` writes)."""
+    run = _run
+    if run is None:
+        return
+    with _lock:
+        op_stats = run.firestore.setdefault(operation, {"latencies": [], "docs": 0, "errors": 0})
+        op_stats["latencies"].append(seconds)
+        op_stats["docs"] += docs
+        if error is not None:
+            op_stats["errors"] += 1
+
+
+def _label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", " ")
+
+
+def merge_phases(phases):
+    """Sums phases that share a name (a series may only appear once in a Prometheus textfile)."""
+    merged = {}
+    for p in phases:
+        total = merged.setdefault(p.name, PhaseStats(p.name))
+        total.seconds += p.seconds
+        _add_counts(total.counts, p.counts)
+    return list(merged.values())
+
+
+def format_prometheus(run):
+    """Renders a finished run in the Prometheus text exposition format."""
+    script = f'script="{_label(run.script)}"'
+    phases = merge_phases(run.phases)
+    lines = [
+        f"# HELP {METRIC_PREFIX}_run_seconds Wall time of the last run.",
+        f"# TYPE {METRIC_PREFIX}_run_seconds gauge",
+        f"{METRIC_PREFIX}_run_seconds{{{script}}} {run.seconds:.6f}",
+        f"# TYPE {METRIC_PREFIX}_run_success gauge",
+        f"{METRIC_PREFIX}_run_success{{{script}}} {1 if run.status == 'ok' else 0}",
+        f"# TYPE {METRIC_PREFIX}_run_timestamp_seconds gauge",
+        f"{METRIC_PREFIX}_run_timestamp_seconds{{{script}}} {run.started.timestamp():.0f}",
+        f"# TYPE {METRIC_PREFIX}_phase_seconds gauge",
+    ]
+    for p in phases:
+        lines.append(f'{METRIC_PREFIX}_phase_seconds{{{script},phase="{_label(p.name)}"}} {p.seconds:.6f}')
+    count_keys = sorted({key for p in phases for key in p.counts} | set(run.counts))
+    for key in count_keys:
+        lines.append(f"# TYPE {METRIC_PREFIX}_{key} gauge")
+        for p in phases:
+            if key in p.counts:
+                lines.append(f'{METRIC_PREFIX}_{key}{{{script},phase="{_label(p.name)}"}} {p.counts[key]}')
+        if key in run.counts:
+            lines.append(f'{METRIC_PREFIX}_{key}{{{script},phase=""}} {run.counts[key]}')
+    if run.firestore:
+        lines.append(f"# TYPE {METRIC_PREFIX}_firestore_latency_seconds summary")
+        for op, op_stats in sorted(run.firestore.items()):
+            summary = summarize_latencies(op_stats)
+            labels = f'{script},op="{_label(op)}"'
+            lines.append(f'{METRIC_PREFIX}_firestore_latency_seconds{{{labels},quantile="0.5"}} {summary["p50_ms"] / 1000:.6f}')
+            lines.append(f'{METRIC_PREFIX}_firestore_latency_seconds{{{labels},quantile="0.99"}} {summary["p99_ms"] / 1000:.6f}')
+            lines.append(f'{METRIC_PREFIX}_firestore_latency_seconds_sum{{{labels}}} {summary["seconds_total"]:.6f}')
+            lines.append(f'{METRIC_PREFIX}_firestore_latency_seconds_count{{{labels}}} {summary["count"]}')
+        lines.append(f"# TYPE {METRIC_PREFIX}_firestore_docs gauge")
+        lines += [f'{METRIC_PREFIX}_firestore_docs{{{script},op="{_label(op)}"}} {s["docs"]}' for op, s in sorted(run.firestore.items())]
+        lines.append(f"# TYPE {METRIC_PREFIX}_firestore_errors gauge")
+        lines += [f'{METRIC_PREFIX}_firestore_errors{{{script},op="{_label(op)}"}} {s["errors"]}' for op, s in sorted(run.firestore.items())]
+    return "\n".join(lines) + "\n"
+
+
+def write_metrics(run, metrics_format=METRICS_FORMAT, metrics_path=METRICS_PATH):
+    """Writes a finished run to the configured sink. Returns the path written, or None if disabled."""
+    if not metrics_path:
+        return None
+    if metrics_format == "prometheus":
+        os.makedirs(metrics_path, exist_ok=True)
+        path = os.path.join(metrics_path, f"{run.script}.prom")
+        tmp_path = f"{path}.tmp" # node_exporter must never see a half-written file
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(format_prometheus(run))
+        os.replace(tmp_path, path)
+        return path
+    os.makedirs(os.path.dirname(os.path.abspath(metrics_path)), exist_ok=True)
+    with open(metrics_path, 'a', encoding='utf-8') as f:
+        f.write(json.dumps(run.to_dict(), sort_keys=True) + "\n")
+    return metrics_path
+
+
+def print_run_summary(run):
+    print(f"\n[{run.script}] {run.status} in {run.seconds:.2f}s")
+    for p in run.phases:
+        counts = ", ".join(f"{key}={value:,}" for key, value in sorted(p.counts.items()))
+        print(f"  {p.name:<32} {p.seconds:>9.3f}s  {counts}")
+    for op, op_stats in sorted(run.firestore.items()):
+        s = summarize_latencies(op_stats)
+        print(f"  firestore {op:<22} {s['count']:>6} ops, {s['docs']:,} docs, {s['errors']} errors, "
+              f"p50 {s['p50_ms']:.0f} ms, p99 {s['p99_ms']:.0f} ms")
+
+
+@contextmanager
+def instrumented_run(script):
+    """
+    Collects metrics for one script run; prints a summary and writes/profiles as configured on exit.
+    Nested calls (a script run from another instrumented script) join the outer run.
+    """
+    global _run
+    if _run is not None:
+        yield _run
+        return
+    run = RunStats(script)
+    profiler = cProfile.Profile() if PROFILE_DIR else None
+    _run = run
+    start = time.perf_counter()
+    if profiler:
+        profiler.enable()
+    try:
+        yield run
+    except BaseException:
+        run.status = "error"
+        raise
+    finally:
+        if profiler:
+            profiler.disable()
+        run.seconds = time.perf_counter() - start
+        _run = None
+        print_run_summary(run)
+        try:
+            path = write_metrics(run)
+            if path:
+                print(f"  metrics written to {path}")
+            if profiler:
+                os.makedirs(PROFILE_DIR, exist_ok=True)
+                profile_path = os.path.join(PROFILE_DIR, f"{script}-{run.started.strftime('%Y%m%d_%H%M%S')}.prof")
+                profiler.dump_stats(profile_path)
+                print(f"  profile written to {profile_path} (python -m pstats {profile_path})")
+        except OSError as e:
+            print(f"Warning: Could not write metrics: {e}")
@@ -0,0 +1,276 @@
+import hashlib
+import json
+import os
+import sys
+import time
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    from PIL import Image, features # pip install Pillow (AVIF output needs Pillow >= 11.3 or pillow-avif-plugin)
+except ImportError:
+    Image = None
+
+try:
+    import pillow_avif # noqa: F401 - Optional: registers an AVIF encoder with Pillow < 11.3
+except ImportError:
+    pass
+
+# --- CONFIGURATION ---
+SOURCE_DIR = './public/images'
+OUTPUT_DIR = './public/optimized' # Variants mirror SOURCE_DIR's layout under OUTPUT_DIR/images
+IMAGE_MANIFEST_PATH = './image_manifest.json' # Consumed by the HTML rewriter
+IMAGE_CACHE_PATH = './.cache/image_cache.json'
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg')
+VARIANT_WIDTHS = (320, 640, 1280) # Widths >= the original are skipped; the original width is always emitted
+OUTPUT_FORMATS = { # Formats this Pillow build can't encode are skipped with a warning
+    "webp": {"quality": 80, "method": 6},
+    "avif": {"quality": 60},
+}
+# --- END CONFIGURATION ---
+
+
+def settings_key(formats):
+    """Part of every cache key, so changing widths/formats/quality (or gaining an encoder) re-encodes everything."""
+    return hashlib.sha256(json.dumps([VARIANT_WIDTHS, formats], sort_keys=True).encode()).hexdigest()[:16]
+
+
+def can_encode(image_format):
+    """True if this Pillow build can write image_format (e.g. "avif")."""
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore") # Pillow versions that predate a feature warn about its name
+        if features.check(image_format):
+            return True
+    Image.init()
+    return image_format.upper() in Image.SAVE # Encoders registered by plugins such as pillow-avif-plugin
+
+
+def available_formats(formats=OUTPUT_FORMATS):
+    """Returns the configured formats this Pillow build can encode, warning about the rest."""
+    available = {}
+    for image_format, options in formats.items():
+        if can_encode(image_format):
+            available[image_format] = options
+        else:
+            print(f"Warning: this Pillow build can't encode {image_format.upper()}; skipping {image_format} variants.")
+    return available
+
+
+def hash_file(file_path):
+    """Returns the sha256 hex digest of a file."""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def find_images(source_dir, output_dir):
+    """Returns the paths (relative to source_dir, POSIX style) of every raster image to optimize."""
+    output_dir = os.path.abspath(output_dir)
+    found = []
+    for dir_path, dir_names, file_names in os.walk(source_dir):
+        # Never re-optimize our own output if OUTPUT_DIR is configured inside SOURCE_DIR
+        dir_names[:] = [d for d in dir_names if os.path.abspath(os.path.join(dir_path, d)) != output_dir]
+        for name in file_names:
+            if name.lower().endswith(IMAGE_EXTENSIONS):
+                found.append(os.path.relpath(os.path.join(dir_path, name), source_dir).replace(os.sep, "/"))
+    return sorted(found)
+
+
+def process_image(job):
+    """
+    Encodes one source image into each format and width. Runs in a worker process.
+
+    A format that fails to encode is dropped for this image (its other formats are still written)
+    and reported in the returned errors.
+
+    Args:
+        job (tuple): (source_path, output_stem, formats) - output files are "<output_stem>-<width>w.<format>".
+
+    Returns:
+        tuple: (variants, errors) - one dict per variant written: {"path", "format", "width", "height",
+               "bytes"}, and {format: error message} for the formats that failed.
+    """
+    source_path, output_stem, formats = job
+    os.makedirs(os.path.dirname(output_stem), exist_ok=True)
+    variants = []
+    errors = {}
+    with Image.open(source_path) as original:
+        original.load()
+        image = original.convert("RGBA" if "A" in original.getbands() or original.mode == "P" else "RGB")
+        widths = [w for w in VARIANT_WIDTHS if w < image.width] + [image.width]
+        for width in widths:
+            if width == image.width:
+                resized = image
+            else:
+                height = max(1, round(image.height * width / image.width))
+                resized = image.resize((width, height), Image.LANCZOS)
+            for image_format, options in formats.items():
+                if image_format in errors:
+                    continue
+                output_path = f"{output_stem}-{width}w.{image_format}"
+                tmp_path = f"{output_path}.tmp"
+                try:
+                    resized.save(tmp_path, format=image_format.upper(), **options)
+                    os.replace(tmp_path, output_path)
+                except Exception as e:
+                    errors[image_format] = f"{type(e).__name__}: {e}"
+                    if os.path.exists(tmp_path):
+                        os.remove(tmp_path)
+                    continue
+                variants.append({"path": output_path, "format": image_format, "width": resized.width,
+                                 "height": resized.height, "bytes": os.path.getsize(output_path)})
+    return variants, errors
+
+
+def load_cache(cache_path):
+    try:
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_json(path, data):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=1, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def prune_variants(variant_root, keep_paths):
+    """
+    Removes files under variant_root that aren't current variants: those of deleted or renamed
+    sources, of widths/formats no longer configured, and leftover .tmp files. Empty folders go too.
+
+    Returns:
+        int: The number of files removed.
+    """
+    keep = {os.path.abspath(p) for p in keep_paths}
+    removed = 0
+    for dir_path, _, file_names in os.walk(variant_root, topdown=False):
+        for name in file_names:
+            path = os.path.join(dir_path, name)
+            if os.path.abspath(path) not in keep:
+                os.remove(path)
+                removed += 1
+        if dir_path != variant_root and not os.listdir(dir_path):
+            os.rmdir(dir_path)
+    return removed
+
+
+def to_url(path, public_dir):
+    """Turns a path under public/ into the site-absolute URL it is served at."""
+    return "/" + os.path.relpath(path, public_dir).replace(os.sep, "/")
+
+
+def print_savings_report(manifest):
+    """Prints, per source directory, original bytes vs the smallest full-width variant."""
+    per_dir = {}
+    for url, entry in manifest.items():
+        full_width = [v for v in entry["variants"] if v["width"] == entry["width"]]
+        best = min(v["bytes"] for v in full_width) if full_width else entry["bytes"]
+        totals = per_dir.setdefault(url.rsplit("/", 1)[0] or "/", [0, 0])
+        totals[0] += entry["bytes"]
+        totals[1] += best
+    print(f"\n{'Directory':<50} {'Original':>12} {'Optimized':>12} {'Saved':>8}")
+    grand_original = grand_best = 0
+    for directory, (original, best) in sorted(per_dir.items()):
+        grand_original += original
+        grand_best += best
+        saved = 1 - best / original if original else 0
+        print(f"{directory:<50} {original:>12,} {best:>12,} {saved:>8.0%}")
+    if grand_original:
+        print(f"{'TOTAL':<50} {grand_original:>12,} {grand_best:>12,} {1 - grand_best / grand_original:>8.0%}")
+
+
+def optimize_images(source_dir=SOURCE_DIR, output_dir=OUTPUT_DIR, manifest_path=IMAGE_MANIFEST_PATH,
+                    cache_path=IMAGE_CACHE_PATH, max_workers=None):
+    """
+    Converts every image under source_dir into WebP/AVIF variants at several widths, in a process pool.
+
+    Images whose content hash (and the encoder settings) match the cache and whose variants still
+    exist are skipped. Variants of sources that no longer exist are deleted. Writes a manifest
+    mapping each original URL (e.g. "/images/groups/x.png") to its variants, and prints a
+    per-directory report of bytes saved.
+
+    Returns:
+        dict: The manifest, or None if Pillow is not installed or can encode none of OUTPUT_FORMATS.
+    """
+    if Image is None:
+        print("Error: Pillow is required for image optimization (pip install Pillow).")
+        return None
+    formats = available_formats()
+    if not formats:
+        print(f"Error: this Pillow build can encode none of {', '.join(OUTPUT_FORMATS)}.")
+        return None
+    key = settings_key(formats)
+
+    public_dir = os.path.dirname(os.path.abspath(source_dir))
+    cache = load_cache(cache_path)
+    images = find_images(source_dir, output_dir)
+    print(f"Found {len(images)} images in {source_dir}.")
+
+    manifest = {}
+    jobs = {}
+    new_cache = {}
+    for rel_path in images:
+        source_path = os.path.join(source_dir, rel_path)
+        content_hash = hash_file(source_path)
+        cached = cache.get(rel_path)
+        if (cached and cached["hash"] == content_hash and cached["settings"] == key and not cached.get("errors")
+                and all(os.path.exists(v["path"]) for v in cached["variants"])):
+            new_cache[rel_path] = cached
+            continue
+        output_stem = os.path.join(output_dir, os.path.basename(os.path.abspath(source_dir)), os.path.splitext(rel_path)[0])
+        jobs[rel_path] = (content_hash, (source_path, output_stem, formats))
+
+    print(f"{len(images) - len(jobs)} unchanged images skipped, {len(jobs)} to encode.")
+    start = time.perf_counter()
+    if jobs:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            futures = {rel_path: executor.submit(process_image, job) for rel_path, (_, job) in jobs.items()}
+            for rel_path, future in futures.items():
+                try:
+                    variants, errors = future.result()
+                except Exception as e:
+                    print(f"Error optimizing {rel_path}: {e}")
+                    continue
+                for image_format, message in sorted(errors.items()):
+                    print(f"Error encoding {rel_path} as {image_format}: {message}")
+                if variants:
+                    # An entry with errors is re-encoded on the next run
+                    new_cache[rel_path] = {"hash": jobs[rel_path][0], "settings": key, "variants": variants,
+                                           **({"errors": errors} if errors else {})}
+        print(f"Encoded {len(jobs)} images in {time.perf_counter() - start:.1f}s.")
+
+    # Only variants of the images in new_cache survive, so the manifest and public/optimized agree
+    variant_root = os.path.join(output_dir, os.path.basename(os.path.abspath(source_dir)))
+    removed = prune_variants(variant_root, [v["path"] for entry in new_cache.values() for v in entry["variants"]])
+    if removed:
+        print(f"Removed {removed} stale variant files from {variant_root}.")
+
+    for rel_path, entry in sorted(new_cache.items()):
+        source_path = os.path.join(source_dir, rel_path)
+        widths = [v["width"] for v in entry["variants"]]
+        manifest[to_url(source_path, public_dir)] = {
+            "bytes": os.path.getsize(source_path),
+            "width": max(widths) if widths else None,
+            "variants": [{"url": to_url(v["path"], public_dir), "format": v["format"], "width": v["width"],
+                          "height": v["height"], "bytes": v["bytes"]} for v in entry["variants"]],
+        }
+
+    save_json(cache_path, new_cache)
+    save_json(manifest_path, manifest)
+    print(f"Wrote image manifest: {manifest_path}")
+    print_savings_report(manifest)
+    return manifest
+
+
+if __name__ == "__main__":
+    # Assuming the script is in the project root, like migrate_to_public.py
+    os.chdir(os.path.dirname(os.path.abspath(__file__)))
+    if optimize_images() is None:
+        sys.exit(1)
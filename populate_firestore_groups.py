@@ -1,17 +1,68 @@
-import firebase_admin
-from firebase_admin import credentials
-from firebase_admin import firestore
+import hashlib
 import json
+import os
+import random
+import re
+import sys
+import time
 import datetime # For a potential initial lastActivity
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from asset_index import load_asset_index
+from ops_metrics import add_counts, instrumented_run, phase, record_firestore_op
+from seed_loader import SeedValidationError, iter_json_records, validate_seed_file
 
 # --- CONFIGURATION ---
-SERVICE_ACCOUNT_KEY_PATH = './polyglot-connect-firebase-adminsdk.json' # Update this path
-GROUPS_DATA_JSON_PATH = './groups_data.json'  # Update this path
+SERVICE_ACCOUNT_KEY_PATH = os.environ.get("GOOGLE_APPLICATION_CREDENTIALS", './polyglot-connect-firebase-adminsdk.json')
+GROUPS_DATA_JSON_PATH = './groups_data.json'
+EMULATOR_PROJECT_ID = 'polyglot-connect-ffdcc' # Used when FIRESTORE_EMULATOR_HOST is set
+BATCH_SIZE = 500 # Firestore allows at most 500 writes per batch commit
+BATCH_CONCURRENCY = 4 # Batches committed in parallel
+BATCH_MAX_RETRIES = 5
+BATCH_BACKOFF_SECONDS = 0.5 # Base delay, doubled on each retry (plus jitter)
+GET_ALL_CHUNK_SIZE = 300 # Documents fetched per get_all() round trip in sync mode
+# Fields that only the app writes after creation; sync mode never touches them on existing groups
+ACTIVITY_FIELDS = ("lastActivity", "lastMessage")
+# Fields copied from groups_data.json by build_group_data; sync mode keeps these in step with the JSON
+DEFINITION_FIELDS = ("name", "language", "groupPhotoUrl", "description", "tutorId",
+                     "maxLearners", "tags", "category", "communityTags")
+# Precomputed group lists ("all", per language, per category) so the hub page needs one read instead of N.
+# Their memberCount values are a snapshot taken when the listings are synced (seed, seed --sync or
+# seed --listings), not a live counter: joins and leaves happen in the app and don't touch the listings,
+# so re-run a listings sync periodically (e.g. from a scheduled job) to refresh them.
+LISTINGS_COLLECTION = 'group_listings'
+COUNT_CONCURRENCY = 8 # count() aggregation queries in flight at once while refreshing listings
+LISTING_FIELDS = ("name", "language", "category", "groupPhotoUrl", "tags", "maxLearners")
+LISTING_MAX_BYTES = 900 * 1024 # Firestore documents are capped at 1 MiB
+# Exception class names (google.api_core.exceptions) worth retrying a batch commit on
+RETRYABLE_ERROR_NAMES = {"Aborted", "DeadlineExceeded", "ServiceUnavailable", "ResourceExhausted", "InternalServerError"}
 # --- END CONFIGURATION ---
 
+def _firestore():
+    """Imports firebase_admin.firestore on first use; it pulls in grpc, so importing this module stays cheap."""
+    from firebase_admin import firestore
+    return firestore
+
 def initialize_firebase():
-    """Initializes the Firebase Admin SDK."""
+    """Initializes the Firebase Admin SDK.
+
+    If FIRESTORE_EMULATOR_HOST is set (e.g. "localhost:8080", see firebase.json), the client talks
+    to the local emulator and no service account key is needed.
+    """
     try:
+        import firebase_admin
+        from firebase_admin import credentials
+        firestore = _firestore()
+        try:
+            firebase_admin.get_app() # Already initialized earlier in this process
+            return firestore.client()
+        except ValueError:
+            pass
+        if os.environ.get("FIRESTORE_EMULATOR_HOST"):
+            firebase_admin.initialize_app(options={"projectId": EMULATOR_PROJECT_ID})
+            print(f"Firebase Admin SDK initialized against emulator at {os.environ['FIRESTORE_EMULATOR_HOST']}.")
+            return firestore.client()
         cred = credentials.Certificate(SERVICE_ACCOUNT_KEY_PATH)
         firebase_admin.initialize_app(cred)
         print("Firebase Admin SDK initialized successfully.")
@@ -20,77 +71,475 @@ def initialize_firebase():
         print(f"Error initializing Firebase Admin SDK: {e}")
         return None
 
-def populate_groups(db):
-    """Reads group data from JSON and creates/updates documents in Firestore."""
-    if not db:
-        return
+def build_group_data(group_def):
+    """Maps a group definition from the JSON file to the fields stored on its Firestore document."""
+    # Prepare data for Firestore (can be the whole group_def or selected fields)
+    # For now, let's write all defined fields from the JSON.
+    # You might want to exclude fields like 'memberSelectionCriteria' if it's complex
+    # and only used client-side, or structure it appropriately for Firestore.
+    data_to_set = {
+        "name": group_def.get("name"),
+        "language": group_def.get("language"),
+        "groupPhotoUrl": group_def.get("groupPhotoUrl"),
+        "description": group_def.get("description"),
+        "tutorId": group_def.get("tutorId"),
+        "maxLearners": group_def.get("maxLearners"),
+        "tags": group_def.get("tags", []), # Default to empty array
+        "category": group_def.get("category"),
+        "communityTags": group_def.get("communityTags", []), # Default to empty array
+        # Add any other fields you want on the parent document
+        # It's good practice to add an initial lastActivity
+        "lastActivity": _firestore().SERVER_TIMESTAMP, # Use server timestamp
+        "lastMessage": { # Initial placeholder
+            "text": "Group created.",
+            "senderId": "system",
+            "senderName": "System",
+            "timestamp": _firestore().SERVER_TIMESTAMP,
+            "type": "system_event"
+        }
+    }
+    # Remove None values to avoid writing nulls unless intended
+    return {k: v for k, v in data_to_set.items() if v is not None}
+
+def is_retryable_error(error):
+    """True for transient Firestore errors (contention, timeouts, overload) that a retry can fix."""
+    return type(error).__name__ in RETRYABLE_ERROR_NAMES
+
+def commit_batch_with_retry(db, collection_name, batch_index, docs, merge=True):
+    """
+    Commits one WriteBatch of (doc_id, data) pairs, retrying transient errors with exponential backoff.
+    A data value of None deletes the document instead of setting it.
+
+    With collection_name=None, doc ids are full document paths (e.g. "groups/x/messages/y").
+
+    A committed or failed WriteBatch can't be reused, so the batch is rebuilt on every attempt.
+
+    Returns:
+        dict: {"batch", "docs", "attempts", "latency", "error"} - latency is the successful commit's
+              round trip in seconds, error is None on success.
+    """
+    collection_ref = db.collection(collection_name) if collection_name is not None else None
+    attempt = 0
+    while True:
+        attempt += 1
+        batch = db.batch()
+        for doc_id, data in docs:
+            doc_ref = collection_ref.document(doc_id) if collection_ref is not None else db.document(doc_id)
+            if data is None:
+                batch.delete(doc_ref)
+            else:
+                batch.set(doc_ref, data, merge=merge)
+        start = time.perf_counter()
+        try:
+            batch.commit()
+            record_firestore_op("batch_commit", time.perf_counter() - start, docs=len(docs))
+            return {"batch": batch_index, "docs": len(docs), "attempts": attempt,
+                    "latency": time.perf_counter() - start, "error": None}
+        except Exception as e:
+            record_firestore_op("batch_commit", time.perf_counter() - start, docs=len(docs), error=e)
+            if attempt > BATCH_MAX_RETRIES or not is_retryable_error(e):
+                return {"batch": batch_index, "docs": len(docs), "attempts": attempt,
+                        "latency": time.perf_counter() - start, "error": e}
+            delay = BATCH_BACKOFF_SECONDS * (2 ** (attempt - 1))
+            time.sleep(delay + random.uniform(0, delay))
+
+def write_documents_batched(db, collection_name, docs, batch_size=BATCH_SIZE, max_workers=BATCH_CONCURRENCY, merge=True):
+    """
+    Writes (doc_id, data) pairs in WriteBatch commits of at most batch_size documents, committing up
+    to max_workers batches concurrently. Prints one line per batch with its latency. A data value of
+    None deletes that document. With collection_name=None, doc ids are full document paths.
+
+    docs may be any iterable (e.g. a generator streaming records off disk); at most 2 * max_workers
+    batches are buffered at a time, so memory stays flat however many documents flow through.
+
+    Returns:
+        dict: {"written", "failed", "batches", "seconds", "results"} where results holds the per-batch
+              dicts from commit_batch_with_retry.
+    """
+    batch_size = min(batch_size, BATCH_SIZE)
+    start = time.perf_counter()
+    results = []
+
+    def report(future, doc_ids):
+        result = future.result()
+        results.append(result)
+        if result["error"] is None:
+            print(f"  Batch {result['batch']}: {result['docs']} docs committed in "
+                  f"{result['latency'] * 1000:.0f} ms (attempts: {result['attempts']})")
+        else:
+            print(f"  Batch {result['batch']}: FAILED after {result['attempts']} attempts: {result['error']}")
+            print(f"  Document ids in failed batch: {doc_ids}")
 
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        pending = deque()
+
+        def submit(chunk):
+            future = executor.submit(commit_batch_with_retry, db, collection_name, len(results) + len(pending), chunk, merge)
+            pending.append((future, [doc_id for doc_id, _ in chunk]))
+            while len(pending) >= 2 * max_workers:
+                report(*pending.popleft())
+
+        chunk = []
+        for doc in docs:
+            chunk.append(doc)
+            if len(chunk) == batch_size:
+                submit(chunk)
+                chunk = []
+        if chunk:
+            submit(chunk)
+        while pending:
+            report(*pending.popleft())
+
+    seconds = time.perf_counter() - start
+    written = sum(r["docs"] for r in results if r["error"] is None)
+    failed = sum(r["docs"] for r in results if r["error"] is not None)
+    if results:
+        latencies = sorted(r["latency"] for r in results if r["error"] is None) or [0.0]
+        print(f"Wrote {written} documents to '{collection_name or '(document paths)'}' in {len(results)} batches, {seconds:.2f}s "
+              f"({written / max(seconds, 1e-9):.0f} docs/s, median batch latency "
+              f"{latencies[len(latencies) // 2] * 1000:.0f} ms, max {latencies[-1] * 1000:.0f} ms).")
+    return {"written": written, "failed": failed, "batches": len(results), "seconds": seconds, "results": results}
+
+def load_groups_data():
+    """Reads the group definitions from GROUPS_DATA_JSON_PATH, or returns None on error."""
     try:
         with open(GROUPS_DATA_JSON_PATH, 'r', encoding='utf-8') as f:
-            groups_data = json.load(f)
+            return json.load(f)
     except FileNotFoundError:
         print(f"Error: {GROUPS_DATA_JSON_PATH} not found.")
-        return
     except json.JSONDecodeError as e:
         print(f"Error decoding JSON from {GROUPS_DATA_JSON_PATH}: {e}")
-        return
     except Exception as e:
         print(f"An unexpected error occurred reading the JSON file: {e}")
+    return None
+
+def load_group_refs():
+    """
+    Returns lookups for what group records may reference: persona ids for tutorId and public/ asset
+    paths for groupPhotoUrl (through AssetIndex, so "?v=2" suffixes are ignored). Reference checks
+    are skipped (with a warning) if the index can't be built.
+    """
+    try:
+        index = load_asset_index()
+    except OSError as e:
+        print(f"Warning: Could not build the asset/persona index, skipping reference checks: {e}")
+        return {}
+    return {"tutor": index.has_persona, "asset": index.has_asset}
+
+def validate_groups_file(path=GROUPS_DATA_JSON_PATH, refs=None):
+    """Validates every group record before anything is written. Returns the record count, or None on errors.
+
+    refs defaults to load_group_refs(), so broken tutorId/groupPhotoUrl references are caught too.
+    """
+    if refs is None:
+        refs = load_group_refs()
+    try:
+        count = validate_seed_file(path, refs=refs)
+    except FileNotFoundError:
+        print(f"Error: {path} not found.")
+        return None
+    except SeedValidationError as e:
+        print(f"Error: {e}. Nothing was written.")
+        for message in e.errors:
+            print(f"  {message}")
+        return None
+    print(f"Validated {count} group definitions in {path}.")
+    return count
+
+def populate_groups(db):
+    """Reads group data from JSON and creates/updates documents in Firestore.
+
+    The file is validated in full first, then streamed a second time straight into the batched
+    writer, so bad data fails before any write and the definitions are never all held in memory.
+    """
+    if not db:
         return
 
-    print(f"Found {len(groups_data)} group definitions in JSON file.")
+    with phase("validate"):
+        if validate_groups_file(GROUPS_DATA_JSON_PATH) is None:
+            return
+
+    # Using set with merge=True will create each document if it doesn't exist,
+    # or update it if it does. This is safer than just create.
+    with phase("write groups"):
+        docs = ((group_def["id"], build_group_data(group_def))
+                for _, group_def in iter_json_records(GROUPS_DATA_JSON_PATH))
+        stats = write_documents_batched(db, 'groups', docs)
+        add_counts(docs=stats["written"], docs_failed=stats["failed"])
+    with phase("sync listings"):
+        sync_group_listings(db)
+    return stats
 
+def collect_group_definitions(groups_data):
+    """Returns {group_id: group_def} for definitions with an 'id', reporting the ones without."""
+    definitions = {}
     for group_def in groups_data:
         group_id = group_def.get("id")
         if not group_id:
             print(f"Skipping group due to missing 'id': {group_def.get('name', 'Unnamed Group')}")
             continue
+        definitions[group_id] = group_def
+    return definitions
 
-        group_doc_ref = db.collection('groups').document(group_id)
-
-        # Prepare data for Firestore (can be the whole group_def or selected fields)
-        # For now, let's write all defined fields from the JSON.
-        # You might want to exclude fields like 'memberSelectionCriteria' if it's complex
-        # and only used client-side, or structure it appropriately for Firestore.
-        data_to_set = {
-            "name": group_def.get("name"),
-            "language": group_def.get("language"),
-            "groupPhotoUrl": group_def.get("groupPhotoUrl"),
-            "description": group_def.get("description"),
-            "tutorId": group_def.get("tutorId"),
-            "maxLearners": group_def.get("maxLearners"),
-            "tags": group_def.get("tags", []), # Default to empty array
-            "category": group_def.get("category"),
-            "communityTags": group_def.get("communityTags", []), # Default to empty array
-            # Add any other fields you want on the parent document
-            # It's good practice to add an initial lastActivity
-            "lastActivity": firestore.SERVER_TIMESTAMP, # Use server timestamp
-            "lastMessage": { # Initial placeholder
-                "text": "Group created.",
-                "senderId": "system",
-                "senderName": "System",
-                "timestamp": firestore.SERVER_TIMESTAMP,
-                "type": "system_event"
-            }
+def fetch_existing_groups(db, group_ids):
+    """Fetches existing group documents with get_all in chunks. Returns {group_id: dict} for docs that exist."""
+    collection_ref = db.collection('groups')
+    existing = {}
+    for i in range(0, len(group_ids), GET_ALL_CHUNK_SIZE):
+        refs = [collection_ref.document(group_id) for group_id in group_ids[i:i + GET_ALL_CHUNK_SIZE]]
+        start = time.perf_counter()
+        snapshots = list(db.get_all(refs))
+        record_firestore_op("get_all", time.perf_counter() - start, docs=len(refs))
+        for snapshot in snapshots:
+            if snapshot.exists:
+                existing[snapshot.id] = snapshot.to_dict()
+    return existing
+
+def diff_group_fields(desired, current):
+    """
+    Returns the field-level changes needed to turn the current document into the desired one,
+    ignoring ACTIVITY_FIELDS. Definition fields that are no longer set are removed with DELETE_FIELD.
+    """
+    changes = {}
+    for field in DEFINITION_FIELDS:
+        if field in desired:
+            if current.get(field) != desired[field]:
+                changes[field] = desired[field]
+        elif field in current:
+            changes[field] = _firestore().DELETE_FIELD
+    return changes
+
+def plan_group_sync(db, groups_data, prune=False):
+    """
+    Computes the minimal write set that brings the 'groups' collection in line with groups_data.
+
+    New groups get the full document (with initial activity metadata); existing groups get only the
+    definition fields that differ. With prune=True, groups missing from the JSON are deleted.
+
+    Returns:
+        dict: {"creates": [(id, data)], "updates": [(id, changes)], "deletes": [id], "unchanged": int}
+    """
+    definitions = collect_group_definitions(groups_data)
+    existing = fetch_existing_groups(db, list(definitions))
+
+    plan = {"creates": [], "updates": [], "deletes": [], "unchanged": 0}
+    for group_id, group_def in definitions.items():
+        desired = build_group_data(group_def)
+        if group_id not in existing:
+            plan["creates"].append((group_id, desired))
+            continue
+        changes = diff_group_fields(desired, existing[group_id])
+        if changes:
+            plan["updates"].append((group_id, changes))
+        else:
+            plan["unchanged"] += 1
+
+    if prune:
+        for doc_ref in db.collection('groups').list_documents():
+            if doc_ref.id not in definitions:
+                plan["deletes"].append(doc_ref.id)
+    return plan
+
+def print_sync_plan(plan):
+    """Prints the planned writes and the approximate payload size."""
+    payload = [data for _, data in plan["creates"]] + [data for _, data in plan["updates"]]
+    payload_bytes = len(json.dumps(payload, default=str).encode('utf-8'))
+    total = len(plan["creates"]) + len(plan["updates"]) + len(plan["deletes"])
+    print(f"Sync plan: {len(plan['creates'])} creates, {len(plan['updates'])} updates, "
+          f"{len(plan['deletes'])} deletes, {plan['unchanged']} unchanged "
+          f"({total} writes, ~{payload_bytes} bytes of field data).")
+    for group_id, _ in plan["creates"]:
+        print(f"  + create {group_id}")
+    for group_id, changes in plan["updates"]:
+        print(f"  ~ update {group_id}: {', '.join(sorted(changes))}")
+    for group_id in plan["deletes"]:
+        print(f"  - delete {group_id}")
+
+def sync_groups(db, dry_run=False, prune=False):
+    """
+    Idempotent alternative to populate_groups: reads the existing group documents in bulk and writes
+    only what changed in groups_data.json, leaving lastActivity/lastMessage alone on existing groups.
+    The group listing documents are brought up to date afterwards (see sync_group_listings).
+
+    Args:
+        db: Firestore client.
+        dry_run (bool): Print the planned writes without applying them.
+        prune (bool): Also delete group documents whose id is no longer in the JSON file.
+                      Message subcollections of pruned groups are NOT deleted.
+    """
+    if not db:
+        return
+
+    with phase("validate"):
+        if validate_groups_file(GROUPS_DATA_JSON_PATH) is None:
+            return
+        groups_data = load_groups_data()
+        if groups_data is None:
+            return
+
+    with phase("plan sync"):
+        plan = plan_group_sync(db, groups_data, prune=prune)
+    print_sync_plan(plan)
+    if dry_run:
+        with phase("sync listings"):
+            sync_group_listings(db, dry_run=True)
+        print("Dry run: no documents were written.")
+        return plan
+
+    writes = plan["creates"] + plan["updates"] + [(group_id, None) for group_id in plan["deletes"]]
+    if not writes:
+        print("Firestore is already in sync with the JSON file.")
+    else:
+        with phase("write groups"):
+            stats = write_documents_batched(db, 'groups', writes)
+            add_counts(docs=stats["written"], docs_failed=stats["failed"])
+    with phase("sync listings"):
+        sync_group_listings(db) # Refreshes the member count snapshot even when no definition changed
+    return plan
+
+def count_group_members(db, group_ids, max_workers=COUNT_CONCURRENCY):
+    """
+    Returns {group_id: number of docs in groups/<id>/members}, using count() aggregation queries.
+
+    Firestore has no per-parent count across a collection group, so there is one query per group;
+    up to max_workers of them run concurrently, making the wall time roughly N / max_workers round trips.
+    """
+    def count(group_id):
+        members_ref = db.collection('groups').document(group_id).collection('members')
+        start = time.perf_counter()
+        if hasattr(members_ref, "count"):
+            value = int(members_ref.count().get()[0][0].value)
+        else:
+            value = len(members_ref.list_documents()) # Clients without aggregation (fake_firestore)
+        record_firestore_op("count_members", time.perf_counter() - start)
+        return value
+
+    if not group_ids:
+        return {}
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(group_ids)))) as executor:
+        return dict(zip(group_ids, executor.map(count, group_ids)))
+
+def listing_doc_id(kind, key):
+    """("language", "Portuguese (Brazil)") -> "language_portuguese-brazil"."""
+    return f"{kind}_{re.sub(r'[^a-z0-9]+', '-', key.lower()).strip('-')}"
+
+def build_group_listings(group_defs, member_counts):
+    """
+    Builds the listing documents: "all" plus one per language and per category. Each holds a compact
+    entry (id, LISTING_FIELDS, memberCount) per group, sorted by name, and a hash of those entries.
+
+    Returns:
+        dict: {listing_doc_id: data}
+    """
+    entries = []
+    for group_def in group_defs:
+        entry = {"id": group_def["id"], "memberCount": member_counts.get(group_def["id"], 0)}
+        entry.update({field: group_def[field] for field in LISTING_FIELDS if group_def.get(field) is not None})
+        entries.append(entry)
+    entries.sort(key=lambda entry: (entry.get("name", ""), entry["id"]))
+
+    grouped = {("all", None): entries}
+    for entry in entries:
+        for kind in ("language", "category"):
+            if entry.get(kind):
+                grouped.setdefault((kind, entry[kind]), []).append(entry)
+
+    listings = {}
+    for (kind, key), listing_entries in grouped.items():
+        source_hash = hashlib.sha256(json.dumps(listing_entries, sort_keys=True).encode('utf-8')).hexdigest()
+        listings["all" if kind == "all" else listing_doc_id(kind, key)] = {
+            "kind": kind, "key": key, "groups": listing_entries,
+            "groupCount": len(listing_entries), "sourceHash": source_hash,
         }
-        # Remove None values to avoid writing nulls unless intended
-        data_to_set = {k: v for k, v in data_to_set.items() if v is not None}
+    return listings
 
+def sync_group_listings(db, dry_run=False):
+    """
+    Rebuilds the LISTINGS_COLLECTION documents from groups_data.json and the current member counts,
+    writing only listings whose content changed and deleting listings that no longer apply.
 
-        try:
-            # Using set with merge=True will create the document if it doesn't exist,
-            # or update it if it does. This is safer than just create.
-            group_doc_ref.set(data_to_set, merge=True)
-            print(f"Successfully created/updated group document: {group_id}")
-        except Exception as e:
-            print(f"Error creating/updating group document {group_id}: {e}")
-            print(f"Data attempted: {data_to_set}")
+    The member counts are a point-in-time snapshot (see LISTINGS_COLLECTION); this is the only
+    place they are refreshed.
+
+    Returns:
+        dict: {"writes": [listing ids], "deletes": [listing ids], "unchanged": int}
+    """
+    group_defs = [group_def for _, group_def in iter_json_records(GROUPS_DATA_JSON_PATH) if group_def.get("id")]
+    listings = build_group_listings(group_defs, count_group_members(db, [g["id"] for g in group_defs]))
+
+    collection_ref = db.collection(LISTINGS_COLLECTION)
+    existing = {}
+    for snapshot in db.get_all([collection_ref.document(listing_id) for listing_id in listings]):
+        if snapshot.exists:
+            existing[snapshot.id] = (snapshot.to_dict() or {}).get("sourceHash")
+
+    plan = {"writes": [], "deletes": [], "unchanged": 0}
+    writes = []
+    for listing_id, data in listings.items():
+        size = len(json.dumps(data).encode('utf-8'))
+        if size > LISTING_MAX_BYTES:
+            print(f"Error: Listing '{listing_id}' would be {size} bytes (limit {LISTING_MAX_BYTES}); not written.")
+            continue
+        if existing.get(listing_id) == data["sourceHash"]:
+            plan["unchanged"] += 1
+            continue
+        plan["writes"].append(listing_id)
+        writes.append((listing_id, dict(data, updatedAt=_firestore().SERVER_TIMESTAMP)))
+    for doc_ref in collection_ref.list_documents():
+        if doc_ref.id not in listings:
+            plan["deletes"].append(doc_ref.id)
+            writes.append((doc_ref.id, None))
+
+    print(f"Group listings: {len(plan['writes'])} to write, {len(plan['deletes'])} to delete, "
+          f"{plan['unchanged']} unchanged ({len(listings)} listings; the hub reads 1 document instead of {len(group_defs)}).")
+    if writes and not dry_run:
+        write_documents_batched(db, LISTINGS_COLLECTION, writes, merge=False) # Listings are replaced whole
+    return plan
+
+def benchmark_batched_writes(num_docs=5000, latency=0.05, abort_rate=0.05):
+    """
+    Measures batched write throughput offline against fake_firestore.FakeFirestoreClient, which
+    simulates a per-commit round trip and random contention aborts. Compares one-set-per-document
+    (the old loop, timed on a sample) with batched, concurrent commits.
+    """
+    from fake_firestore import FakeFirestoreClient
+
+    template = load_groups_data() or [{"id": "group", "name": "Group"}]
+    docs = []
+    for i in range(num_docs):
+        group_def = dict(template[i % len(template)], id=f"{template[i % len(template)]['id']}_{i}")
+        docs.append((group_def["id"], build_group_data(group_def)))
+
+    sample = docs[:50]
+    sequential_client = FakeFirestoreClient(latency=latency)
+    start = time.perf_counter()
+    for doc_id, data in sample:
+        sequential_client.collection('groups').document(doc_id).set(data, merge=True)
+    per_doc = (time.perf_counter() - start) / len(sample)
+    print(f"Sequential set(): {1 / per_doc:.0f} docs/s (estimated {per_doc * num_docs:.1f}s for {num_docs} docs)")
+
+    batched_client = FakeFirestoreClient(latency=latency, abort_rate=abort_rate)
+    stats = write_documents_batched(batched_client, 'groups', docs)
+    print(f"Batched writes: {stats['written'] / max(stats['seconds'], 1e-9):.0f} docs/s, "
+          f"{batched_client.round_trips} round trips for {num_docs} docs, {stats['failed']} failed.")
 
 
 if __name__ == "__main__":
+    if "--benchmark" in sys.argv:
+        benchmark_batched_writes()
+        sys.exit(0)
+
     db_client = initialize_firebase()
     if db_client:
-        populate_groups(db_client)
+        # --sync writes only changed fields; add --dry-run to preview, --prune to delete removed groups
+        with instrumented_run("populate_firestore_groups"):
+            if "--listings" in sys.argv:
+                with phase("sync listings"):
+                    sync_group_listings(db_client, dry_run="--dry-run" in sys.argv)
+            elif "--sync" in sys.argv:
+                sync_groups(db_client, dry_run="--dry-run" in sys.argv, prune="--prune" in sys.argv)
+            else:
+                populate_groups(db_client)
         print("Group population script finished.")
     else:
         print("Aborting script due to Firebase initialization failure.")
\ No newline at end of file
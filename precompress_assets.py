@@ -0,0 +1,215 @@
+import gzip
+import json
+import os
+import shutil
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from ops_metrics import add_counts, instrumented_run, phase
+from task_runner import file_digest, load_json_cache, save_json_cache
+
+try:
+    import brotli # Optional: pip install brotli (without it only .gz variants are written)
+except ImportError:
+    brotli = None
+
+# Post-build tool: writes .br and .gz variants next to every text asset in the build output
+# (HTML pages, CSS, JS bundles, JSON, SVG ...) at maximum compression, in a process pool.
+#
+# Compressed blobs are stored by content hash under COMPRESSED_CACHE_DIR, so a rebuild that
+# leaves a file's bytes unchanged links the stored variants back into dist/ instead of
+# compressing again; only new or changed files cost CPU. Blobs of content no longer in the build
+# are deleted after each run. Variants that don't save at least MIN_SAVINGS are not emitted.
+#
+# Opt-in tool, not part of the build or deploy: Firebase Hosting and Netlify compress responses
+# themselves and never serve a sidecar .br/.gz by Accept-Encoding, so publishing these variants
+# there only adds files. Run it when dist/ is served by something that negotiates precompressed
+# files, e.g. nginx with `gzip_static on;` (and `brotli_static on;` from ngx_brotli), Caddy's
+# `file_server { precompressed br gzip }`, or a CDN rule doing the same.
+
+# --- CONFIGURATION ---
+BUILD_DIR = './dist'
+COMPRESSED_CACHE_DIR = './.cache/precompressed'
+COMPRESS_EXTENSIONS = {".html", ".css", ".js", ".mjs", ".json", ".map", ".svg", ".xml", ".txt", ".webmanifest"}
+MIN_SIZE_BYTES = 1024 # Smaller files fit in the first packets anyway
+MIN_SAVINGS = 0.10 # A variant must be at least 10% smaller than the original to be written
+GZIP_LEVEL = 9
+BROTLI_QUALITY = 11
+# --- END CONFIGURATION ---
+
+CACHE_VERSION = 1
+ENCODINGS = {"br": ".br", "gzip": ".gz"}
+
+
+def available_encodings():
+    return [encoding for encoding in ENCODINGS if encoding != "br" or brotli is not None]
+
+
+def settings_key():
+    return f"v{CACHE_VERSION}-gz{GZIP_LEVEL}-br{BROTLI_QUALITY}"
+
+
+def blob_path(digest, encoding, cache_dir=COMPRESSED_CACHE_DIR):
+    return os.path.join(cache_dir, settings_key(), digest[:2], digest + ENCODINGS[encoding])
+
+
+def compress_file(job):
+    """Worker: compresses one file into the blob store. Returns {encoding: compressed bytes}."""
+    source_path, digest, encodings, cache_dir = job
+    with open(source_path, 'rb') as f:
+        data = f.read()
+    sizes = {}
+    for encoding in encodings:
+        target = blob_path(digest, encoding, cache_dir)
+        if not os.path.exists(target):
+            if encoding == "br":
+                compressed = brotli.compress(data, quality=BROTLI_QUALITY)
+            else:
+                compressed = gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0) # mtime=0: same bytes every run
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            tmp_path = f"{target}.{os.getpid()}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(compressed)
+            os.replace(tmp_path, target)
+        sizes[encoding] = os.path.getsize(target)
+    return sizes
+
+
+def find_compressible(build_dir):
+    """Returns the paths under build_dir worth compressing (by extension and size)."""
+    paths = []
+    for dir_path, _, file_names in os.walk(build_dir):
+        for name in file_names:
+            path = os.path.join(dir_path, name)
+            if os.path.splitext(name)[1].lower() in COMPRESS_EXTENSIONS and os.path.getsize(path) >= MIN_SIZE_BYTES:
+                paths.append(path)
+    return sorted(paths)
+
+
+def cache_index_path(cache_dir=COMPRESSED_CACHE_DIR):
+    return os.path.join(cache_dir, "index.json")
+
+
+def prune_blobs(referenced, cache_dir=COMPRESSED_CACHE_DIR):
+    """
+    Deletes stored blobs whose digest isn't in referenced, and blob directories of other settings.
+    Vite emits content-hashed bundles, so without this every build would add blobs forever.
+
+    Returns:
+        int: The number of files removed.
+    """
+    removed = 0
+    if not os.path.isdir(cache_dir):
+        return removed
+    current = os.path.join(cache_dir, settings_key())
+    for name in os.listdir(cache_dir):
+        path = os.path.join(cache_dir, name)
+        if os.path.isdir(path) and path != current:
+            removed += sum(len(file_names) for _, _, file_names in os.walk(path))
+            shutil.rmtree(path)
+    for dir_path, _, file_names in os.walk(current, topdown=False):
+        for name in file_names:
+            if name.split(".", 1)[0] not in referenced:
+                os.remove(os.path.join(dir_path, name))
+                removed += 1
+        if dir_path != current and not os.listdir(dir_path):
+            os.rmdir(dir_path)
+    return removed
+
+
+def place_variant(blob, target):
+    """Hard-links (or copies) a stored blob to target, replacing whatever is there."""
+    if os.path.exists(target):
+        os.remove(target)
+    try:
+        os.link(blob, target)
+    except OSError:
+        with open(blob, 'rb') as src, open(target, 'wb') as dst:
+            dst.write(src.read())
+
+
+def precompress_build(build_dir=BUILD_DIR, cache_dir=COMPRESSED_CACHE_DIR, max_workers=None):
+    """
+    Writes .br/.gz variants for the text assets in build_dir, compressing only content not seen before.
+
+    Returns:
+        dict: {relative path: {"bytes": original size, encoding: variant size, ...}} for the
+              variants written, or None if build_dir does not exist.
+    """
+    if not os.path.isdir(build_dir):
+        print(f"Error: {build_dir} does not exist; run the build first.")
+        return None
+    encodings = available_encodings()
+    if brotli is None:
+        print("Warning: brotli is not installed (pip install brotli); writing .gz variants only.")
+
+    cache = load_json_cache(cache_index_path(cache_dir), CACHE_VERSION, {"files": {}})
+    with phase("hash build output"):
+        paths = find_compressible(build_dir)
+        digests = {path: file_digest(path, cache["files"]) for path in paths}
+    jobs = [(path, digests[path], encodings, cache_dir) for path in paths
+            if not all(os.path.exists(blob_path(digests[path], e, cache_dir)) for e in encodings)]
+    print(f"Found {len(paths)} compressible files in {build_dir}: {len(paths) - len(jobs)} unchanged, "
+          f"{len(jobs)} to compress.")
+
+    start = time.perf_counter()
+    with phase("compress"):
+        if jobs:
+            with ProcessPoolExecutor(max_workers=max_workers) as executor:
+                list(executor.map(compress_file, jobs))
+            print(f"Compressed {len(jobs)} files in {time.perf_counter() - start:.1f}s.")
+        add_counts(files=len(jobs), bytes=sum(os.path.getsize(job[0]) for job in jobs))
+
+    written = {}
+    with phase("place variants"):
+        for path in paths:
+            rel_path = os.path.relpath(path, build_dir).replace(os.sep, "/")
+            size = os.path.getsize(path)
+            for encoding in encodings:
+                blob = blob_path(digests[path], encoding, cache_dir)
+                target = path + ENCODINGS[encoding]
+                if os.path.getsize(blob) > size * (1 - MIN_SAVINGS):
+                    if os.path.exists(target):
+                        os.remove(target) # Left over from an earlier build of different content
+                    continue
+                place_variant(blob, target)
+                written.setdefault(rel_path, {"bytes": size})[encoding] = os.path.getsize(blob)
+        add_counts(variants=sum(len(entry) - 1 for entry in written.values()))
+
+    cache["files"] = {path: entry for path, entry in cache["files"].items() if path in digests}
+    save_json_cache(cache, cache_index_path(cache_dir))
+    removed = prune_blobs({entry[2] for entry in cache["files"].values()}, cache_dir)
+    if removed:
+        print(f"Removed {removed} stored variants of content no longer in {build_dir}.")
+    print_compression_report(written, encodings)
+    return written
+
+
+def print_compression_report(written, encodings):
+    """Prints original vs. compressed bytes per extension."""
+    per_ext = {}
+    for rel_path, entry in written.items():
+        totals = per_ext.setdefault(os.path.splitext(rel_path)[1].lower(), {"files": 0, "bytes": 0})
+        totals["files"] += 1
+        totals["bytes"] += entry["bytes"]
+        for encoding in encodings:
+            totals[encoding] = totals.get(encoding, 0) + entry.get(encoding, entry["bytes"])
+    print(f"\n{'Type':<14} {'Files':>6} {'Original':>12} " + " ".join(f"{e:>12}" for e in encodings))
+    for ext, totals in sorted(per_ext.items(), key=lambda item: item[1]["bytes"], reverse=True):
+        print(f"{ext:<14} {totals['files']:>6} {totals['bytes']:>12,} " + " ".join(
+            f"{totals.get(e, 0):>12,}" for e in encodings))
+    total = sum(t["bytes"] for t in per_ext.values())
+    if total:
+        print(f"{'TOTAL':<14} {len(written):>6} {total:>12,} " + " ".join(
+            f"{sum(t.get(e, 0) for t in per_ext.values()) / total:>12.0%}" for e in encodings))
+
+
+if __name__ == "__main__":
+    # python precompress_assets.py   (after `vite build`, for a server that negotiates .br/.gz; see above)
+    # Assuming the script is in the project root, like migrate_to_public.py
+    os.chdir(os.path.dirname(os.path.abspath(__file__)))
+    with instrumented_run("precompress_assets"):
+        result = precompress_build()
+    if result is None:
+        sys.exit(1)
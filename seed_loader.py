@@ -0,0 +1,223 @@
+import json
+import re
+
+# Streaming loader + validator for seed files (groups_data.json and friends).
+# Records are read one at a time from a JSON array or a JSONL file, so memory stays flat no matter
+# how many groups there are, and every record is checked against a schema compiled once up front.
+
+STREAM_CHUNK_SIZE = 64 * 1024 # Characters read per step when streaming a JSON array
+JSON_LINES_EXTENSIONS = (".jsonl", ".ndjson") # Always read one record per line
+
+# Field spec keys: type, required, min/max (numbers), pattern (strings), items (list element type),
+# ref (name of a set of known ids, or a lookup function, passed to validate_seed_file, e.g. "tutor").
+GROUP_SCHEMA = {
+    "id": {"type": str, "required": True, "pattern": r"[a-z0-9_]+"},
+    "name": {"type": str, "required": True},
+    "language": {"type": str, "required": True},
+    "groupPhotoUrl": {"type": str, "pattern": r"/images/.+", "ref": "asset"},
+    "description": {"type": str},
+    "tutorId": {"type": str, "required": True, "ref": "tutor"},
+    "maxLearners": {"type": int, "min": 1, "max": 20},
+    "tags": {"type": list, "items": str},
+    "category": {"type": str},
+    "communityTags": {"type": list, "items": str},
+    "memberSelectionCriteria": {"type": dict},
+}
+
+
+class SeedValidationError(Exception):
+    """Raised when a seed file has invalid records; `errors` holds one message per problem."""
+
+    def __init__(self, path, errors):
+        self.path = path
+        self.errors = errors
+        super().__init__(f"{len(errors)} validation error(s) in {path}")
+
+
+def is_json_lines(path):
+    """
+    True if path holds one JSON record per line (JSONL / NDJSON) rather than a JSON array: by its
+    extension (JSON_LINES_EXTENSIONS), otherwise by whether the first non-blank character opens an object.
+    """
+    if path.lower().endswith(JSON_LINES_EXTENSIONS):
+        return True
+    with open(path, 'r', encoding='utf-8') as f:
+        while True:
+            chunk = f.read(STREAM_CHUNK_SIZE)
+            if not chunk:
+                return False
+            stripped = chunk.lstrip()
+            if stripped:
+                return stripped[0] == "{"
+
+
+def iter_json_records(path, chunk_size=STREAM_CHUNK_SIZE):
+    """
+    Yields (record_number, record) from a JSON array file or a JSONL / NDJSON file (see
+    is_json_lines) without loading the whole file. record_number is 1-based (the line number for JSONL).
+
+    Raises:
+        json.JSONDecodeError: If the file is not a well-formed array / JSONL.
+    """
+    if is_json_lines(path):
+        with open(path, 'r', encoding='utf-8') as f:
+            for line_number, line in enumerate(f, 1):
+                line = line.strip()
+                if line:
+                    yield line_number, json.loads(line)
+        return
+
+    decoder = json.JSONDecoder()
+    with open(path, 'r', encoding='utf-8') as f:
+        buffer = ""
+        eof = False
+        started = False
+        after_record = False # A record was just read, so "," or "]" must come next
+        after_comma = False # A "," was just read, so a record must come next
+        record_number = 0
+        while True:
+            buffer = buffer.lstrip()
+            if not buffer:
+                if eof:
+                    raise json.JSONDecodeError("Unexpected end of file", "", 0)
+                chunk = f.read(chunk_size)
+                if chunk:
+                    buffer = chunk
+                else:
+                    eof = True
+                continue
+            if not started:
+                if buffer[0] != "[":
+                    raise json.JSONDecodeError("Expected a JSON array", buffer, 0)
+                buffer = buffer[1:]
+                started = True
+                continue
+            if buffer[0] == "]":
+                if after_comma:
+                    raise json.JSONDecodeError("Expected a record after ','", buffer, 0)
+                return
+            if buffer[0] == ",":
+                if not after_record:
+                    raise json.JSONDecodeError("Unexpected ','", buffer, 0)
+                buffer = buffer[1:]
+                after_record, after_comma = False, True
+                continue
+            if after_record:
+                raise json.JSONDecodeError("Expected ',' or ']' after a record", buffer, 0)
+            try:
+                record, end = decoder.raw_decode(buffer)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                chunk = f.read(chunk_size)
+                if chunk:
+                    buffer += chunk
+                else:
+                    eof = True
+                continue
+            record_number += 1
+            buffer = buffer[end:]
+            after_record, after_comma = True, False
+            yield record_number, record
+
+
+def compile_schema(schema):
+    """Turns a schema dict into a list of check functions: check(record, refs) -> error message or None."""
+    checks = []
+    for field, spec in schema.items():
+        expected_type = spec["type"]
+        if spec.get("required"):
+            checks.append(lambda r, refs, f=field: None if r.get(f) not in (None, "") else f"missing required field '{f}'")
+
+        def check_type(record, refs, f=field, t=expected_type):
+            value = record.get(f)
+            # bool is a subclass of int; True is not a valid maxLearners
+            if value is not None and (not isinstance(value, t) or (t is int and isinstance(value, bool))):
+                return f"'{f}' must be {t.__name__}, got {type(value).__name__}"
+        checks.append(check_type)
+
+        if "min" in spec or "max" in spec:
+            low, high = spec.get("min"), spec.get("max")
+            def check_range(record, refs, f=field, low=low, high=high):
+                value = record.get(f)
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    if (low is not None and value < low) or (high is not None and value > high):
+                        return f"'{f}' must be between {low} and {high}, got {value}"
+            checks.append(check_range)
+
+        if "pattern" in spec:
+            regex = re.compile(spec["pattern"])
+            def check_pattern(record, refs, f=field, regex=regex):
+                value = record.get(f)
+                if isinstance(value, str) and not regex.fullmatch(value):
+                    return f"'{f}' value {value!r} does not match {regex.pattern!r}"
+            checks.append(check_pattern)
+
+        if "items" in spec:
+            def check_items(record, refs, f=field, t=spec["items"]):
+                value = record.get(f)
+                if isinstance(value, list) and not all(isinstance(item, t) for item in value):
+                    return f"every item in '{f}' must be {t.__name__}"
+            checks.append(check_items)
+
+        if "ref" in spec:
+            def check_ref(record, refs, f=field, ref=spec["ref"]):
+                known = refs.get(ref)
+                value = record.get(f)
+                if known is None or value is None:
+                    return None
+                if not (known(value) if callable(known) else value in known):
+                    return f"'{f}' references unknown {ref} {value!r}"
+            checks.append(check_ref)
+    return checks
+
+
+def validate_record(record, checks, refs=None):
+    """Returns the list of error messages for one record (empty if it is valid)."""
+    if not isinstance(record, dict):
+        return [f"record must be an object, got {type(record).__name__}"]
+    refs = refs or {}
+    return [message for message in (check(record, refs) for check in checks) if message]
+
+
+def validate_seed_file(path, schema=GROUP_SCHEMA, refs=None, max_errors=50):
+    """
+    Streams every record of a seed file through the compiled schema and checks ids are unique.
+    Only ids and error messages are kept in memory.
+
+    Args:
+        path (str): JSON array or JSONL / NDJSON file.
+        schema (dict): Field specs, see GROUP_SCHEMA.
+        refs (dict): Known ids per "ref" name, e.g. {"tutor": {"sofia_spa_tutor", ...}}, or a
+                     function returning whether a value exists (e.g. AssetIndex.has_asset, which
+                     ignores ?query/#fragment suffixes). References whose entry is missing are not checked.
+        max_errors (int): Stop collecting after this many errors.
+
+    Returns:
+        int: The number of valid records.
+
+    Raises:
+        SeedValidationError: If any record is invalid or the file can't be parsed.
+    """
+    checks = compile_schema(schema)
+    errors = []
+    seen_ids = set()
+    count = 0
+    try:
+        for record_number, record in iter_json_records(path):
+            count += 1
+            label = f"record #{record_number}"
+            if isinstance(record, dict) and record.get("id"):
+                label += f" ({record['id']})"
+                if record["id"] in seen_ids:
+                    errors.append(f"{label}: duplicate id")
+                seen_ids.add(record["id"])
+            errors.extend(f"{label}: {message}" for message in validate_record(record, checks, refs))
+            if len(errors) >= max_errors:
+                errors.append(f"stopped after {max_errors} errors")
+                break
+    except json.JSONDecodeError as e:
+        errors.append(f"invalid JSON: {e}")
+    if errors:
+        raise SeedValidationError(path, errors)
+    return count
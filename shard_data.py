@@ -0,0 +1,354 @@
+import gzip
+import hashlib
+import json
+import os
+import re
+import sys
+import tempfile
+
+from seed_loader import GROUP_SCHEMA, compile_schema, validate_record
+
+# Generates per-language data shards for the client, plus groups_data.json for seeding, from one
+# canonical source: the `personasData` and `groupsDataArray` literals in src/data/.
+#
+# personas.ts and groups.ts ship every persona and group to every client at startup. The shards
+# split that data by language (public/data/shards/<language>.<hash>.json, each self-contained:
+# the language's personas and groups plus any tutor a group needs from another language), and a
+# small index.json lists them, so the app can fetch only the languages a user is learning.
+# Shard file names carry a content hash, so they can be cached forever; only index.json changes.
+# The shards are gitignored; `npm run build` generates them first (the prebuild script).
+#
+# groups_data.json is written from the same groups array, so the seeder and the client can no
+# longer drift apart. It is committed and reviewed like source, so JSON outputs are compared by
+# value: the file is only rewritten when the groups actually change, keeping its hand formatting.
+#
+# Run with --check (e.g. in CI) to fail if the committed groups_data.json is out of date. The shards
+# are a gitignored build output, so --check generates them into a temporary directory (which still
+# catches data that can't be sharded) instead of comparing against public/data/shards.
+
+# --- CONFIGURATION ---
+PERSONAS_SOURCE = ('./src/data/personas.ts', 'personasData')
+GROUPS_SOURCE = ('./src/data/groups.ts', 'groupsDataArray')
+SHARD_DIR = './public/data/shards'
+SHARD_URL_PREFIX = '/data/shards/'
+SHARD_INDEX_NAME = 'index.json'
+GROUPS_DATA_PATH = './groups_data.json'
+SHARD_HASH_LENGTH = 8
+# --- END CONFIGURATION ---
+
+INDEX_VERSION = 1
+
+
+class LiteralParseError(ValueError):
+    """Raised when a data array in a .ts source is not a plain JS literal we can read."""
+
+    def __init__(self, path, line, message):
+        self.path = path
+        self.line = line
+        super().__init__(f"{path}:{line}: {message}")
+
+
+# One token per match: comments and whitespace are skipped, everything else is a value or punctuation.
+LITERAL_TOKEN_PATTERN = re.compile(r"""
+    (?P<skip>\s+|//[^\n]*|/\*.*?\*/)
+  | (?P<string>"(?:[^"\\\n]|\\.)*"|'(?:[^'\\\n]|\\.)*'|`(?:[^`\\$]|\\.|\$(?!\{))*`)
+  | (?P<number>-?(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?)
+  | (?P<name>[A-Za-z_$][A-Za-z0-9_$]*)
+  | (?P<punct>[{}\[\],:])
+""", re.VERBOSE | re.DOTALL)
+JS_ESCAPES = {"n": "\n", "t": "\t", "r": "\r", "b": "\b", "f": "\f", "v": "\v", "0": "\0", "\n": ""}
+JS_ESCAPE_PATTERN = re.compile(r"\\(u\{[0-9a-fA-F]+\}|u[0-9a-fA-F]{4}|x[0-9a-fA-F]{2}|.)", re.DOTALL)
+JS_CONSTANTS = {"true": True, "false": False, "null": None}
+
+
+def _unescape_js_string(body):
+    def replacer(match):
+        escape = match.group(1)
+        if escape[0] in "ux" and len(escape) > 1:
+            return chr(int(escape.strip("u{}x"), 16))
+        return JS_ESCAPES.get(escape, escape)
+    return JS_ESCAPE_PATTERN.sub(replacer, body)
+
+
+def parse_js_literal(text, start, path="<source>"):
+    """
+    Parses the JS array/object literal that starts at text[start] into Python values.
+    Accepts what our data files use: unquoted keys, single/double/backtick strings without
+    ${...}, comments and trailing commas. Anything else (identifiers, calls, spreads) is an error.
+
+    Returns:
+        tuple: (value, index just past the literal).
+
+    Raises:
+        LiteralParseError: On anything that isn't a plain literal.
+    """
+    tokens = []
+    position = start
+    depth = 0
+    while True:
+        match = LITERAL_TOKEN_PATTERN.match(text, position)
+        if not match:
+            raise LiteralParseError(path, text.count("\n", 0, position) + 1, f"unexpected {text[position:position + 20]!r}")
+        position = match.end()
+        kind = match.lastgroup
+        if kind == "skip":
+            continue
+        tokens.append((kind, match.group(kind), match.start()))
+        if kind == "punct" and match.group(kind) in "[{":
+            depth += 1
+        elif kind == "punct" and match.group(kind) in "]}":
+            depth -= 1
+            if depth == 0:
+                break
+
+    index = 0
+
+    def fail(message, offset):
+        raise LiteralParseError(path, text.count("\n", 0, offset) + 1, message)
+
+    def parse_value():
+        nonlocal index
+        kind, value, offset = tokens[index]
+        index += 1
+        if kind == "string":
+            return _unescape_js_string(value[1:-1])
+        if kind == "number":
+            return float(value) if any(c in value for c in ".eE") else int(value)
+        if kind == "name":
+            if value not in JS_CONSTANTS:
+                fail(f"{value!r} is not a literal value", offset)
+            return JS_CONSTANTS[value]
+        if value == "[":
+            items = []
+            while tokens[index][1] != "]":
+                items.append(parse_value())
+                if tokens[index][1] == ",":
+                    index += 1
+                elif tokens[index][1] != "]":
+                    fail("expected ',' or ']'", tokens[index][2])
+            index += 1
+            return items
+        if value == "{":
+            obj = {}
+            while tokens[index][1] != "}":
+                key_kind, key, key_offset = tokens[index]
+                if key_kind not in ("name", "string", "number") or tokens[index + 1][1] != ":":
+                    fail("expected 'key:'", key_offset)
+                index += 2
+                obj[_unescape_js_string(key[1:-1]) if key_kind == "string" else key] = parse_value()
+                if tokens[index][1] == ",":
+                    index += 1
+                elif tokens[index][1] != "}":
+                    fail("expected ',' or '}'", tokens[index][2])
+            index += 1
+            return obj
+        fail(f"unexpected {value!r}", offset)
+
+    return parse_value(), position
+
+
+def read_ts_array(path, variable_name):
+    """Returns the value of `const <variable_name>... = [...]` in a .ts file."""
+    with open(path, 'r', encoding='utf-8') as f:
+        text = f.read()
+    match = re.search(rf"\bconst\s+{re.escape(variable_name)}\b[^=]*=\s*(?=\[)", text)
+    if not match:
+        raise LiteralParseError(path, 1, f"no array literal assigned to '{variable_name}'")
+    value, _ = parse_js_literal(text, match.end(), path)
+    return value
+
+
+def language_slug(language):
+    """"Portuguese (Brazil)" -> "portuguese-brazil"."""
+    return re.sub(r"[^a-z0-9]+", "-", language.lower()).strip("-")
+
+
+def validate_sources(personas, groups):
+    """Checks the canonical data before anything is generated. Returns a list of error messages."""
+    errors = []
+    persona_ids = set()
+    for number, persona in enumerate(personas, 1):
+        if not persona.get("id") or not persona.get("language"):
+            errors.append(f"persona #{number}: missing 'id' or 'language'")
+        elif persona["id"] in persona_ids:
+            errors.append(f"persona #{number} ({persona['id']}): duplicate id")
+        persona_ids.add(persona.get("id"))
+    checks = compile_schema(GROUP_SCHEMA)
+    group_ids = set()
+    for number, group in enumerate(groups, 1):
+        label = f"group #{number} ({group.get('id')})"
+        if group.get("id") in group_ids:
+            errors.append(f"{label}: duplicate id")
+        group_ids.add(group.get("id"))
+        errors.extend(f"{label}: {message}" for message in validate_record(group, checks, {"tutor": persona_ids}))
+    return errors
+
+
+def build_shards(personas, groups):
+    """Returns {language: {"language", "personas", "groups"}}, keeping source order within each shard."""
+    personas_by_id = {p["id"]: p for p in personas}
+    shards = {}
+    for persona in personas:
+        shards.setdefault(persona["language"], {"language": persona["language"], "personas": [], "groups": []})["personas"].append(persona)
+    for group in groups:
+        shard = shards.setdefault(group["language"], {"language": group["language"], "personas": [], "groups": []})
+        shard["groups"].append(group)
+        tutor = personas_by_id[group["tutorId"]]
+        if tutor not in shard["personas"]:
+            shard["personas"].append(tutor) # A group's shard must be able to render its host
+    return shards
+
+
+def serialize(data, indent=None):
+    separators = (",", ":") if indent is None else (",", ": ")
+    return json.dumps(data, ensure_ascii=False, indent=indent, separators=separators).encode('utf-8')
+
+
+def _format_readable(value, level):
+    if isinstance(value, (dict, list)) and value and not (
+            isinstance(value, list) and not any(isinstance(item, (dict, list)) for item in value)):
+        pad = "    " * (level + 1)
+        if isinstance(value, dict):
+            items = [f"{json.dumps(key, ensure_ascii=False)}: {_format_readable(item, level + 1)}" for key, item in value.items()]
+            brackets = "{}"
+        else:
+            items = [_format_readable(item, level + 1) for item in value]
+            brackets = "[]"
+        return brackets[0] + "\n" + ",\n".join(pad + item for item in items) + "\n" + "    " * level + brackets[1]
+    return json.dumps(value, ensure_ascii=False, separators=(", ", ": "))
+
+
+def serialize_readable(data):
+    """Indents objects by 4 spaces but keeps lists of plain values on one line, like the hand-written groups_data.json."""
+    return _format_readable(data, 0).encode('utf-8')
+
+
+def is_current(path, content):
+    """True if the file at path already holds content; .json files count as current if they parse to the same value."""
+    existing = read_bytes(path)
+    if existing is None or existing == content:
+        return existing is not None
+    if not path.endswith(".json"):
+        return False
+    try:
+        return json.loads(existing) == json.loads(content)
+    except ValueError:
+        return False
+
+
+def plan_outputs(personas, groups, shard_dir=SHARD_DIR, groups_data_path=GROUPS_DATA_PATH):
+    """Returns ({path: bytes} for every generated file, index dict)."""
+    outputs = {}
+    index = {"version": INDEX_VERSION, "languages": {}}
+    for language, shard in sorted(build_shards(personas, groups).items()):
+        content = serialize(shard)
+        content_hash = hashlib.sha256(content).hexdigest()[:SHARD_HASH_LENGTH]
+        file_name = f"{language_slug(language)}.{content_hash}.json"
+        outputs[os.path.join(shard_dir, file_name)] = content
+        index["languages"][language] = {
+            "url": SHARD_URL_PREFIX + file_name,
+            "personas": len(shard["personas"]),
+            "groups": len(shard["groups"]),
+            "bytes": len(content),
+        }
+    outputs[os.path.join(shard_dir, SHARD_INDEX_NAME)] = serialize(index, indent=1) + b"\n"
+    outputs[groups_data_path] = serialize_readable(groups)
+    return outputs, index
+
+
+def read_bytes(path):
+    try:
+        with open(path, 'rb') as f:
+            return f.read()
+    except FileNotFoundError:
+        return None
+
+
+def write_outputs(outputs, shard_dir=SHARD_DIR):
+    """Writes changed files atomically and removes shards from earlier runs. Returns (written, removed)."""
+    os.makedirs(shard_dir, exist_ok=True)
+    written = []
+    for path, content in outputs.items():
+        if is_current(path, content):
+            continue
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(content)
+        os.replace(tmp_path, path)
+        written.append(path)
+    current = {os.path.basename(p) for p in outputs if os.path.normpath(os.path.dirname(p)) == os.path.normpath(shard_dir)}
+    removed = []
+    for name in sorted(os.listdir(shard_dir)):
+        if name.endswith(".json") and name not in current:
+            os.remove(os.path.join(shard_dir, name))
+            removed.append(name)
+    return written, removed
+
+
+def print_payload_report(index, source_paths):
+    """Compares what every client downloads today with the index plus one language shard."""
+    monolith = b"".join(read_bytes(p) or b"" for p in source_paths)
+    shard_sizes = sorted(entry["bytes"] for entry in index["languages"].values())
+    index_size = len(serialize(index, indent=1))
+    print(f"\n{'Language':<24} {'Personas':>9} {'Groups':>7} {'KB':>8}")
+    for language, entry in index["languages"].items():
+        print(f"{language:<24} {entry['personas']:>9} {entry['groups']:>7} {entry['bytes'] / 1024:>8.1f}")
+    if shard_sizes:
+        median = shard_sizes[len(shard_sizes) // 2]
+        one_language = index_size + median
+        print(f"\nStartup data today (personas.ts + groups.ts source): {len(monolith) / 1024:,.1f} KB "
+              f"({len(gzip.compress(monolith)) / 1024:,.1f} KB gzipped)")
+        print(f"Index + median language shard: {one_language / 1024:,.1f} KB "
+              f"({1 - one_language / len(monolith):.0%} smaller; largest shard {shard_sizes[-1] / 1024:,.1f} KB)")
+
+
+def generate_shards(check_only=False):
+    """
+    Generates the shards, their index and groups_data.json from the canonical source.
+
+    Args:
+        check_only (bool): Build the shards in a temporary directory and only report whether the
+                           committed outputs (groups_data.json) are stale; nothing in the tree is written.
+
+    Returns:
+        bool: True on success (or, with check_only, if the committed outputs are up to date).
+    """
+    try:
+        personas = read_ts_array(*PERSONAS_SOURCE)
+        groups = read_ts_array(*GROUPS_SOURCE)
+    except (OSError, LiteralParseError) as e:
+        print(f"Error reading canonical data: {e}")
+        return False
+    print(f"Read {len(personas)} personas from {PERSONAS_SOURCE[0]} and {len(groups)} groups from {GROUPS_SOURCE[0]}.")
+
+    errors = validate_sources(personas, groups)
+    if errors:
+        print(f"Error: {len(errors)} problem(s) in the canonical data:")
+        for message in errors:
+            print(f"  - {message}")
+        return False
+
+    if check_only:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            outputs, index = plan_outputs(personas, groups, shard_dir=tmp_dir)
+            write_outputs({path: content for path, content in outputs.items() if path.startswith(tmp_dir)}, tmp_dir)
+        stale = [path for path, content in outputs.items() if not path.startswith(tmp_dir) and not is_current(path, content)]
+        for path in stale:
+            print(f"  Out of date: {path}")
+        print(f"Built {len(index['languages'])} language shards; " +
+              ("committed data is up to date." if not stale else f"{len(stale)} committed file(s) are out of date; run shard_data.py."))
+        return not stale
+
+    outputs, index = plan_outputs(personas, groups)
+
+    written, removed = write_outputs(outputs)
+    print(f"Wrote {len(written)} file(s), {len(outputs) - len(written)} unchanged, removed {len(removed)} stale shard(s).")
+    print_payload_report(index, [PERSONAS_SOURCE[0], GROUPS_SOURCE[0]])
+    return True
+
+
+if __name__ == "__main__":
+    # Assuming the script is in the project root, like migrate_to_public.py
+    os.chdir(os.path.dirname(os.path.abspath(__file__)))
+    if not generate_shards(check_only="--check" in sys.argv):
+        sys.exit(1)
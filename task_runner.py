@@ -0,0 +1,258 @@
+import glob
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+
+from ops_metrics import add_counts, phase
+
+# Dependency-aware runner for the ops tasks (shards, indexes, images, ...).
+#
+# Each Task names the tasks it depends on, the files it reads (glob patterns, "**" allowed) and
+# the files it produces. Tasks whose dependencies are done run concurrently on a thread pool.
+# A task can also be ordered after others without depending on them ("after"): it waits for them
+# when they run in the same invocation, e.g. so a task that reads a directory doesn't overlap
+# the tasks writing into it, but they aren't pulled in when it is run on its own.
+# Before a task runs, its input hash is computed from the content of its inputs plus its params;
+# if that hash matches the one recorded for its last successful run and its outputs still exist,
+# the task is skipped. The recorded hash is the one taken before the run, so an input edited
+# while the task was running makes it run again next time. Inputs that are also the task's own
+# outputs (fingerprinting rewrites the HTML pages it reads) are left out of that hash and recorded
+# separately, as they are after the run: the task doesn't invalidate itself by rewriting them,
+# but a later edit to one still makes it run.
+#
+# File hashes are cached by (size, mtime) in the same cache file, so a warm check stats the
+# inputs instead of reading them.
+#
+# With max_workers=1 the tasks run one at a time in the calling thread, so a cProfile of the run
+# (OPS_PROFILE_DIR) covers them.
+
+# --- CONFIGURATION ---
+TASK_CACHE_PATH = './.cache/ops_tasks.json'
+TASK_WORKERS = 4
+# --- END CONFIGURATION ---
+
+CACHE_VERSION = 2
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+class Task:
+    def __init__(self, name, action, inputs=(), outputs=(), deps=(), params=None, description="", after=()):
+        """
+        Args:
+            name (str): Task name used on the command line and in deps.
+            action (callable): Run with no arguments; returns a truthy value on success (a falsy
+                               return or an exception marks the task failed).
+            inputs (tuple): Glob patterns, relative to the working directory, the task reads.
+            outputs (tuple): Paths or patterns the task writes; the task re-runs if any is missing.
+            deps (tuple): Names of tasks that must finish successfully first.
+            params (dict): Settings that affect the result; part of the input hash.
+            after (tuple): Names of tasks that must finish first (in any state) when they are
+                           selected too; unlike deps, they aren't selected because of this task.
+        """
+        self.name = name
+        self.action = action
+        self.inputs = tuple(inputs)
+        self.outputs = tuple(outputs)
+        self.deps = tuple(deps)
+        self.after = tuple(after)
+        self.params = params or {}
+        self.description = description
+
+
+class SerialExecutor:
+    """Drop-in for ThreadPoolExecutor that runs each submitted call right away in the calling thread."""
+
+    def submit(self, fn, *args):
+        future = Future()
+        try:
+            future.set_result(fn(*args))
+        except BaseException as e:
+            future.set_exception(e)
+        return future
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+def load_json_cache(cache_path, version, empty):
+    """
+    Reads a JSON cache file written by save_json_cache.
+
+    Args:
+        version: Expected value of the cache's "version" key (bump it when the format changes).
+        empty (dict): The cache to start from if the file is missing, unreadable or another version.
+
+    Returns:
+        dict: The cache, with "version" set.
+    """
+    try:
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            cache = json.load(f)
+        if isinstance(cache, dict) and cache.get("version") == version:
+            return cache
+    except (OSError, ValueError):
+        pass
+    return dict(empty, version=version)
+
+
+def save_json_cache(cache, cache_path):
+    """Writes a cache dict through a temp file, so a crash never leaves a truncated cache behind."""
+    os.makedirs(os.path.dirname(cache_path) or ".", exist_ok=True)
+    tmp_path = f"{cache_path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(cache, f, sort_keys=True)
+    os.replace(tmp_path, cache_path)
+
+
+def expand_patterns(patterns):
+    """Returns the sorted files matching the glob patterns (directories are skipped)."""
+    paths = set()
+    for pattern in patterns:
+        paths.update(p for p in glob.glob(pattern, recursive=True) if os.path.isfile(p))
+    return sorted(os.path.normpath(p).replace(os.sep, "/") for p in paths)
+
+
+def file_digest(path, file_cache):
+    """sha256 of a file, reusing file_cache[path] while the size and mtime are unchanged."""
+    st = os.stat(path)
+    cached = file_cache.get(path)
+    if cached and cached[0] == st.st_size and cached[1] == st.st_mtime_ns:
+        return cached[2]
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    file_cache[path] = [st.st_size, st.st_mtime_ns, digest.hexdigest()]
+    return file_cache[path][2]
+
+
+def input_hash(task, file_cache, own_outputs=False):
+    """
+    Hash over the task's params and the path and content of its input files.
+
+    Args:
+        own_outputs (bool): Hash only the inputs that are also outputs of the task, instead of
+                            only the ones that aren't.
+    """
+    digest = hashlib.sha256(json.dumps([task.name, task.params], sort_keys=True, default=str).encode())
+    outputs = set(expand_patterns(task.outputs))
+    for path in expand_patterns(task.inputs):
+        if (path in outputs) != own_outputs:
+            continue
+        digest.update(f"{path}\0{file_digest(path, file_cache)}\n".encode())
+    return digest.hexdigest()
+
+
+def outputs_exist(task):
+    return all(glob.glob(pattern, recursive=True) for pattern in task.outputs)
+
+
+def select_tasks(tasks, targets):
+    """Returns the names of targets plus everything they depend on, in dependency order."""
+    ordered = []
+    visiting = set()
+
+    def visit(name, chain):
+        if name not in tasks:
+            raise KeyError(f"Unknown task '{name}'" + (f" (required by '{chain[-1]}')" if chain else ""))
+        if name in ordered:
+            return
+        if name in visiting:
+            raise ValueError(f"Dependency cycle: {' -> '.join(chain + [name])}")
+        visiting.add(name)
+        for dep in tasks[name].deps:
+            visit(dep, chain + [name])
+        visiting.discard(name)
+        ordered.append(name)
+
+    for name in targets:
+        visit(name, [])
+    check_ordering(tasks, ordered)
+    return ordered
+
+
+def check_ordering(tasks, selected):
+    """Raises ValueError if deps and "after" constraints among the selected tasks form a cycle."""
+    waits_for = {name: [n for n in tasks[name].deps + tasks[name].after if n in selected] for name in selected}
+    finished = set()
+    while len(finished) < len(selected):
+        ready = [name for name in selected if name not in finished and all(n in finished for n in waits_for[name])]
+        if not ready:
+            raise ValueError(f"Ordering cycle among: {', '.join(n for n in selected if n not in finished)}")
+        finished.update(ready)
+
+
+def run_tasks(tasks, targets, max_workers=TASK_WORKERS, force=False, cache_path=TASK_CACHE_PATH):
+    """
+    Runs targets and their dependencies, concurrently where the dependency graph allows.
+
+    Args:
+        tasks (dict): {name: Task}.
+        targets (list): Task names to bring up to date.
+        force (bool): Run every selected task even if its inputs are unchanged.
+
+    Returns:
+        dict: {name: "ran" | "skipped" | "failed" | "blocked"}
+    """
+    order = select_tasks(tasks, targets)
+    cache = load_json_cache(cache_path, CACHE_VERSION, {"tasks": {}, "files": {}})
+    file_cache = cache["files"]
+    results = {}
+    start = time.perf_counter()
+
+    def execute(task):
+        with phase(task.name):
+            # Hashing happens after the dependencies finished, since they may have rewritten the inputs
+            current = [input_hash(task, file_cache), input_hash(task, file_cache, own_outputs=True)]
+            if not force and cache["tasks"].get(task.name) == current and outputs_exist(task):
+                return "skipped"
+            print(f"[{task.name}] running...")
+            task_start = time.perf_counter()
+            try:
+                result = task.action()
+            except Exception as e:
+                print(f"[{task.name}] failed: {e}")
+                return "failed"
+            if not result:
+                print(f"[{task.name}] failed.")
+                return "failed"
+            # Pre-run hash of the other inputs; the inputs the task rewrote as it left them
+            cache["tasks"][task.name] = [current[0], input_hash(task, file_cache, own_outputs=True)]
+            print(f"[{task.name}] done in {time.perf_counter() - task_start:.2f}s")
+            return "ran"
+
+    pending = list(order)
+    running = {}
+    with (ThreadPoolExecutor(max_workers=max_workers) if max_workers > 1 else SerialExecutor()) as executor:
+        while pending or running:
+            for name in list(pending):
+                dep_states = [results.get(dep) for dep in tasks[name].deps]
+                if any(state in ("failed", "blocked") for state in dep_states):
+                    results[name] = "blocked"
+                    pending.remove(name)
+                elif (all(state in ("ran", "skipped") for state in dep_states)
+                      and all(other in results for other in tasks[name].after if other in order)):
+                    running[executor.submit(execute, tasks[name])] = name
+                    pending.remove(name)
+            if not running:
+                continue
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                results[running.pop(future)] = future.result()
+
+    # Drop file hashes for paths that no longer exist so the cache doesn't grow forever
+    cache["files"] = {path: entry for path, entry in file_cache.items() if os.path.exists(path)}
+    save_json_cache(cache, cache_path)
+
+    counts = {state: sum(1 for s in results.values() if s == state) for state in ("ran", "skipped", "failed", "blocked")}
+    add_counts(tasks_ran=counts["ran"], tasks_skipped=counts["skipped"], tasks_failed=counts["failed"] + counts["blocked"])
+    print(f"\nTasks: {counts['ran']} ran, {counts['skipped']} up to date, {counts['failed']} failed, "
+          f"{counts['blocked']} not run (dependency failed) in {time.perf_counter() - start:.2f}s.")
+    for name in order:
+        print(f"  {name:<12} {results[name]}")
+    return results
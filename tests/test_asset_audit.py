@@ -0,0 +1,28 @@
+import json
+import os
+
+import asset_audit
+
+
+def write(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(data)
+
+
+def test_duplicates_skip_hard_links_and_fingerprinted_copies(tmp_path):
+    public = tmp_path / "public"
+    write(str(public / "images" / "a.png"), b"A" * 100)
+    write(str(public / "images" / "copy_of_a.png"), b"A" * 100) # The one real duplicate
+    write(str(public / "static" / "images" / "a.1234abcd.png"), b"A" * 100)
+    write(str(public / "images" / "b.png"), b"B" * 50)
+    os.link(public / "images" / "b.png", public / "images" / "b_link.png")
+    manifest_path = str(tmp_path / "asset_manifest.json")
+    with open(manifest_path, 'w', encoding='utf-8') as f:
+        json.dump({"/images/a.png": "/static/images/a.1234abcd.png"}, f)
+
+    assets, _ = asset_audit.hash_public_tree(str(public), str(tmp_path / "hashes.json"), max_workers=2)
+    derived = asset_audit.derived_assets(assets, [manifest_path])
+
+    assert derived == {"static/images/a.1234abcd.png"}
+    assert asset_audit.find_duplicates(assets, derived) == [["images/a.png", "images/copy_of_a.png"]]
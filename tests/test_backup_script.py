@@ -0,0 +1,42 @@
+import os
+import stat
+
+import pytest
+
+from backup_script import restore_snapshot, snapshot_project
+
+
+@pytest.fixture
+def project(tmp_path):
+    source = tmp_path / "project"
+    (source / "bin").mkdir(parents=True)
+    (source / "bin" / "run.sh").write_text("echo hi\n", encoding='utf-8')
+    (source / "bin" / "run.sh").chmod(0o755)
+    (source / "notes.txt").write_text("echo hi\n", encoding='utf-8') # Same content, so the same blob
+    (source / "notes.txt").chmod(0o640)
+    os.utime(source / "notes.txt", ns=(1_500_000_000_000_000_000, 1_500_000_000_000_000_000))
+    return source
+
+
+def test_restore_applies_each_files_mode_and_mtime(project, tmp_path):
+    snapshot_project(str(project), str(tmp_path))
+    restored = tmp_path / "restored"
+    assert restore_snapshot(str(tmp_path / "project_snapshots"), str(restored)) == str(restored)
+
+    assert (restored / "bin" / "run.sh").read_text(encoding='utf-8') == "echo hi\n"
+    assert stat.S_IMODE(os.stat(restored / "bin" / "run.sh").st_mode) == 0o755
+    assert stat.S_IMODE(os.stat(restored / "notes.txt").st_mode) == 0o640
+    assert os.stat(restored / "notes.txt").st_mtime_ns == 1_500_000_000_000_000_000
+
+
+@pytest.mark.skipif(hasattr(os, "geteuid") and os.geteuid() == 0, reason="root ignores file permissions")
+def test_snapshot_files_are_read_only(project, tmp_path):
+    snapshot_path = snapshot_project(str(project), str(tmp_path))
+    with pytest.raises(PermissionError):
+        with open(os.path.join(snapshot_path, "notes.txt"), 'w', encoding='utf-8') as f:
+            f.write("edited")
+
+
+def test_blobs_are_stored_without_write_permission(project, tmp_path):
+    snapshot_path = snapshot_project(str(project), str(tmp_path))
+    assert not os.stat(os.path.join(snapshot_path, "notes.txt")).st_mode & 0o222
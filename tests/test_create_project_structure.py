@@ -0,0 +1,62 @@
+import os
+
+import create_project_structure
+from create_project_structure import create_dir_structure
+
+TEMPLATE = {"js/app.js": "// app\n", "js/config.js": "// config\n", "css/site.css": ""}
+
+
+def write(path, text):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(text)
+
+
+def read(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return f.read()
+
+
+def trashed_files(root):
+    trash = os.path.join(root, create_project_structure.SCAFFOLD_TRASH_DIR)
+    return sorted(os.path.relpath(os.path.join(d, name), trash).split(os.sep, 1)[1]
+                  for d, _, names in os.walk(trash) for name in names)
+
+
+def scaffold_with_edits(root):
+    write(os.path.join(root, "js", "app.js"), "// edited by a developer\n")
+    write(os.path.join(root, "js", "extra.js"), "// not in the template\n")
+
+
+def test_defaults_only_create_missing_files(tmp_path):
+    root = str(tmp_path)
+    scaffold_with_edits(root)
+    plan = create_dir_structure(root, files=dict(TEMPLATE))
+
+    assert sorted(plan["create"]) == ["css/site.css", "js/config.js"]
+    assert plan["keep"] == ["js/app.js"] and plan["update"] == [] and plan["delete"] == []
+    assert read(os.path.join(root, "js", "app.js")) == "// edited by a developer\n"
+    assert os.path.exists(os.path.join(root, "js", "extra.js"))
+    assert read(os.path.join(root, "js", "config.js")) == "// config\n"
+    assert not os.path.exists(os.path.join(root, create_project_structure.SCAFFOLD_TRASH_DIR))
+
+
+def test_overwrite_and_clean_move_old_files_to_trash(tmp_path):
+    root = str(tmp_path)
+    scaffold_with_edits(root)
+    create_dir_structure(root, files=dict(TEMPLATE), clean_reset=True, overwrite=True)
+
+    assert read(os.path.join(root, "js", "app.js")) == "// app\n"
+    assert not os.path.exists(os.path.join(root, "js", "extra.js"))
+    assert trashed_files(root) == [os.path.join("js", "app.js"), os.path.join("js", "extra.js")]
+
+
+def test_dry_run_prints_plan_and_touches_nothing(tmp_path, capsys):
+    root = str(tmp_path)
+    scaffold_with_edits(root)
+    create_dir_structure(root, files=dict(TEMPLATE), clean_reset=True, overwrite=True, dry_run=True)
+
+    output = capsys.readouterr().out
+    assert "update js/app.js" in output and "delete js/extra.js" in output
+    assert read(os.path.join(root, "js", "app.js")) == "// edited by a developer\n"
+    assert not os.path.exists(os.path.join(root, "js", "config.js"))
@@ -0,0 +1,37 @@
+import pytest
+
+from html_rewriter import rewrite_html
+
+
+def resolve(url, base_url_dir):
+    """Prefixes relative image/css paths with "/", like the migration resolver."""
+    return "/" + url if url.startswith(("images/", "css/")) else None
+
+
+@pytest.mark.parametrize("html", [
+    "<p>See the src=images/a.png docs</p>",
+    '<p>Write href="css/site.css" in your page.</p>',
+    '<a title="use src=images/a.png here">link</a>',
+    "<!-- <img src=images/a.png> -->",
+    '<script>const html = \'<img src="images/a.png">\';</script>',
+    '<style>/* <img src="images/a.png"> */</style>',
+    '<img data-srcset="images/a.png">',
+])
+def test_leaves_urls_outside_start_tag_attributes_alone(html):
+    assert rewrite_html(html, resolve) == html
+
+
+def test_rewrites_start_tag_attributes():
+    html = ('<p>x</p><img alt="a > b" src="images/a.png" srcset=\'images/a.png 1x, images/b.png 2x\'>'
+            '<link href=css/site.css rel=stylesheet><div style="background: url(images/bg.png)">src=images/a.png</div>')
+    assert rewrite_html(html, resolve) == (
+        '<p>x</p><img alt="a > b" src="/images/a.png" srcset=\'/images/a.png 1x, /images/b.png 2x\'>'
+        '<link href="/css/site.css" rel=stylesheet><div style="background: url(/images/bg.png)">src=images/a.png</div>')
+
+
+def test_rewrites_script_and_style_tags_but_not_their_bodies():
+    html = ('<script src="images/x.js">var src="images/a.png";</script>'
+            "<style media=all>body { background: url('images/bg.png'); } /* src=images/a.png */</style>")
+    assert rewrite_html(html, resolve) == (
+        '<script src="/images/x.js">var src="images/a.png";</script>'
+        "<style media=all>body { background: url('/images/bg.png'); } /* src=images/a.png */</style>")
@@ -0,0 +1,127 @@
+import os
+
+import pytest
+
+import migrate_to_public
+
+
+class SimulatedCrash(Exception):
+    pass
+
+
+def write(path, text):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(text)
+
+
+def read(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return f.read()
+
+
+def trashed_files(root):
+    trash = os.path.join(root, migrate_to_public.MIGRATION_TRASH_DIR)
+    return [os.path.join(d, name) for d, _, names in os.walk(trash) for name in names]
+
+
+@pytest.fixture
+def project(tmp_path):
+    # public/css already exists, so css/a.css moves file by file: trash the old target, then move in
+    root = str(tmp_path)
+    write(os.path.join(root, "css", "a.css"), "NEW")
+    write(os.path.join(root, "public", "css", "a.css"), "OLD")
+    return root
+
+
+def crash_on_rename(monkeypatch, crash_at, after_rename):
+    """Makes the crash_at-th rename (1-based) raise, either before or after it touches the disk."""
+    real_rename = migrate_to_public._rename
+    calls = []
+
+    def rename(project_root, src_rel, dst_rel):
+        calls.append(src_rel)
+        if len(calls) == crash_at and not after_rename:
+            raise SimulatedCrash()
+        real_rename(project_root, src_rel, dst_rel)
+        if len(calls) == crash_at:
+            raise SimulatedCrash()
+
+    monkeypatch.setattr(migrate_to_public, "_rename", rename)
+
+
+@pytest.mark.parametrize("after_rename", [False, True], ids=["before-second-rename", "after-second-rename"])
+def test_resume_after_crash_between_renames(project, monkeypatch, after_rename):
+    crash_on_rename(monkeypatch, crash_at=2, after_rename=after_rename)
+    assert migrate_to_public.run_journaled_migration(project, {"css": "css"}, max_workers=1) is False
+    monkeypatch.undo()
+
+    assert migrate_to_public.run_journaled_migration(project, {"css": "css"}, max_workers=1) is True
+    assert read(os.path.join(project, "public", "css", "a.css")) == "NEW"
+    assert [read(path) for path in trashed_files(project)] == ["OLD"]
+    assert not os.path.exists(os.path.join(project, "css"))
+
+
+@pytest.mark.parametrize("after_rename", [False, True], ids=["before-second-rename", "after-second-rename"])
+def test_rollback_after_crash_between_renames(project, monkeypatch, after_rename):
+    crash_on_rename(monkeypatch, crash_at=2, after_rename=after_rename)
+    assert migrate_to_public.run_journaled_migration(project, {"css": "css"}, max_workers=1) is False
+    monkeypatch.undo()
+
+    migrate_to_public.rollback_migration(project)
+    assert read(os.path.join(project, "css", "a.css")) == "NEW"
+    assert read(os.path.join(project, "public", "css", "a.css")) == "OLD"
+    assert trashed_files(project) == []
+
+
+def test_rollback_after_resumed_migration(project, monkeypatch):
+    crash_on_rename(monkeypatch, crash_at=2, after_rename=True)
+    migrate_to_public.run_journaled_migration(project, {"css": "css"}, max_workers=1)
+    monkeypatch.undo()
+    migrate_to_public.run_journaled_migration(project, {"css": "css"}, max_workers=1)
+
+    migrate_to_public.rollback_migration(project)
+    assert read(os.path.join(project, "css", "a.css")) == "NEW"
+    assert read(os.path.join(project, "public", "css", "a.css")) == "OLD"
+
+
+def test_rename_never_overwrites(project):
+    with pytest.raises(FileExistsError):
+        migrate_to_public._rename(project, os.path.join("css", "a.css"), os.path.join("public", "css", "a.css"))
+
+
+def test_rollback_after_crash_before_first_rename_is_journaled(project, monkeypatch):
+    crash_on_rename(monkeypatch, crash_at=1, after_rename=True) # OLD is in the trash, nothing journaled yet
+    assert migrate_to_public.run_journaled_migration(project, {"css": "css"}, max_workers=1) is False
+    monkeypatch.undo()
+    assert [read(path) for path in trashed_files(project)] == ["OLD"]
+
+    migrate_to_public.rollback_migration(project)
+    assert read(os.path.join(project, "css", "a.css")) == "NEW"
+    assert read(os.path.join(project, "public", "css", "a.css")) == "OLD"
+    assert trashed_files(project) == []
+
+
+def test_fingerprinted_copies_do_not_share_the_original(tmp_path):
+    root = str(tmp_path)
+    original = os.path.join(root, "public", "images", "a.png")
+    write(original, "v1")
+    manifest = migrate_to_public.fingerprint_public_assets(root)
+    copy_path = os.path.join(root, "public", manifest["/images/a.png"].lstrip("/"))
+
+    with open(original, 'w', encoding='utf-8') as f: # An in-place edit, as cp or an image editor does
+        f.write("v2")
+    assert read(copy_path) == "v1"
+
+
+def test_hard_links_from_older_runs_are_replaced(tmp_path):
+    root = str(tmp_path)
+    original = os.path.join(root, "public", "images", "a.png")
+    write(original, "v1")
+    manifest = migrate_to_public.fingerprint_public_assets(root)
+    copy_path = os.path.join(root, "public", manifest["/images/a.png"].lstrip("/"))
+    os.remove(copy_path)
+    os.link(original, copy_path)
+
+    migrate_to_public.fingerprint_public_assets(root)
+    assert not os.path.samefile(original, copy_path) and read(copy_path) == "v1"
@@ -0,0 +1,18 @@
+import json
+
+import ops
+
+
+def test_seed_key_prefers_flag_then_environment_then_config(monkeypatch):
+    settings = {"service_account_key": "./config-key.json"}
+    monkeypatch.setenv("GOOGLE_APPLICATION_CREDENTIALS", "/secrets/ci-key.json")
+    assert ops.seed_key(settings, "./flag-key.json") == "./flag-key.json"
+    assert ops.seed_key(settings) == "/secrets/ci-key.json"
+
+    monkeypatch.delenv("GOOGLE_APPLICATION_CREDENTIALS")
+    assert ops.seed_key(settings) == "./config-key.json"
+
+
+def test_checked_in_config_does_not_pin_a_key():
+    with open(ops.DEFAULT_CONFIG_PATH, 'r', encoding='utf-8') as f:
+        assert json.load(f)["seed"]["service_account_key"] is None
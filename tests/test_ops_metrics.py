@@ -0,0 +1,51 @@
+import threading
+
+import ops_metrics
+from ops_metrics import add_counts, instrumented_run, phase
+
+
+def test_counts_go_to_the_calling_threads_phase(monkeypatch):
+    monkeypatch.setattr(ops_metrics, "METRICS_PATH", "")
+    worker_in_phase = threading.Event()
+    main_counted = threading.Event()
+
+    def worker():
+        with phase("worker"):
+            worker_in_phase.set()
+            main_counted.wait(5)
+            add_counts(files=2)
+        add_counts(bytes=7) # No phase open on this thread: counts go to the run
+
+    with instrumented_run("test") as run:
+        with phase("main"):
+            thread = threading.Thread(target=worker)
+            thread.start()
+            worker_in_phase.wait(5)
+            add_counts(files=1) # The worker's phase was opened last, but on another thread
+            with phase("inner"):
+                add_counts(files=10)
+            main_counted.set()
+            thread.join()
+
+    phases = {p.name: p for p in run.phases}
+    assert phases["main"].counts == {"files": 1}
+    assert phases["inner"].counts == {"files": 10}
+    assert phases["worker"].counts == {"files": 2}
+    assert (phases["main"].parent, phases["inner"].parent, phases["worker"].parent) == (None, "main", None)
+    assert run.counts == {"bytes": 7}
+
+
+def test_concurrent_add_counts_are_not_lost(monkeypatch):
+    monkeypatch.setattr(ops_metrics, "METRICS_PATH", "")
+
+    def worker():
+        for _ in range(10000):
+            add_counts(files=1)
+
+    with instrumented_run("test") as run:
+        threads = [threading.Thread(target=worker) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    assert run.counts == {"files": 40000}
@@ -0,0 +1,59 @@
+import json
+import os
+
+import pytest
+
+pytest.importorskip("PIL")
+
+import optimize_images
+from PIL import Image
+
+
+def make_image(path, width=700, height=400):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    Image.new("RGB", (width, height), (200, 80, 40)).save(path)
+
+
+@pytest.fixture
+def site(tmp_path):
+    public = tmp_path / "public"
+    make_image(str(public / "images" / "a.png"))
+    make_image(str(public / "images" / "groups" / "b.png"))
+    return {"source_dir": str(public / "images"), "output_dir": str(public / "optimized"),
+            "manifest_path": str(tmp_path / "image_manifest.json"), "cache_path": str(tmp_path / "cache.json"),
+            "max_workers": 1}
+
+
+def variant_files(site):
+    root = site["output_dir"]
+    return sorted(os.path.relpath(os.path.join(d, n), root).replace(os.sep, "/")
+                  for d, _, names in os.walk(root) for n in names)
+
+
+def test_failing_format_does_not_drop_the_others(site, tmp_path):
+    stem = str(tmp_path / "out" / "a")
+    variants, errors = optimize_images.process_image(
+        (os.path.join(site["source_dir"], "a.png"), stem, {"webp": {"quality": 80}, "nosuchformat": {}}))
+    assert {v["format"] for v in variants} == {"webp"}
+    assert [v["width"] for v in variants] == [320, 640, 700]
+    assert list(errors) == ["nosuchformat"]
+    assert sorted(os.listdir(tmp_path / "out")) == ["a-320w.webp", "a-640w.webp", "a-700w.webp"]
+
+
+def test_falls_back_to_webp_without_avif(site, monkeypatch):
+    monkeypatch.setattr(optimize_images, "can_encode", lambda image_format: image_format != "avif")
+    manifest = optimize_images.optimize_images(**site)
+    assert {v["format"] for entry in manifest.values() for v in entry["variants"]} == {"webp"}
+
+
+def test_variants_of_deleted_sources_are_pruned(site):
+    optimize_images.optimize_images(**site)
+    assert any(path.startswith("images/groups/b-") for path in variant_files(site))
+
+    os.remove(os.path.join(site["source_dir"], "groups", "b.png"))
+    manifest = optimize_images.optimize_images(**site)
+
+    assert list(manifest) == ["/images/a.png"]
+    with open(site["manifest_path"], 'r', encoding='utf-8') as f:
+        assert list(json.load(f)) == ["/images/a.png"]
+    assert variant_files(site) and all(path.startswith("images/a-") for path in variant_files(site))
@@ -0,0 +1,18 @@
+from fake_firestore import FakeFirestoreClient
+from populate_firestore_groups import count_group_members
+
+
+def test_member_counts_are_queried_concurrently():
+    db = FakeFirestoreClient()
+    for i in range(3):
+        db.collection('groups').document("a").collection('members').document(f"user{i}").set({"joined": i})
+    db.collection('groups').document("b").collection('members').document("user0").set({"joined": 0})
+    group_ids = ["a", "b", "c"] + [f"empty{i}" for i in range(13)]
+
+    db.latency = 0.05
+    db.peak_in_flight = 0
+    counts = count_group_members(db, group_ids, max_workers=8)
+
+    assert counts == dict({"a": 3, "b": 1, "c": 0}, **{f"empty{i}": 0 for i in range(13)})
+    assert list(counts) == group_ids
+    assert 1 < db.peak_in_flight <= 8
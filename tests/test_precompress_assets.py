@@ -0,0 +1,26 @@
+import os
+
+import precompress_assets
+
+
+def stored_blobs(cache_dir):
+    return sorted(name for _, _, names in os.walk(cache_dir) for name in names if name != "index.json")
+
+
+def test_blobs_of_old_builds_are_pruned(tmp_path):
+    dist, cache_dir = str(tmp_path / "dist"), str(tmp_path / "cache")
+    os.makedirs(os.path.join(dist, "assets"))
+    bundle = os.path.join(dist, "assets", "app.1111.js")
+    with open(bundle, 'w', encoding='utf-8') as f:
+        f.write("console.log('first build');\n" * 200)
+    precompress_assets.precompress_build(dist, cache_dir, max_workers=1)
+    first = stored_blobs(cache_dir)
+    assert first
+
+    os.remove(bundle) # The next build emits a bundle under a new content hash
+    with open(os.path.join(dist, "assets", "app.2222.js"), 'w', encoding='utf-8') as f:
+        f.write("console.log('second build');\n" * 200)
+    precompress_assets.precompress_build(dist, cache_dir, max_workers=1)
+
+    second = stored_blobs(cache_dir)
+    assert len(second) == len(first) and not set(first) & set(second)
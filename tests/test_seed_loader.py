@@ -0,0 +1,52 @@
+import json
+
+import pytest
+
+from seed_loader import SeedValidationError, iter_json_records
+
+RECORDS = [{"id": "a", "name": "A"}, {"id": "b", "name": "B"}]
+
+
+@pytest.mark.parametrize("name", ["groups.jsonl", "groups.ndjson", "groups.txt", "groups.JSONL"])
+def test_reads_one_record_per_line(tmp_path, name):
+    path = tmp_path / name
+    path.write_text("\n" + "\n".join(json.dumps(record) for record in RECORDS) + "\n", encoding='utf-8')
+    assert list(iter_json_records(str(path))) == [(2, RECORDS[0]), (3, RECORDS[1])]
+
+
+@pytest.mark.parametrize("name", ["groups.json", "groups"])
+def test_reads_json_arrays(tmp_path, name):
+    path = tmp_path / name
+    path.write_text(json.dumps(RECORDS, indent=4), encoding='utf-8')
+    assert list(iter_json_records(str(path), chunk_size=8)) == [(1, RECORDS[0]), (2, RECORDS[1])]
+
+
+@pytest.mark.parametrize("text", ['[{"id": "a"}{"id": "b"}]', '[,{"id": "a"}]', '[{"id": "a"},,{"id": "b"}]',
+                                  '[{"id": "a"},]', '[{"id": "a"} {"id": "b"}]'])
+def test_rejects_missing_or_extra_separators(tmp_path, text):
+    path = tmp_path / "groups.json"
+    path.write_text(text, encoding='utf-8')
+    with pytest.raises(json.JSONDecodeError):
+        list(iter_json_records(str(path), chunk_size=4))
+
+
+def test_reads_an_empty_array(tmp_path):
+    path = tmp_path / "groups.json"
+    path.write_text("[ ]", encoding='utf-8')
+    assert list(iter_json_records(str(path))) == []
+
+
+def test_asset_refs_resolve_through_the_index_lookup(tmp_path):
+    from asset_index import AssetIndex
+    from seed_loader import validate_seed_file
+
+    index = AssetIndex(["/images/groups/cafe.png"], ["ana_tutor"])
+    group = {"id": "cafe_es", "name": "Café", "language": "Spanish", "tutorId": "ana_tutor"}
+    path = tmp_path / "groups.json"
+    path.write_text(json.dumps([dict(group, groupPhotoUrl="/images/groups/cafe.png?v=2"),
+                                dict(group, id="cafe_fr", groupPhotoUrl="/images/groups/cafe.png#top")]), encoding='utf-8')
+    assert validate_seed_file(str(path), refs={"tutor": index.has_persona, "asset": index.has_asset}) == 2
+
+    path.write_text(json.dumps([dict(group, groupPhotoUrl="/images/groups/missing.png?v=2")]), encoding='utf-8')
+    with pytest.raises(SeedValidationError):
+        validate_seed_file(str(path), refs={"tutor": index.has_persona, "asset": index.has_asset})
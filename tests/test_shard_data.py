@@ -0,0 +1,62 @@
+import json
+import os
+
+import pytest
+
+import shard_data
+
+PERSONAS_TS = 'export const personasData = [{ id: "ana_tutor", language: "Spanish" }];\n'
+GROUPS_TS = ('export const groupsDataArray = [\n'
+             '  { id: "cafe_es", name: "Café", language: "Spanish", tutorId: "ana_tutor", tags: ["a", "b"] },\n'
+             '];\n')
+GROUPS = [{"id": "cafe_es", "name": "Café", "language": "Spanish", "tutorId": "ana_tutor", "tags": ["a", "b"]}]
+
+
+@pytest.fixture
+def project(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    os.makedirs("src/data")
+    with open("src/data/personas.ts", 'w', encoding='utf-8') as f:
+        f.write(PERSONAS_TS)
+    with open("src/data/groups.ts", 'w', encoding='utf-8') as f:
+        f.write(GROUPS_TS)
+    return tmp_path
+
+
+def test_check_passes_on_a_clean_checkout_without_shards(project):
+    with open("groups_data.json", 'w', encoding='utf-8') as f:
+        f.write('[\n  {"id": "cafe_es", "name": "Café", "language": "Spanish",\n   "tutorId": "ana_tutor", "tags": [ "a", "b" ]}\n]')
+
+    assert shard_data.generate_shards(check_only=True)
+    assert not os.path.exists(shard_data.SHARD_DIR)
+
+
+def test_check_fails_when_groups_data_is_stale(project):
+    with open("groups_data.json", 'w', encoding='utf-8') as f:
+        json.dump([dict(GROUPS[0], name="Old name")], f)
+
+    assert not shard_data.generate_shards(check_only=True)
+
+
+def test_hand_formatting_survives_regeneration(project):
+    hand_written = '[\n    {"id": "cafe_es", "name": "Café", "language": "Spanish", "tutorId": "ana_tutor",\n     "tags": [ "a", "b" ]}\n]'
+    with open("groups_data.json", 'w', encoding='utf-8') as f:
+        f.write(hand_written)
+
+    assert shard_data.generate_shards()
+    with open("groups_data.json", 'r', encoding='utf-8') as f:
+        assert f.read() == hand_written
+    assert os.path.exists(os.path.join(shard_data.SHARD_DIR, shard_data.SHARD_INDEX_NAME))
+
+
+def test_groups_data_keeps_plain_lists_on_one_line():
+    assert shard_data.serialize_readable(GROUPS).decode('utf-8') == (
+        '[\n'
+        '    {\n'
+        '        "id": "cafe_es",\n'
+        '        "name": "Café",\n'
+        '        "language": "Spanish",\n'
+        '        "tutorId": "ana_tutor",\n'
+        '        "tags": ["a", "b"]\n'
+        '    }\n'
+        ']')
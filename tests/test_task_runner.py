@@ -0,0 +1,80 @@
+import os
+import time
+
+import pytest
+
+from task_runner import Task, run_tasks
+
+
+def write(path, text):
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(text)
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+def run(task):
+    return run_tasks({task.name: task}, [task.name], max_workers=1, cache_path="cache.json")[task.name]
+
+
+def test_input_edited_during_the_run_makes_it_run_again(workdir):
+    write("source.txt", "v1")
+
+    def build():
+        write("out.txt", "built")
+        write("source.txt", "v2, saved") # Someone saves the file while the task is running
+        return True
+
+    task = Task("build", build, inputs=["source.txt"], outputs=["out.txt"])
+    assert run(task) == "ran"
+    assert run(Task("build", lambda: True, inputs=["source.txt"], outputs=["out.txt"])) == "ran"
+    assert run(Task("build", lambda: True, inputs=["source.txt"], outputs=["out.txt"])) == "skipped"
+
+
+def test_rewriting_its_own_outputs_does_not_invalidate_the_task(workdir):
+    write("page.html", '<img src="a.png">')
+    runs = []
+
+    def fingerprint():
+        runs.append(1)
+        with open("page.html", 'r', encoding='utf-8') as f:
+            page = f.read()
+        write("page.html", page.replace('"a.png"', '"a.1234.png"'))
+        return True
+
+    task = Task("fingerprint", fingerprint, inputs=["*.html"], outputs=["*.html"])
+    assert [run(task), run(task)] == ["ran", "skipped"]
+
+    write("page.html", '<img src="a.1234.png"><img src="a.png">') # A later edit still counts
+    assert [run(task), run(task)] == ["ran", "skipped"]
+    assert len(runs) == 2
+
+
+def test_after_orders_tasks_without_selecting_them(workdir):
+    events = []
+
+    def write_tree():
+        time.sleep(0.05)
+        events.append("write done")
+        return True
+
+    def read_tree():
+        events.append("read start")
+        return True
+
+    tasks = {"write": Task("write", write_tree), "read": Task("read", read_tree, after=["write"])}
+    results = run_tasks(tasks, ["read", "write"], max_workers=4, cache_path="cache.json", force=True)
+    assert results == {"write": "ran", "read": "ran"}
+    assert events == ["write done", "read start"]
+
+    assert run_tasks(tasks, ["read"], max_workers=4, cache_path="cache.json", force=True) == {"read": "ran"}
+
+
+def test_after_cycle_is_rejected(workdir):
+    tasks = {"a": Task("a", lambda: True, after=["b"]), "b": Task("b", lambda: True, deps=["a"])}
+    with pytest.raises(ValueError):
+        run_tasks(tasks, ["b"], max_workers=1, cache_path="cache.json")